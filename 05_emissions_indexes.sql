@@ -0,0 +1,9 @@
+USE ghg_emissions_db;
+
+-- INDEXES FOR KEYSET PAGINATION OF EMISSIONS DATA
+-- View Data pages seek on (created_at, id), newest first, optionally within
+-- one company and reporting period. InnoDB appends the primary key to every
+-- secondary index, so these also cover the id tie-breaker.
+CREATE INDEX idx_emissions_created ON emissions_data (created_at);
+CREATE INDEX idx_emissions_company_created ON emissions_data (company_id, created_at);
+CREATE INDEX idx_emissions_company_period_created ON emissions_data (company_id, reporting_period, created_at);
@@ -0,0 +1,16 @@
+USE ghg_emissions_db;
+
+-- CATEGORY CATALOGUE VERSION
+-- The application caches ghg_categories in memory and reloads it only when
+-- this version changes. Any script or statement that edits ghg_categories
+-- must bump the version in the same transaction:
+--   INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+--   ON DUPLICATE KEY UPDATE version = version + 1;
+CREATE TABLE IF NOT EXISTS catalog_version (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
@@ -0,0 +1,34 @@
+USE ghg_emissions_db;
+
+-- EMISSIONS ROLLUP
+-- One row per company, reporting period and category with the sums and
+-- counts of the matching emissions_data rows. The application updates it in
+-- the same transaction as every insert and delete; summaries and category
+-- breakdowns read it instead of aggregating emissions_data.
+-- Check or rebuild it with: python emissions_rollup.py [--rebuild]
+CREATE TABLE IF NOT EXISTS emissions_rollup (
+    company_id INT NOT NULL,
+    reporting_period VARCHAR(20) NOT NULL,
+    category_id INT NOT NULL,
+    scope_number INT NOT NULL,
+    total_activity DECIMAL(20,4) NOT NULL DEFAULT 0,
+    total_emission_factor DECIMAL(20,6) NOT NULL DEFAULT 0,
+    total_co2e DECIMAL(20,4) NOT NULL DEFAULT 0,
+    entry_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (company_id, reporting_period, category_id),
+    INDEX idx_rollup_period (reporting_period),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill from existing entries
+DELETE FROM emissions_rollup;
+INSERT INTO emissions_rollup
+    (company_id, reporting_period, category_id, scope_number,
+     total_activity, total_emission_factor, total_co2e, entry_count)
+SELECT e.company_id, e.reporting_period, e.category_id, c.scope_number,
+       SUM(e.activity_data), SUM(e.emission_factor), SUM(e.co2_equivalent), COUNT(*)
+FROM emissions_data e
+JOIN ghg_categories c ON e.category_id = c.id
+GROUP BY e.company_id, e.reporting_period, e.category_id, c.scope_number;
@@ -0,0 +1,35 @@
+USE ghg_emissions_db;
+
+-- CATEGORY GAS FACTORS
+-- kg of each gas per activity unit, for categories whose CO2e factor can be
+-- split by gas. Categories without rows here are calculated from their
+-- pre-aggregated ghg_categories.emission_factor. Gases: CO2, CH4, N2O,
+-- HFC-32, HFC-125, HFC-134a, HFC-143a, SF6 (see gwp.py for the GWP sets).
+-- Edits must bump the catalogue version in the same transaction, like edits
+-- to ghg_categories.
+CREATE TABLE IF NOT EXISTS category_gas_factors (
+    category_id INT NOT NULL,
+    gas VARCHAR(20) NOT NULL,
+    factor DECIMAL(20,10) NOT NULL,
+    PRIMARY KEY (category_id, gas),
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Fugitive emissions are released as the gas itself (1 kg per kg);
+-- R-410A is a 50/50 blend of HFC-32 and HFC-125 (2087.5 under AR4; the
+-- catalogue keeps the published 2088, and AR4 restatements keep stored CO2e)
+INSERT INTO category_gas_factors (category_id, gas, factor)
+SELECT id, gas, factor FROM ghg_categories
+JOIN (
+    SELECT 'S1-04-01' AS code, 'HFC-134a' AS gas, 1.0 AS factor
+    UNION ALL SELECT 'S1-04-02', 'CH4', 1.0
+    UNION ALL SELECT 'S1-04-03', 'CO2', 1.0
+    UNION ALL SELECT 'S1-04-04', 'SF6', 1.0
+    UNION ALL SELECT 'S1-04-05', 'HFC-32', 0.5
+    UNION ALL SELECT 'S1-04-05', 'HFC-125', 0.5
+    UNION ALL SELECT 'S1-04-06', 'N2O', 1.0
+) gases ON ghg_categories.subcategory_code = gases.code
+ON DUPLICATE KEY UPDATE factor = VALUES(factor);
+
+INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
@@ -0,0 +1,25 @@
+USE ghg_emissions_db;
+
+-- EMISSION FACTOR VERSIONS
+-- Dated factors per category, e.g. one row per yearly UK conversion factor
+-- release. A version applies from valid_from to valid_to inclusive, or
+-- indefinitely when valid_to is NULL. Reporting periods without a matching
+-- version use ghg_categories.emission_factor. Where versions overlap, the
+-- later-starting one applies. Adding an open-ended version through the app
+-- ends the category's open version the day before; edits made here must
+-- bump the catalogue version in the same transaction.
+CREATE TABLE IF NOT EXISTS emission_factor_versions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    category_id INT NOT NULL,
+    emission_factor DECIMAL(15,8) NOT NULL,
+    valid_from DATE NOT NULL,
+    valid_to DATE NULL,
+    source VARCHAR(100),
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_factor_version (category_id, valid_from),
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
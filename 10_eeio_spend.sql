@@ -0,0 +1,69 @@
+USE ghg_emissions_db;
+
+-- SPEND-BASED SCOPE 3 (EEIO)
+-- eeio_sectors holds the sector intensity vector of an environmentally-
+-- extended input-output table (kg CO2e per £ of spend). Companies map their
+-- general-ledger accounts to sectors in ledger_sector_map, per Scope 3
+-- category, with shares summing to 1 when an account spans several sectors.
+-- ledger_lines holds imported ledger spend. Load a published table and
+-- ledger exports with eeio.py; the sectors below are illustrative only.
+CREATE TABLE IF NOT EXISTS eeio_sectors (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sector_code VARCHAR(20) NOT NULL UNIQUE,
+    sector_name VARCHAR(200) NOT NULL,
+    intensity DECIMAL(15,8) NOT NULL,
+    source VARCHAR(100)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS ledger_sector_map (
+    company_id INT NOT NULL,
+    account_code VARCHAR(50) NOT NULL,
+    sector_id INT NOT NULL,
+    scope3_category ENUM('S3-01', 'S3-02') NOT NULL DEFAULT 'S3-01',
+    share DECIMAL(7,6) NOT NULL DEFAULT 1,
+    PRIMARY KEY (company_id, account_code, sector_id, scope3_category),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (sector_id) REFERENCES eeio_sectors(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS ledger_lines (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    reporting_period VARCHAR(20) NOT NULL,
+    account_code VARCHAR(50) NOT NULL,
+    description VARCHAR(255),
+    supplier VARCHAR(200),
+    amount DECIMAL(15,2) NOT NULL,
+    import_batch VARCHAR(50),
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_ledger_company_period (company_id, reporting_period, account_code),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO eeio_sectors (sector_code, sector_name, intensity, source) VALUES
+('SIC-62', 'Computer programming and consultancy', 0.11000000, 'Illustrative'),
+('SIC-69', 'Legal and accounting services', 0.09000000, 'Illustrative'),
+('SIC-73', 'Advertising and market research', 0.15000000, 'Illustrative'),
+('SIC-56', 'Food and beverage services', 0.38000000, 'Illustrative'),
+('SIC-17', 'Paper and paper products', 0.62000000, 'Illustrative'),
+('SIC-26', 'Computer, electronic and optical products', 0.33000000, 'Illustrative'),
+('SIC-31', 'Furniture', 0.45000000, 'Illustrative'),
+('SIC-41', 'Construction of buildings', 0.36000000, 'Illustrative'),
+('SIC-29', 'Motor vehicles', 0.41000000, 'Illustrative')
+ON DUPLICATE KEY UPDATE sector_name = VALUES(sector_name);
+
+-- Subcategories the spend-based totals are recorded under. Their factor is
+-- only a typical intensity; recorded entries carry the ledger's own average.
+INSERT INTO ghg_categories (scope_number, scope_name, category_code, category_name, subcategory_code, subcategory_name, emission_factor, unit, description)
+SELECT * FROM (
+    SELECT 3 AS scope_number, 'Other Indirect GHG Emissions' AS scope_name, 'S3-01' AS category_code,
+           'Purchased Goods and Services' AS category_name, 'S3-01-09' AS subcategory_code,
+           'Spend-Based (EEIO Sectors)' AS subcategory_name, 0.25000000 AS emission_factor,
+           'kg CO2e/£' AS unit, 'General-ledger spend mapped to EEIO sectors' AS description
+    UNION ALL SELECT 3, 'Other Indirect GHG Emissions', 'S3-02', 'Capital Goods', 'S3-02-06',
+           'Spend-Based (EEIO Sectors)', 0.38000000, 'kg CO2e/£', 'General-ledger capital spend mapped to EEIO sectors'
+) spend
+WHERE NOT EXISTS (SELECT 1 FROM ghg_categories c WHERE c.subcategory_code = spend.subcategory_code);
+
+INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
@@ -1,4 +1,5 @@
 from database_operations import DatabaseManager
+from category_catalog import bump_catalog_version
 
 # All 15 Scope 3 categories according to GHG Protocol
 scope3_categories = [
@@ -58,9 +59,12 @@ if db.connect():
             else:
                 print(f"⏭️  Already exists: {subcategory_name}")
         
-        # Commit all changes
+        # Commit all changes (bumping the version so running apps reload the catalogue)
+        if added_count:
+            bump_catalog_version(cursor)
         db.connection.commit()
         cursor.close()
+        db.invalidate_category_cache()
         
     except Exception as e:
         print(f"❌ Database operation error: {e}")
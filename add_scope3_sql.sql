@@ -21,5 +21,9 @@ VALUES
 (3, 'Scope 3 (Value chain emissions)', '3.14', 'Franchises', '3.14.1', 'Franchises', 0.8, 'units', 'Emissions from franchise operations'),
 (3, 'Scope 3 (Value chain emissions)', '3.15', 'Investments', '3.15.1', 'Investments', 1.0, 'USD', 'Emissions from investments');
 
+-- Tell running apps to reload the category catalogue
+INSERT INTO catalog_version (name, version) VALUES ('ghg_categories', 1)
+ON DUPLICATE KEY UPDATE version = version + 1;
+
 -- Verify the count
 SELECT COUNT(*) as total_scope3_categories FROM ghg_categories WHERE scope_number = 3;
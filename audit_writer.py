@@ -0,0 +1,204 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Any
+
+from connection_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+AUDIT_INSERT = """
+INSERT INTO audit_trail (user_id, action, table_name, record_id, old_values, new_values, ip_address)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+_STOP = object()
+
+
+class AuditWriter:
+    """Background audit_trail writer fed by a bounded in-process queue.
+
+    Request threads only enqueue rows. A worker thread writes them in
+    batches when ``batch_size`` rows are waiting or ``flush_interval``
+    seconds have passed. When the queue is full, ``log`` blocks for up to
+    ``enqueue_timeout`` seconds and then spools the row to a local file.
+    Batches that cannot be written are spooled too and replayed on the
+    next successful flush.
+    """
+
+    def __init__(self, pool: ConnectionPool, spool_path: str, queue_size: int = 10000,
+                 batch_size: int = 200, flush_interval: float = 1.0, enqueue_timeout: float = 0.5):
+        self.pool = pool
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._spool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+        self._enqueued = 0
+        self._written = 0
+        self._spooled = 0
+        self._replayed = 0
+        self._batches = 0
+        self._failed_batches = 0
+
+    def start(self):
+        """Start the worker thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def log(self, user_id: int, action: str, table_name: str, record_id: int,
+            old_values: Dict, new_values: Dict, ip_address: str = None) -> bool:
+        """Queue one audit row; returns False if it had to be spooled instead"""
+        row = (user_id, action, table_name, record_id,
+               json.dumps(old_values, default=str), json.dumps(new_values, default=str), ip_address)
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning("Audit queue full; spooling audit row to disk")
+            self._spool([row])
+            with self._stats_lock:
+                self._spooled += 1
+            return False
+
+        with self._stats_lock:
+            self._enqueued += 1
+        return True
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until every row queued so far has been written or spooled"""
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush outstanding rows and stop the worker"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("Audit queue full at shutdown; remaining rows stay queued")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and write counters"""
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'enqueued': self._enqueued,
+                'written': self._written,
+                'spooled': self._spooled,
+                'replayed': self._replayed,
+                'batches': self._batches,
+                'failed_batches': self._failed_batches,
+                'spool_pending': os.path.exists(self.spool_path)
+            }
+
+    def _run(self):
+        batch = []
+        waiters = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None and not stop:
+                batch.append(item)
+
+            if stop or waiters or len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                if batch:
+                    self._write_batch(batch)
+                    batch = []
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                deadline = time.monotonic() + self.flush_interval
+
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[tuple]):
+        """Write a batch (plus any spooled rows) or spool it on failure"""
+        replay = self._take_spool()
+        rows = replay + batch
+        connection = None
+        try:
+            connection = self.pool.get_connection()
+            cursor = connection.cursor()
+            for start in range(0, len(rows), self.batch_size):
+                cursor.executemany(AUDIT_INSERT, rows[start:start + self.batch_size])
+            connection.commit()
+            cursor.close()
+            self.pool.release(connection)
+
+            with self._stats_lock:
+                self._written += len(rows)
+                self._replayed += len(replay)
+                self._batches += 1
+        except Exception as e:
+            logger.error(f"Audit batch write failed, spooling {len(rows)} rows: {e}")
+            if connection is not None:
+                self.pool.release(connection, discard=True)
+            self._spool(rows)
+            with self._stats_lock:
+                self._spooled += len(batch)
+                self._failed_batches += 1
+
+    def _spool(self, rows: List[tuple]):
+        """Append rows to the local spool file"""
+        try:
+            with self._spool_lock:
+                with open(self.spool_path, 'a', encoding='utf-8') as spool:
+                    for row in rows:
+                        spool.write(json.dumps(row) + '\n')
+        except OSError as e:
+            logger.error(f"Failed to spool {len(rows)} audit rows to {self.spool_path}: {e}")
+
+    def _take_spool(self) -> List[tuple]:
+        """Read and remove the spool file"""
+        with self._spool_lock:
+            if not os.path.exists(self.spool_path):
+                return []
+            try:
+                with open(self.spool_path, 'r', encoding='utf-8') as spool:
+                    rows = [tuple(json.loads(line)) for line in spool if line.strip()]
+                os.remove(self.spool_path)
+                return rows
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to read audit spool {self.spool_path}: {e}")
+                return []
+
+
+_writer: Optional[AuditWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer(pool: ConnectionPool, **writer_config) -> AuditWriter:
+    """Get the process-wide audit writer, starting it on first use"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AuditWriter(pool, **writer_config)
+            _writer.start()
+            atexit.register(_writer.shutdown)
+        return _writer
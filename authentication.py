@@ -8,12 +8,12 @@ class AuthenticationManager:
     
     def login_user(self, username: str, password: str) -> bool:
         """Login user and store session data"""
-        if not self.db.connect():
-            st.error("Database connection failed")
-            return False
-        
-        user_data = self.db.authenticate_user(username, password)
-        self.db.disconnect()
+        with self.db.session() as connected:
+            if not connected:
+                st.error("Database connection failed")
+                return False
+            
+            user_data = self.db.authenticate_user(username, password)
         
         if user_data:
             # Store user data in session state
@@ -120,10 +120,10 @@ def create_registration_form(db_manager: DatabaseManager):
             # Get companies for selection
             company_id = None
             try:
-                if db_manager.connect():
-                    companies = db_manager.get_companies(verification_status='verified')
-                    db_manager.disconnect()
-                    
+                with db_manager.session() as connected:
+                    companies = db_manager.get_companies(verification_status='verified') if connected else None
+                
+                if companies is not None:
                     if companies:
                         company_options = {comp['company_name']: comp['id'] for comp in companies}
                         company_options['None (No Company)'] = None
@@ -142,10 +142,10 @@ def create_registration_form(db_manager: DatabaseManager):
         if submit_button:
             if username and email and password:
                 try:
-                    if db_manager.connect():
-                        success = db_manager.create_user(username, email, password, role, company_id)
-                        db_manager.disconnect()
-                        
+                    with db_manager.session() as connected:
+                        success = db_manager.create_user(username, email, password, role, company_id) if connected else None
+                    
+                    if success is not None:
                         if success:
                             st.success("✅ User registered successfully!")
                             st.info("You can now login with your credentials.")
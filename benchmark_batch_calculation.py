@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark GHGCalculator.calculate_batch on synthetic activity lines.
+
+Runs against in-memory indexes, so no database is needed:
+
+    python benchmark_batch_calculation.py --lines 1000000 --repeat 5
+    python benchmark_batch_calculation.py --periods   # with dated factor versions
+"""
+
+import argparse
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from category_catalog import CategoryIndex
+from factor_versions import FactorVersionIndex
+from fake_database import IndexOnlyDatabase
+from ghg_calculator import GHGCalculator
+
+
+def make_categories(count: int, rng: np.random.Generator):
+    return [
+        {
+            'id': category_id,
+            'scope_number': int(rng.integers(1, 4)),
+            'scope_name': 'Scope',
+            'category_code': f"C{category_id}",
+            'category_name': f"Category {category_id}",
+            'subcategory_code': f"C{category_id}-01",
+            'subcategory_name': f"Subcategory {category_id}",
+            'emission_factor': float(rng.uniform(0.01, 3.0)),
+            'unit': 'kg CO2e/unit',
+            'description': None,
+            'is_active': True
+        }
+        for category_id in range(1, count + 1)
+    ]
+
+
+YEARS = range(2019, 2025)
+PERIODS = [str(year) for year in YEARS] + [f"Q{quarter}-{year}" for year in YEARS for quarter in range(1, 5)]
+
+
+def make_versions(count: int, rng: np.random.Generator) -> FactorVersionIndex:
+    # One yearly release per category, the latest left open-ended
+    return FactorVersionIndex([
+        (category_id, float(rng.uniform(0.01, 3.0)), date(year, 1, 1),
+         date(year, 12, 31) if year < YEARS[-1] else None, f"Release {year}")
+        for category_id in range(1, count + 1) for year in YEARS
+    ])
+
+
+def make_lines(count: int, categories: int, rng: np.random.Generator, periods: bool) -> pd.DataFrame:
+    # ~1% unknown categories, ~1% non-positive activity, ~10% factor overrides
+    overrides = np.where(rng.random(count) < 0.1, rng.uniform(0.01, 3.0, count), np.nan)
+    lines = pd.DataFrame({
+        'category_id': rng.integers(1, int(categories * 1.01) + 1, count),
+        'activity_data': rng.uniform(-10, 1000, count),
+        'emission_factor': overrides
+    })
+    if periods:
+        lines['reporting_period'] = rng.choice(np.array(PERIODS, dtype=object), count)
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized batch emission calculation")
+    parser.add_argument('--lines', type=int, default=1_000_000, help="activity lines per batch")
+    parser.add_argument('--categories', type=int, default=200, help="categories in the catalogue")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--periods', action='store_true',
+                        help="spread lines over reporting periods with yearly factor versions")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    calculator = GHGCalculator(IndexOnlyDatabase(
+        CategoryIndex(make_categories(args.categories, rng)), make_versions(args.categories, rng)
+    ))
+    lines = make_lines(args.lines, args.categories, rng, args.periods)
+
+    print("⚡ Batch calculation benchmark")
+    print("=" * 40)
+    print(f"Lines: {args.lines:,}  Categories: {args.categories}  Runs: {args.repeat}  "
+          f"Periods: {len(PERIODS) if args.periods else 'none'}")
+
+    calculator.calculate_batch(lines.head(1000))  # warm-up
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = calculator.calculate_batch(lines)
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"Best: {best * 1000:.1f} ms  Median: {sorted(timings)[len(timings) // 2] * 1000:.1f} ms")
+    print(f"Throughput: {args.lines / best:,.0f} lines/s")
+    print(f"Valid lines: {int(result['valid'].sum()):,}  "
+          f"Total CO2e: {result.loc[result['valid'], 'co2_equivalent'].sum():,.0f} kg")
+    print(result['validation'].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+import logging
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Any
+from urllib.parse import urlparse
+
+from caching import TTLCache
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CacheError(Exception):
+    """A cache backend could not be reached or returned an error"""
+
+
+# Compact serialization: JSON without whitespace, zlib-compressed when large.
+# datetime/date/Decimal values are tagged so they round-trip with their types.
+_PLAIN = b'j'
+_COMPRESSED = b'z'
+COMPRESS_THRESHOLD = 1024
+
+
+def _encode_default(value):
+    if isinstance(value, datetime):
+        return {'__dt__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__d__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__dec__': str(value)}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode_hook(obj: Dict):
+    if len(obj) == 1:
+        if '__dt__' in obj:
+            return datetime.fromisoformat(obj['__dt__'])
+        if '__d__' in obj:
+            return date.fromisoformat(obj['__d__'])
+        if '__dec__' in obj:
+            return Decimal(obj['__dec__'])
+    return obj
+
+
+def serialize(value: Any) -> bytes:
+    payload = json.dumps(value, separators=(',', ':'), default=_encode_default).encode('utf-8')
+    if len(payload) > COMPRESS_THRESHOLD:
+        return _COMPRESSED + zlib.compress(payload)
+    return _PLAIN + payload
+
+
+def deserialize(data: bytes) -> Any:
+    marker, payload = data[:1], data[1:]
+    if marker == _COMPRESSED:
+        payload = zlib.decompress(payload)
+    elif marker != _PLAIN:
+        raise ValueError("Unknown cache serialization marker")
+    return json.loads(payload.decode('utf-8'), object_hook=_decode_hook)
+
+
+class CacheBackend(ABC):
+    """Byte-level key/value store behind SharedCache.
+
+    ``shared`` is True when other processes see the same entries.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """Increment a counter that is never evicted or expired; returns its new value"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': type(self).__name__}
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU; entries are only visible to this process.
+
+    Counters (SharedCache versions) are kept outside the LRU: evicting one
+    would reset it and make entries stored under an old version current again.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self._cache = TTLCache(maxsize=maxsize, ttl=float('inf'))
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            counter = self._counters.get(key)
+        if counter is not None:
+            return str(counter).encode()
+        return self._cache.get(key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        with self._lock:
+            self._counters.pop(key, None)
+        self._cache.set(key, value, ttl or float('inf'))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._counters.pop(key, None)
+        self._cache.pop(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = len(self._counters)
+        return dict(self._cache.stats(), backend='memory', counters=counters)
+
+
+class SQLiteBackend(CacheBackend):
+    """On-disk cache shared by every process on the host"""
+
+    shared = True
+    _PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False,
+                                           isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+        )
+
+    def _execute(self, query: str, params: tuple = ()):
+        try:
+            return self._connection.execute(query, params)
+        except sqlite3.Error as e:
+            raise CacheError(f"SQLite cache error: {e}") from e
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._execute("INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                          (key, sqlite3.Binary(value), expires_at))
+            self._writes += 1
+            if self._writes % self._PURGE_EVERY == 0:
+                self._execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._execute("BEGIN IMMEDIATE")
+            try:
+                row = self._execute("SELECT value FROM cache_entries WHERE key = ?", (key,)).fetchone()
+                value = int(bytes(row[0])) + 1 if row else 1
+                self._execute("INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, NULL)",
+                              (key, sqlite3.Binary(str(value).encode())))
+                self._execute("COMMIT")
+            except Exception:
+                self._execute("ROLLBACK")
+                raise
+            return value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'entries': count}
+
+
+class RedisBackend(CacheBackend):
+    """Minimal Redis (RESP2) client: GET, MGET, SET PX, DEL and INCR.
+
+    One socket is shared under a lock and reopened after errors. A circuit
+    breaker stops every cache call from waiting on an unreachable server.
+    """
+
+    shared = True
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 0.5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(f"redis:{host}:{port}", failure_threshold=3, reset_timeout=10.0)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._reader = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> 'RedisBackend':
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, parsed.password, **kwargs)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command('GET', key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self._command('MGET', *keys) if keys else []
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if ttl:
+            self._command('SET', key, value, 'PX', int(ttl * 1000))
+        else:
+            self._command('SET', key, value)
+
+    def delete(self, key: str):
+        self._command('DEL', key)
+
+    def incr(self, key: str) -> int:
+        return self._command('INCR', key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': 'redis', 'host': self.host, 'port': self.port,
+                'circuit_state': self.breaker.state}
+
+    def _command(self, *args):
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise CacheError(str(e)) from e
+
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._open()
+                self._send(args)
+                reply = self._read_reply()
+            except (OSError, ValueError) as e:
+                self._close()
+                self.breaker.record_failure()
+                raise CacheError(f"Redis command {args[0]} failed: {e}") from e
+        self.breaker.record_success()
+        return reply
+
+    def _open(self):
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._socket.makefile('rb')
+        if self.password:
+            self._send(('AUTH', self.password))
+            self._read_reply()
+        if self.db:
+            self._send(('SELECT', self.db))
+            self._read_reply()
+
+    def _close(self):
+        for resource in (self._reader, self._socket):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._socket = None
+        self._reader = None
+
+    def _send(self, args: tuple):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        self._socket.sendall(b''.join(parts))
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ValueError("Connection closed by Redis server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode('utf-8')
+        if kind == b'-':
+            raise CacheError(body.decode('utf-8'))
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ValueError(f"Unexpected Redis reply: {line!r}")
+
+
+class SharedCache:
+    """Namespaced, versioned view of a cache backend.
+
+    Keys look like ``<prefix>:<namespace>:<scope>@<version>:<key>``. Every
+    namespace has a version counter and each scope (e.g. one company) has
+    its own; bumping either with ``invalidate`` orphans the old keys for
+    every process using the backend, which is how invalidations reach other
+    replicas. Backend errors are logged and treated as misses.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float = 300.0, prefix: str = 'ghg'):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self._base = f"{prefix}:{namespace}"
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> bool:
+        return self.backend.shared
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self._base}:version:{scope}" if scope else f"{self._base}:version"
+
+    def version(self, scope: str = '') -> str:
+        """Current version token for ``scope``; pass it back to get/set"""
+        keys = [self._version_key('')] + ([self._version_key(scope)] if scope else [])
+        try:
+            versions = self.backend.get_many(keys)
+        except CacheError as e:
+            self._record_error(e)
+            return ''
+        return '.'.join(str(int(version or 0)) for version in versions)
+
+    def _key(self, key: str, scope: str, version: str) -> str:
+        return f"{self._base}:{scope}@{version}:{key}"
+
+    def get(self, key: str, scope: str = '', version: Optional[str] = None) -> Any:
+        version = self.version(scope) if version is None else version
+        if not version:
+            return None
+        try:
+            data = self.backend.get(self._key(key, scope, version))
+            value = deserialize(data) if data is not None else None
+        except (CacheError, ValueError) as e:
+            self._record_error(e)
+            return None
+        with self._lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def set(self, key: str, value: Any, scope: str = '', version: Optional[str] = None,
+            ttl: Optional[float] = None):
+        version = self.version(scope) if version is None else version
+        if not version:
+            return
+        try:
+            self.backend.set(self._key(key, scope, version), serialize(value), ttl or self.ttl)
+        except (CacheError, TypeError) as e:
+            self._record_error(e)
+
+    def delete(self, key: str, scope: str = ''):
+        version = self.version(scope)
+        if not version:
+            return
+        try:
+            self.backend.delete(self._key(key, scope, version))
+        except CacheError as e:
+            self._record_error(e)
+
+    def invalidate(self, scope: str = ''):
+        """Orphan every entry in ``scope`` (or the whole namespace) for all processes"""
+        try:
+            self.backend.incr(self._version_key(scope))
+        except CacheError as e:
+            self._record_error(e)
+
+    def _record_error(self, error: Exception):
+        with self._lock:
+            self._errors += 1
+        logger.warning(f"Cache '{self.namespace}' unavailable: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'namespace': self.namespace,
+                'hits': self._hits,
+                'misses': self._misses,
+                'errors': self._errors,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'backend': self.backend.stats()
+            }
+
+
+def create_backend(backend: str = 'memory', redis_url: str = None, sqlite_path: str = None,
+                   maxsize: int = 4096, **kwargs) -> CacheBackend:
+    """Build the backend named by CACHE_BACKEND, falling back to memory"""
+    try:
+        if backend == 'redis':
+            return RedisBackend.from_url(redis_url or 'redis://localhost:6379/0')
+        if backend == 'sqlite':
+            return SQLiteBackend(sqlite_path or os.path.join(tempfile.gettempdir(), 'ghg_cache.sqlite3'))
+    except (sqlite3.Error, ValueError) as e:
+        logger.error(f"Cannot open {backend} cache backend, using memory: {e}")
+        return MemoryBackend(maxsize)
+    if backend != 'memory':
+        logger.warning(f"Unknown cache backend '{backend}', using memory")
+    return MemoryBackend(maxsize)
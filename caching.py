@@ -0,0 +1,250 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (expires_at, value)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._misses += 1
+                return default
+            if entry[0] <= self._clock():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like get, but without touching LRU order or hit counters"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= self._clock():
+                return default
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``"""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations
+            }
+
+
+class SummaryCache:
+    """Emissions summaries keyed by ``(company_id, reporting_period)``.
+
+    Either part of the key may be None for the unfiltered summaries. Writes
+    adjust every cached summary that covers the new rows instead of dropping
+    them. Readers take a ``generation()`` token before querying and only
+    store their result if no write happened in between, so a slow read never
+    overwrites a fresher adjusted entry.
+
+    With a ``shared`` cache (see cache_backends.SharedCache) summaries are
+    visible to every app instance. Writes then bump the company's version
+    instead of adjusting in place, and the token is that version.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic, shared=None):
+        self._cache = TTLCache(maxsize, ttl, clock)
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @staticmethod
+    def _key(company_id: Optional[int], reporting_period: Optional[str]) -> tuple:
+        return (company_id or None, reporting_period or None)
+
+    @staticmethod
+    def _covering_keys(company_id: int, reporting_period: str):
+        return {(company_id, reporting_period), (company_id, None),
+                (None, reporting_period), (None, None)}
+
+    @staticmethod
+    def _scope(company_id: Optional[int]) -> str:
+        return f"company:{company_id}" if company_id else 'all'
+
+    def generation(self, company_id: Optional[int] = None):
+        if self._shared is not None:
+            return self._shared.version(self._scope(company_id))
+        with self._lock:
+            return self._generation
+
+    def get(self, company_id: Optional[int], reporting_period: Optional[str]) -> Optional[Dict]:
+        key = self._key(company_id, reporting_period)
+        if self._shared is not None:
+            return self._shared.get(f"{key[0]}:{key[1]}", self._scope(key[0]))
+        summary = self._cache.get(key)
+        return copy.deepcopy(summary) if summary is not None else None
+
+    def put(self, company_id: Optional[int], reporting_period: Optional[str],
+            summary: Dict, generation):
+        key = self._key(company_id, reporting_period)
+        if self._shared is not None:
+            if generation:
+                self._shared.set(f"{key[0]}:{key[1]}", summary, self._scope(key[0]), generation)
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._cache.set(key, copy.deepcopy(summary))
+
+    def add(self, company_id: int, reporting_period: str, scope_number: int, scope_name: str,
+            emissions: float, entry_count: int = 1):
+        """Fold newly inserted rows into every cached summary that covers them"""
+        if self._shared is not None:
+            self.invalidate(company_id)
+            return
+        with self._lock:
+            self._generation += 1
+            for key in self._covering_keys(company_id, reporting_period):
+                summary = self._cache.peek(key)
+                if summary is None:
+                    continue
+                self._adjust(summary, scope_number, scope_name, emissions, entry_count)
+
+    def invalidate(self, company_id: int = None, reporting_period: str = None):
+        """Drop cached summaries that may include the given company and period"""
+        if self._shared is not None:
+            if company_id:
+                self._shared.invalidate(self._scope(company_id))
+                self._shared.invalidate(self._scope(None))
+            else:
+                self._shared.invalidate()
+            return
+        with self._lock:
+            self._generation += 1
+            self._cache.pop_where(
+                lambda key: (company_id is None or key[0] in (None, company_id)) and
+                            (reporting_period is None or key[1] in (None, reporting_period))
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        if self._shared is not None:
+            return self._shared.stats()
+        return self._cache.stats()
+
+    @staticmethod
+    def _adjust(summary: Dict, scope_number: int, scope_name: str, emissions: float, entry_count: int):
+        # Details mirror the GROUP BY scope_number, scope_name rows of the query
+        for detail in summary['details']:
+            if detail['scope_number'] == scope_number and detail['scope_name'] == scope_name:
+                detail['emissions'] += emissions
+                detail['entry_count'] += entry_count
+                break
+        else:
+            summary['details'].append({
+                'scope_number': scope_number,
+                'scope_name': scope_name,
+                'emissions': emissions,
+                'entry_count': entry_count
+            })
+            summary['details'].sort(key=lambda detail: detail['scope_number'])
+
+        # Re-derive the scope totals the same way get_emissions_summary does
+        summary['total'] = 0
+        for detail in summary['details']:
+            scope_key = f"scope_{detail['scope_number']}"
+            if scope_key in summary['entry_counts']:
+                summary[scope_key] = detail['emissions']
+                summary['entry_counts'][scope_key] = detail['entry_count']
+            summary['total'] += detail['emissions']
+
+
+class FigureCache:
+    """Chart figures keyed by a hash of everything that shapes them.
+
+    The key covers the chart kind, its data and its options, so sessions
+    viewing the same company and period share one entry, and changed data
+    simply misses instead of needing invalidation. Entries are the built
+    figure objects themselves: rebuilding one from JSON re-validates every
+    property (several milliseconds per chart), which is most of what a hit
+    would save. Hits hand out the shared object, so callers must not mutate it.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self._cache = TTLCache(maxsize, ttl, clock)
+
+    @staticmethod
+    def key(chart: str, inputs: Sequence[Any]) -> str:
+        payload = json.dumps([chart, inputs], sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_or_build(self, chart: str, inputs: Sequence[Any], build: Callable[[], Any]) -> Any:
+        """Return the cached figure, building it on a miss"""
+        key = self.key(chart, inputs)
+        figure = self._cache.get(key)
+        if figure is None:
+            figure = build()
+            self._cache.set(key, figure)
+        return figure
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
@@ -0,0 +1,162 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = 'ghg_categories'
+
+CATALOG_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS catalog_version (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+CATALOG_VERSION_QUERY = "SELECT version FROM catalog_version WHERE name = %s"
+
+BUMP_CATALOG_VERSION = """
+INSERT INTO catalog_version (name, version) VALUES (%s, 1)
+ON DUPLICATE KEY UPDATE version = version + 1
+"""
+
+
+def bump_catalog_version(cursor, name: str = CATALOG_NAME):
+    """Mark the catalogue as changed; run it in the same transaction as the edit"""
+    cursor.execute(BUMP_CATALOG_VERSION, (name,))
+
+
+class CategoryIndex:
+    """Read-only lookups over one catalogue snapshot.
+
+    Categories are indexed by id, scope, category code and subcategory code.
+    ``ids`` is sorted with ``factors``, ``scope_numbers`` and ``units``
+    aligned to it, so whole arrays of category ids resolve with one
+    ``searchsorted``.
+    """
+
+    def __init__(self, categories: Iterable[Dict[str, Any]]):
+        self.categories = list(categories)
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_scope: Dict[int, List[Dict[str, Any]]] = {}
+        self._by_category_code: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_subcategory_code: Dict[str, Dict[str, Any]] = {}
+
+        for cat in self.categories:
+            self._by_id[cat['id']] = cat
+            self._by_scope.setdefault(cat['scope_number'], []).append(cat)
+            self._by_category_code.setdefault(cat['category_code'], []).append(cat)
+            self._by_subcategory_code.setdefault(cat['subcategory_code'], cat)
+
+        ids = np.array([cat['id'] for cat in self.categories], dtype=np.int64)
+        factors = np.array([cat['emission_factor'] for cat in self.categories], dtype=np.float64)
+        scope_numbers = np.array([cat['scope_number'] for cat in self.categories], dtype=np.int64)
+        units = np.array([cat['unit'] or '' for cat in self.categories], dtype=object)
+        order = np.argsort(ids, kind='stable')
+        self.ids = ids[order]
+        self.factors = factors[order]
+        self.scope_numbers = scope_numbers[order]
+        self.units = units[order]
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def get(self, category_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(category_id)
+
+    def by_scope(self, scope: int) -> List[Dict[str, Any]]:
+        return list(self._by_scope.get(scope, []))
+
+    def by_category_code(self, category_code: str) -> List[Dict[str, Any]]:
+        return list(self._by_category_code.get(category_code, []))
+
+    def by_subcategory_code(self, subcategory_code: str) -> Optional[Dict[str, Any]]:
+        return self._by_subcategory_code.get(subcategory_code)
+
+    def scopes(self) -> List[int]:
+        return sorted(self._by_scope)
+
+    def factor(self, category_id: int) -> Optional[float]:
+        cat = self._by_id.get(category_id)
+        return cat['emission_factor'] if cat else None
+
+    def factors_for(self, category_ids) -> np.ndarray:
+        """Default factors for an array of category ids (NaN where unknown)"""
+        return self.lookup(category_ids)[0]
+
+    def units_for(self, category_ids) -> np.ndarray:
+        """Category unit strings for an array of category ids ('' where unknown)"""
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(category_ids.shape, '', dtype=object)
+        positions = np.minimum(np.searchsorted(self.ids, category_ids), len(self.ids) - 1)
+        return np.where(self.ids[positions] == category_ids, self.units[positions], '')
+
+    def lookup(self, category_ids) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Factors, scope numbers and a found mask for an array of category ids.
+
+        Unknown ids get a NaN factor and scope number 0.
+        """
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        if not len(self.ids):
+            return (np.full(category_ids.shape, np.nan), np.zeros(category_ids.shape, dtype=np.int64),
+                    np.zeros(category_ids.shape, dtype=bool))
+        positions = np.searchsorted(self.ids, category_ids)
+        positions = np.minimum(positions, len(self.ids) - 1)
+        found = self.ids[positions] == category_ids
+        return (np.where(found, self.factors[positions], np.nan),
+                np.where(found, self.scope_numbers[positions], 0),
+                found)
+
+
+class CategoryCatalog:
+    """Process-wide index of the active GHG categories, stamped with a version.
+
+    The index is trusted only while ``catalog_version`` still holds the
+    version it was built under, so readers run one version probe and reuse
+    it instead of re-querying ``ghg_categories``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = CategoryIndex([])
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, version: int) -> Optional[CategoryIndex]:
+        """Cached index if it was built under ``version``"""
+        with self._lock:
+            if self._version is not None and self._version == version:
+                self._hits += 1
+                return self._index
+            self._misses += 1
+            return None
+
+    def store(self, version: int, index: CategoryIndex):
+        with self._lock:
+            self._version = version
+            self._index = index
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._index = CategoryIndex([])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'version': self._version,
+                'categories': len(self._index),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Shared by every DatabaseManager in the process
+category_catalog = CategoryCatalog()
@@ -0,0 +1,93 @@
+import threading
+import time
+import logging
+from typing import Dict, Any, Callable
+
+from mysql.connector import Error
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Error):
+    """Raised immediately while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Fast-fail guard around database connection attempts.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every call fails immediately with ``CircuitOpenError``. Once
+    ``reset_timeout`` seconds have passed one probe call is let through
+    (half-open); its success closes the circuit, its failure re-opens it.
+    A probe that never reports back is replaced after another timeout.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._rejected = 0
+        self._opened_count = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            now = self._clock()
+            if now - self._opened_at >= self.reset_timeout:
+                # Let one probe through and restart the window for the others
+                self._state = HALF_OPEN
+                self._opened_at = now
+                logger.info(f"Circuit '{self.name}' half-open, probing database")
+                return
+            self._rejected += 1
+            retry_in = self.reset_timeout - (now - self._opened_at)
+        raise CircuitOpenError(f"Circuit '{self.name}' is open; retrying in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._opened_count += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = 0.0
+            if self._state != CLOSED:
+                retry_in = max(self.reset_timeout - (self._clock() - self._opened_at), 0.0)
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout,
+                'retry_in_seconds': round(retry_in, 1),
+                'times_opened': self._opened_count,
+                'rejected_calls': self._rejected
+            }
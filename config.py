@@ -1,5 +1,6 @@
 import os
-from typing import Dict, Any
+import tempfile
+from typing import Dict, Any, List
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -46,11 +47,8 @@ class Config:
                     'autocommit': True,
                     'charset': 'utf8mb4',
                     'use_unicode': True,
-                'connect_timeout': 60,
-                'pool_name': 'ghg_pool',
-                'pool_size': 10,
-                'pool_reset_session': True
-            }
+                    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '60'))
+                }
         else:
             # Development database configuration
             return {
@@ -63,6 +61,109 @@ class Config:
                 'charset': 'utf8mb4'
             }
     
+    @property
+    def read_replica_configs(self) -> List[Dict[str, Any]]:
+        """Get connection settings for read replicas listed in DB_READ_HOST"""
+        replicas = []
+        for entry in os.getenv('DB_READ_HOST', '').split(','):
+            entry = entry.strip()
+            if not entry:
+                continue
+            host, _, port = entry.partition(':')
+            replica_config = self.database_config.copy()
+            replica_config['host'] = host
+            replica_config['port'] = int(port) if port else int(os.getenv('DB_READ_PORT', replica_config['port']))
+            replicas.append(replica_config)
+        return replicas
+    
+    @property
+    def read_your_writes_window(self) -> float:
+        """Seconds a session keeps reading from the primary after it writes"""
+        return float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+    
+    @property
+    def query_workers(self) -> int:
+        """Threads available for running independent queries concurrently"""
+        return int(os.getenv('DB_QUERY_WORKERS', '8'))
+    
+    @property
+    def pool_config(self) -> Dict[str, Any]:
+        """Get process-wide connection pool configuration"""
+        return {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),  # seconds to wait when exhausted
+            'recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),  # max connection age in seconds
+            'validate_after': float(os.getenv('DB_POOL_VALIDATE_AFTER', '0')),  # skip ping if used this recently
+            'reset_session': os.getenv('DB_POOL_RESET_SESSION', 'True').lower() == 'true',  # reset state on return
+            'failure_threshold': int(os.getenv('DB_BREAKER_FAILURES', '5')),  # consecutive failures to open circuit
+            'reset_timeout': float(os.getenv('DB_BREAKER_RESET_SECONDS', '30'))  # open time before a probe
+        }
+    
+    @property
+    def audit_config(self) -> Dict[str, Any]:
+        """Get background audit writer configuration"""
+        return {
+            'queue_size': int(os.getenv('AUDIT_QUEUE_SIZE', '10000')),
+            'batch_size': int(os.getenv('AUDIT_BATCH_SIZE', '200')),
+            'flush_interval': float(os.getenv('AUDIT_FLUSH_INTERVAL', '1.0')),  # seconds
+            'enqueue_timeout': float(os.getenv('AUDIT_ENQUEUE_TIMEOUT', '0.5')),  # backpressure wait
+            'spool_path': os.getenv('AUDIT_SPOOL_PATH',
+                                    os.path.join(tempfile.gettempdir(), 'ghg_audit_spool.jsonl'))
+        }
+    
+    @property
+    def summary_cache_config(self) -> Dict[str, Any]:
+        """Get emissions summary cache configuration"""
+        return {
+            'maxsize': int(os.getenv('SUMMARY_CACHE_SIZE', '1024')),  # (company, period) entries
+            'ttl': float(os.getenv('SUMMARY_CACHE_TTL', '300'))  # seconds
+        }
+    
+    @property
+    def figure_cache_config(self) -> Dict[str, Any]:
+        """Get dashboard chart cache configuration"""
+        return {
+            'maxsize': int(os.getenv('FIGURE_CACHE_SIZE', '256')),  # figures
+            'ttl': float(os.getenv('FIGURE_CACHE_TTL', '3600'))  # seconds
+        }
+    
+    @property
+    def export_config(self) -> Dict[str, Any]:
+        """Get CSV export configuration"""
+        return {
+            'max_rows': int(os.getenv('EXPORT_MAX_ROWS', '100000')),  # rows per download
+            'chunk_size': int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))  # rows fetched per batch
+        }
+    
+    @property
+    def directory_cache_config(self) -> Dict[str, Any]:
+        """Get company/user directory cache configuration"""
+        return {
+            'ttl': float(os.getenv('DIRECTORY_CACHE_TTL', '300'))  # seconds
+        }
+    
+    @property
+    def uncertainty_config(self) -> Dict[str, Any]:
+        """Get Monte Carlo uncertainty simulation configuration"""
+        return {
+            'samples': int(os.getenv('UNCERTAINTY_SAMPLES', '10000')),  # draws per line
+            'chunk_lines': int(os.getenv('UNCERTAINTY_CHUNK_LINES', '2000')),  # lines drawn at a time
+            'workers': int(os.getenv('UNCERTAINTY_WORKERS', str(os.cpu_count() or 1)))  # processes
+        }
+    
+    @property
+    def cache_config(self) -> Dict[str, Any]:
+        """Get the cache backend shared by app instances"""
+        return {
+            'backend': os.getenv('CACHE_BACKEND', 'memory'),  # memory, sqlite or redis
+            'redis_url': os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0'),
+            'sqlite_path': os.getenv('CACHE_SQLITE_PATH',
+                                     os.path.join(tempfile.gettempdir(), 'ghg_cache.sqlite3')),
+            'maxsize': int(os.getenv('CACHE_MEMORY_SIZE', '4096')),
+            'prefix': os.getenv('CACHE_KEY_PREFIX', 'ghg')
+        }
+    
     @property
     def app_config(self) -> Dict[str, Any]:
         """Get application configuration"""
@@ -0,0 +1,261 @@
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+
+from circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection becomes available within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe MySQL connection pool shared by every session in the process.
+
+    Holds up to ``pool_size`` idle connections and allows ``max_overflow``
+    extra connections under load. Borrowers wait up to ``timeout`` seconds
+    for a free slot before ``PoolTimeout`` is raised. Connection attempts
+    go through a circuit breaker, so a down database fails borrowers
+    immediately instead of making each wait for the connect timeout. With
+    ``reset_session`` returned connections are reset (user variables,
+    temporary tables, session settings) so no state leaks to the next borrower.
+    A reset also frees server-side prepared statements, so ``on_reset`` is
+    called with every connection that is reset or closed, e.g. to drop a
+    prepared statement registry.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], pool_size: int = 10, max_overflow: int = 10,
+                 timeout: float = 10.0, recycle: int = 3600, validate_after: float = 0.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, reset_session: bool = True,
+                 name: str = 'primary', connection_factory: Callable = None,
+                 on_reset: Callable = None):
+        self.name = name
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.validate_after = validate_after
+        self.reset_session = reset_session
+        self.on_reset = on_reset
+        self._connection_factory = connection_factory or mysql.connector.connect
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (connection, created_at, last_used)
+        self._created_at = {}  # guarded by _cond, like the counters
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        self._borrows = 0
+        self._timeouts = 0
+        self._created = 0
+        self._validation_failures = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._borrow_total = 0.0
+        self._borrow_max = 0.0
+
+    def get_connection(self):
+        """Borrow a validated connection, waiting up to the pool timeout"""
+        self.breaker.before_call()
+        start = time.monotonic()
+        deadline = start + self.timeout
+        entry = None
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._total < self.pool_size + self.max_overflow:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"Connection pool '{self.name}' exhausted "
+                        f"({self._in_use} in use, waited {self.timeout:.1f}s)"
+                    )
+                self._waiting += 1
+                self._cond.wait(remaining)
+                self._waiting -= 1
+            self._in_use += 1
+        waited = time.monotonic() - start
+
+        try:
+            connection = self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        elapsed = time.monotonic() - start
+        with self._cond:
+            self._borrows += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._borrow_total += elapsed
+            self._borrow_max = max(self._borrow_max, elapsed)
+        return connection
+
+    def release(self, connection, discard: bool = False):
+        """Return a borrowed connection to the pool"""
+        if connection is None:
+            return
+
+        if not discard:
+            try:
+                if connection.in_transaction:
+                    connection.rollback()
+                if self.reset_session:
+                    self._notify_reset(connection)
+                    connection.reset_session()
+            except Error as e:
+                logger.warning(f"Discarding connection from pool '{self.name}': {e}")
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            keep = not discard and len(self._idle) < self.pool_size
+            if keep:
+                created_at = self._created_at.get(id(connection), 0)
+                self._idle.append((connection, created_at, time.monotonic()))
+            else:
+                self._total -= 1
+                self._created_at.pop(id(connection), None)
+            self._cond.notify()
+
+        if not keep:
+            self._close_quietly(connection)
+
+    @property
+    def available(self) -> int:
+        """Connections that can be borrowed right now without waiting"""
+        with self._cond:
+            free = len(self._idle) + self.pool_size + self.max_overflow - self._total
+            return max(free - self._waiting, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Live pool saturation and latency statistics"""
+        with self._cond:
+            borrows = self._borrows or 1
+            return {
+                'name': self.name,
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'total': self._total,
+                'waiting': self._waiting,
+                'borrows': self._borrows,
+                'timeouts': self._timeouts,
+                'connections_created': self._created,
+                'validation_failures': self._validation_failures,
+                'avg_wait_ms': round(self._wait_total / borrows * 1000, 3),
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+                'avg_borrow_ms': round(self._borrow_total / borrows * 1000, 3),
+                'max_borrow_ms': round(self._borrow_max * 1000, 3),
+                'circuit_state': self.breaker.state
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+            for connection, _, _ in idle:
+                self._created_at.pop(id(connection), None)
+        for connection, _, _ in idle:
+            self._close_quietly(connection)
+
+    def _checkout(self, entry: Optional[tuple]):
+        """Validate an idle connection or open a new one"""
+        if entry is not None:
+            connection, created_at, last_used = entry
+            now = time.monotonic()
+            if self.recycle and now - created_at > self.recycle:
+                with self._cond:
+                    self._created_at.pop(id(connection), None)
+                self._close_quietly(connection)
+            elif now - last_used < self.validate_after:
+                return connection
+            elif self._ping(connection):
+                self.breaker.record_success()
+                return connection
+            else:
+                with self._cond:
+                    self._validation_failures += 1
+                    self._created_at.pop(id(connection), None)
+                self._close_quietly(connection)
+
+        try:
+            connection = self._connection_factory(**self.db_config)
+        except Error:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        with self._cond:
+            self._created_at[id(connection)] = time.monotonic()
+            self._created += 1
+        return connection
+
+    @staticmethod
+    def _ping(connection) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _notify_reset(self, connection):
+        if self.on_reset is None:
+            return
+        try:
+            self.on_reset(connection)
+        except Exception as e:
+            logger.warning(f"Reset hook of pool '{self.name}' failed: {e}")
+
+    def _close_quietly(self, connection):
+        self._notify_reset(connection)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+
+# One pool per process per logical name, shared across Streamlit sessions
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, db_config: Dict[str, Any], **pool_config) -> ConnectionPool:
+    """Get the process-wide pool registered under ``name``, creating it once"""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ConnectionPool(db_config, name=name, **pool_config)
+            _pools[name] = pool
+            logger.info(f"Connection pool '{name}' created (size={pool.pool_size}, "
+                        f"overflow={pool.max_overflow})")
+        return pool
+
+
+def all_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistics for every pool in the process"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
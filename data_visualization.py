@@ -1,10 +1,26 @@
+import csv
+import io
+import logging
+import tempfile
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from typing import Dict, List
+from caching import FigureCache
+from config import Config
 from database_operations import DatabaseManager
 from ghg_calculator import GHGCalculator
+from scenarios import Lever, ScenarioModel
+
+logger = logging.getLogger(__name__)
+
+# Chart figures shared by every session viewing the same data
+figure_cache = FigureCache(**Config().figure_cache_config)
+
+def cached_figure(chart: str, inputs: List, build) -> go.Figure:
+    """Shared figure for ``inputs``, built on a miss; render it, don't modify it"""
+    return figure_cache.get_or_build(chart, inputs, build)
 
 class DataVisualization:
     def __init__(self, db_manager: DatabaseManager):
@@ -19,12 +35,30 @@ class DataVisualization:
         # Prepare data for pie chart
         scopes = []
         values = []
-        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']  # Red, Teal, Blue
         
         for detail in emissions_summary['details']:
             scopes.append(f"Scope {detail['scope_number']}")
             values.append(detail['emissions'])
         
+        fig = cached_figure('scope_pie', [scopes, values, title],
+                            lambda: self._build_scope_pie_figure(scopes, values, title))
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Display summary statistics
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Scope 1", f"{emissions_summary['scope_1']:.2f} kg CO2e")
+        with col2:
+            st.metric("Scope 2", f"{emissions_summary['scope_2']:.2f} kg CO2e")
+        with col3:
+            st.metric("Scope 3", f"{emissions_summary['scope_3']:.2f} kg CO2e")
+        with col4:
+            st.metric("Total", f"{emissions_summary['total']:.2f} kg CO2e")
+    
+    @staticmethod
+    def _build_scope_pie_figure(scopes: List[str], values: List[float], title: str) -> go.Figure:
+        colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']  # Red, Teal, Blue
+        
         # Create pie chart
         fig = px.pie(
             values=values,
@@ -44,19 +78,7 @@ class DataVisualization:
             height=500,
             font=dict(size=12)
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Display summary statistics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Scope 1", f"{emissions_summary['scope_1']:.2f} kg CO2e")
-        with col2:
-            st.metric("Scope 2", f"{emissions_summary['scope_2']:.2f} kg CO2e")
-        with col3:
-            st.metric("Scope 3", f"{emissions_summary['scope_3']:.2f} kg CO2e")
-        with col4:
-            st.metric("Total", f"{emissions_summary['total']:.2f} kg CO2e")
+        return fig
     
     def create_category_bar_chart(self, category_breakdown: List[Dict], title: str = "Emissions by Category"):
         """Create bar chart showing emissions by category"""
@@ -64,6 +86,17 @@ class DataVisualization:
             st.warning("No category data available for visualization")
             return
         
+        # Only the plotted fields go into the cache key
+        rows = [
+            [item['category_name'], item['subcategory_name'], item['scope_number'], item['total_emissions']]
+            for item in category_breakdown
+        ]
+        fig = cached_figure('category_bar', [rows, title],
+                            lambda: self._build_category_bar_figure(category_breakdown, title))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    @staticmethod
+    def _build_category_bar_figure(category_breakdown: List[Dict], title: str) -> go.Figure:
         # Prepare data
         df = pd.DataFrame(category_breakdown)
         
@@ -101,18 +134,29 @@ class DataVisualization:
         fig.update_traces(
             hovertemplate='<b>%{x}</b><br>Emissions: %{y:.2f} kg CO2e<extra></extra>'
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
-    def create_time_series_chart(self, company_id: int, periods: List[str]):
-        """Create time series chart showing emissions over time"""
-        if not self.db.connect():
-            st.error("Database connection failed")
-            return
+    def create_time_series_chart(self, company_id: int, periods: List[str],
+                                 summaries: Dict[str, Dict] = None):
+        """Create time series chart showing emissions over time.
+        
+        ``summaries`` maps each period to an already fetched emissions
+        summary; without it the summaries are queried here.
+        """
+        if summaries is None:
+            with self.db.session() as connected:
+                if not connected:
+                    st.error("Database connection failed")
+                    return
+                
+                summaries = {
+                    period: self.db.get_emissions_summary(company_id, period)
+                    for period in periods
+                }
         
         time_data = []
         for period in periods:
-            summary = self.db.get_emissions_summary(company_id, period)
+            summary = summaries[period]
             if summary['total'] > 0:
                 time_data.append({
                     'period': period,
@@ -122,12 +166,16 @@ class DataVisualization:
                     'total': summary['total']
                 })
         
-        self.db.disconnect()
-        
         if not time_data:
             st.warning("No time series data available")
             return
         
+        fig = cached_figure('time_series', [time_data],
+                            lambda: self._build_time_series_figure(time_data))
+        st.plotly_chart(fig, use_container_width=True)
+    
+    @staticmethod
+    def _build_time_series_figure(time_data: List[Dict]) -> go.Figure:
         df = pd.DataFrame(time_data)
         
         # Create line chart
@@ -176,8 +224,7 @@ class DataVisualization:
             height=500,
             hovermode='x unified'
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        return fig
     
     def create_comparison_chart(self, companies_data: List[Dict]):
         """Create comparison chart between companies"""
@@ -208,41 +255,167 @@ class DataVisualization:
         
         st.plotly_chart(fig, use_container_width=True)
     
-    def display_data_table(self, emissions_data: List[Dict], title: str = "Emissions Data"):
-        """Display emissions data in a formatted table"""
+    def display_data_table(self, emissions_data: List[Dict], title: str = "Emissions Data",
+                           export_filters: Dict = None):
+        """Display emissions data in a formatted table.
+        
+        With ``export_filters`` (keyword arguments for ``iter_emissions_data``)
+        the download exports every matching row by streaming it from the
+        database instead of only the rows shown.
+        """
         if not emissions_data:
             st.warning("No data available")
             return
         
         # Prepare data for display
-        display_data = []
-        for item in emissions_data:
-            display_data.append({
-                'Date': item['created_at'].strftime('%Y-%m-%d') if item['created_at'] else 'N/A',
-                'Period': item['reporting_period'],
-                'Scope': f"Scope {item['scope_number']}",
-                'Category': item['subcategory_name'],
-                'Activity Data': f"{item['activity_data']:.4f}",
-                'Unit': item['unit'],
-                'Emission Factor': f"{item['emission_factor']:.6f}",
-                'CO2 Equivalent': f"{item['co2_equivalent']:.4f} kg",
-                'Status': item['verification_status'].title(),
-                'Company': item['company_name']
-            })
-        
-        df = pd.DataFrame(display_data)
+        df = pd.DataFrame([format_emission_row(item) for item in emissions_data])
         
         st.subheader(title)
         st.dataframe(df, use_container_width=True)
         
-        # Add download button
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="Download as CSV",
-            data=csv,
-            file_name=f"emissions_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        file_name = f"emissions_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        if export_filters is None:
+            # Add download button
+            csv_data = df.to_csv(index=False)
+            st.download_button(
+                label="Download as CSV",
+                data=csv_data,
+                file_name=file_name,
+                mime="text/csv"
+            )
+        elif st.button("Prepare CSV export", help="Export every matching row, not just this page"):
+            # Rows are streamed from the database batch by batch into a file on
+            # disk. Streamlit keeps each download in memory, so exports are capped.
+            export_config = Config().export_config
+            with tempfile.TemporaryFile(mode='w+b') as buffer:
+                text_buffer = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+                row_count = write_emissions_csv(self.db, text_buffer, max_rows=export_config['max_rows'],
+                                                chunk_size=export_config['chunk_size'], **export_filters)
+                text_buffer.detach()
+                buffer.flush()
+                if row_count >= export_config['max_rows']:
+                    st.warning(f"The export is limited to the first {export_config['max_rows']:,} rows. "
+                               "Narrow the filters to export the rest.")
+                st.download_button(
+                    label=f"Download {row_count} rows as CSV",
+                    data=buffer.raw,  # the unbuffered file; Streamlit reads it from the start
+                    file_name=file_name,
+                    mime="text/csv"
+                )
+
+def format_emission_row(item: Dict) -> Dict:
+    """Format an emissions data row for display and export"""
+    return {
+        'Date': item['created_at'].strftime('%Y-%m-%d') if item['created_at'] else 'N/A',
+        'Period': item['reporting_period'],
+        'Scope': f"Scope {item['scope_number']}",
+        'Category': item['subcategory_name'],
+        'Activity Data': f"{item['activity_data']:.4f}",
+        'Unit': item['unit'],
+        'Emission Factor': f"{item['emission_factor']:.6f}",
+        'CO2 Equivalent': f"{item['co2_equivalent']:.4f} kg",
+        'Status': item['verification_status'].title(),
+        'Company': item['company_name']
+    }
+
+def write_emissions_csv(db_manager: DatabaseManager, output, chunk_size: int = 1000,
+                        max_rows: int = None, **filters) -> int:
+    """Stream matching emissions data as CSV into a text file object.
+    
+    Rows are consumed batch by batch from ``iter_emissions_data`` and each
+    batch is written before the next is fetched; nothing is collected into a
+    list or DataFrame. At most ``max_rows`` rows are written. Returns the
+    number of rows written.
+    """
+    writer = None
+    row_count = 0
+    batches = db_manager.iter_emissions_data(chunk_size=chunk_size, **filters)
+    try:
+        for batch in batches:
+            if max_rows is not None:
+                batch = batch[:max_rows - row_count]
+            formatted = [format_emission_row(item) for item in batch]
+            if not formatted:
+                break
+            if writer is None:
+                writer = csv.DictWriter(output, fieldnames=list(formatted[0].keys()))
+                writer.writeheader()
+            writer.writerows(formatted)
+            row_count += len(formatted)
+            if max_rows is not None and row_count >= max_rows:
+                break
+    finally:
+        batches.close()  # releases the streaming connection when stopped early
+    return row_count
+
+def create_scenario_panel(category_breakdown: List[Dict], company_id: int, reporting_period: str):
+    """What-if scenarios over the dashboard's category breakdown, kept per session"""
+    models = st.session_state.setdefault('scenario_models', {})
+    model = models.get((company_id, reporting_period))
+    if model is None:
+        model = models[(company_id, reporting_period)] = ScenarioModel(category_breakdown)
+    elif model.breakdown != category_breakdown:
+        model.rebase(category_breakdown)
+    
+    categories = {
+        f"Scope {row['scope_number']} - {row['category_name']} - {row['subcategory_name']}": row['category_id']
+        for row in category_breakdown
+    }
+    with st.form("scenario_lever_form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            scenario_name = st.text_input("Scenario", value="Scenario 1")
+            lever_name = st.text_input("Lever", placeholder="e.g. Cut air travel 30%")
+            selected = st.multiselect("Categories", list(categories))
+        with col2:
+            change_pct = st.slider("Activity Change (%)", -100, 100, 0)
+            substitute = st.checkbox("Substitute Emission Factor")
+            factor = st.number_input("New Emission Factor (kg CO2e per category unit)",
+                                     min_value=0.0, step=0.000001, format="%.6f")
+            share_pct = st.slider("Share of Activity Substituted (%)", 0, 100, 100)
+        
+        if st.form_submit_button("Add Lever"):
+            if not scenario_name or not lever_name or not selected:
+                st.error("Please name the scenario and lever and select at least one category")
+            else:
+                if scenario_name not in model.scenarios():
+                    model.add_scenario(scenario_name)
+                model.add_lever(scenario_name, Lever(
+                    lever_name, [categories[label] for label in selected], 1 + change_pct / 100,
+                    factor if substitute else None, share_pct / 100
+                ))
+    
+    if not model.scenarios():
+        st.info("Add a lever to start a scenario.")
+        return
+    
+    comparison = model.compare()
+    comparison['levers'] = comparison['levers'].apply(', '.join)
+    st.dataframe(comparison.round(2), use_container_width=True)
+    fig = px.bar(
+        comparison,
+        x='scenario',
+        y=['scope_1', 'scope_2', 'scope_3'],
+        title="Scenario Comparison",
+        labels={'value': 'CO2 Equivalent (kg)', 'scenario': 'Scenario'},
+        color_discrete_map={'scope_1': '#FF6B6B', 'scope_2': '#4ECDC4', 'scope_3': '#45B7D1'}
+    )
+    fig.update_layout(barmode='stack', height=400)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        scenario_name = st.selectbox("Scenario Details", model.scenarios())
+        st.dataframe(model.category_changes(scenario_name).round(2), use_container_width=True)
+    with col2:
+        lever_names = [lever.name for lever in model.levers(scenario_name)]
+        lever_name = st.selectbox("Lever", lever_names)
+        if st.button("Remove Lever") and lever_name:
+            model.remove_lever(scenario_name, lever_name)
+            st.rerun()
+        if st.button("Remove Scenario"):
+            model.remove_scenario(scenario_name)
+            st.rerun()
 
 def create_dashboard(db_manager: DatabaseManager, user_data: Dict):
     """Create main dashboard with visualizations"""
@@ -257,10 +430,10 @@ def create_dashboard(db_manager: DatabaseManager, user_data: Dict):
     with col2:
         if user_data['role'] == 'admin':
             # Admin can see all companies
-            if db_manager.connect():
-                companies = db_manager.get_companies(verification_status='verified')
-                db_manager.disconnect()
-                
+            with db_manager.session() as connected:
+                companies = db_manager.get_companies(verification_status='verified') if connected else None
+            
+            if companies is not None:
                 company_options = {comp['company_name']: comp['id'] for comp in companies}
                 company_options['All Companies'] = None
                 
@@ -273,38 +446,47 @@ def create_dashboard(db_manager: DatabaseManager, user_data: Dict):
             selected_company_id = user_data['company_id']
             st.info(f"Viewing data for: {user_data['company_name']}")
     
-    # Get data and create visualizations
-    if db_manager.connect():
-        # Get emissions summary
-        emissions_summary = db_manager.get_emissions_summary(selected_company_id, selected_period)
-        
-        # Get category breakdown
-        if selected_company_id:
-            calculator = GHGCalculator(db_manager)
-            category_breakdown = calculator.get_category_breakdown(selected_company_id, selected_period)
-        else:
-            category_breakdown = []
+    # Run the independent dashboard queries, concurrently where the pool allows
+    trend_periods = reporting_periods[:4]
+    calls = {selected_period: lambda db: db.get_emissions_summary(selected_company_id, selected_period)}
+    if selected_company_id:
+        calls['breakdown'] = lambda db: GHGCalculator(db).get_category_breakdown(selected_company_id,
+                                                                                 selected_period)
+        calls.update({
+            period: lambda db, period=period: db.get_emissions_summary(selected_company_id, period)
+            for period in trend_periods if period != selected_period
+        })
+    
+    try:
+        results = db_manager.gather(calls)
+    except Exception:
+        logger.exception("Error loading dashboard data")
+        st.error("Could not load the dashboard data. Please try again.")
+        return
+    emissions_summary = results[selected_period]
+    category_breakdown = results.get('breakdown', [])
+    trend_summaries = {period: results[period] for period in trend_periods if period in results}
+    
+    # Create visualizations
+    viz = DataVisualization(db_manager)
+    
+    if emissions_summary['total'] > 0:
+        # Pie chart
+        st.subheader("Emissions by Scope")
+        viz.create_scope_pie_chart(emissions_summary)
         
-        db_manager.disconnect()
+        # Bar chart
+        if category_breakdown:
+            st.subheader("Emissions by Category")
+            viz.create_category_bar_chart(category_breakdown)
         
-        # Create visualizations
-        viz = DataVisualization(db_manager)
+        if selected_company_id and category_breakdown:
+            with st.expander("What-if Scenarios"):
+                create_scenario_panel(category_breakdown, selected_company_id, selected_period)
         
-        if emissions_summary['total'] > 0:
-            # Pie chart
-            st.subheader("Emissions by Scope")
-            viz.create_scope_pie_chart(emissions_summary)
-            
-            # Bar chart
-            if category_breakdown:
-                st.subheader("Emissions by Category")
-                viz.create_category_bar_chart(category_breakdown)
-            
-            # Time series (if single company selected)
-            if selected_company_id:
-                st.subheader("Emissions Trend")
-                viz.create_time_series_chart(selected_company_id, reporting_periods[:4])
-        else:
-            st.info("No emission data found for the selected filters.")
+        # Time series (if single company selected)
+        if selected_company_id:
+            st.subheader("Emissions Trend")
+            viz.create_time_series_chart(selected_company_id, trend_periods, trend_summaries)
     else:
-        st.error("Database connection failed")
+        st.info("No emission data found for the selected filters.")
@@ -1,12 +1,35 @@
 import mysql.connector
-from mysql.connector import Error, pooling
+from mysql.connector import Error, errorcode
 import hashlib
 import json
+import base64
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Tuple, Any, Union, Iterator, Callable
 import os
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from config import Config
+from connection_pool import get_pool
+from circuit_breaker import CircuitOpenError, OPEN
+from category_catalog import (CategoryIndex, category_catalog, CATALOG_NAME, CATALOG_VERSION_QUERY,
+                              BUMP_CATALOG_VERSION)
+from audit_writer import get_audit_writer
+from statement_cache import statement_cache
+from caching import SummaryCache, TTLCache
+from cache_backends import SharedCache, create_backend
+from directory import DirectoryService, CompanyDirectory, UserDirectory, COMPANIES, USERS
+from gwp import GasFactorMatrix, CATEGORY_GAS_FACTORS_QUERY
+from factor_versions import (FactorVersionIndex, FACTOR_VERSIONS_QUERY, CLOSE_OPEN_FACTOR_VERSION,
+                             INSERT_FACTOR_VERSION)
+from recalculation import RecalculationJob
+from eeio import (EEIOModel, EEIO_SECTORS_QUERY, LEDGER_MAPPING_QUERY, LEDGER_SPEND_QUERY,
+                  insert_ledger, replace_mapping, upsert_sectors)
+from emissions_rollup import ROLLUP_ADD_LAST_INSERT, add_to_rollup, remove_from_rollup
 import logging
 
 # Setup logging
@@ -16,43 +39,133 @@ logger = logging.getLogger(__name__)
 # Initialize configuration
 config = Config()
 
+# Cache backend; with CACHE_BACKEND=sqlite or redis it is shared by every app instance
+_cache_config = config.cache_config
+cache_backend = create_backend(**_cache_config)
+
+
+def shared_cache(namespace: str, ttl: float = 300.0) -> SharedCache:
+    """Namespaced view of the configured cache backend"""
+    return SharedCache(cache_backend, namespace, ttl, _cache_config['prefix'])
+
+
+# Emissions summaries shared by every session in the process (and across
+# instances when the backend is shared)
+summary_cache = SummaryCache(
+    shared=shared_cache('summaries', config.summary_cache_config['ttl']) if cache_backend.shared else None,
+    **config.summary_cache_config
+)
+# Catalogue rows by catalog_version, so instances do not each reload them
+catalog_rows_cache = shared_cache('catalog', ttl=86400)
+# Per-gas factor matrices and factor version indexes by catalogue version
+gas_factor_cache = TTLCache(maxsize=4, ttl=86400)
+factor_version_cache = TTLCache(maxsize=4, ttl=86400)
+# EEIO spend models per company, rebuilt when sectors or mappings change
+eeio_model_cache = TTLCache(maxsize=64, ttl=3600)
+# Company and user listings for the admin pages and registration
+directory_service = DirectoryService(shared_cache('directory', config.directory_cache_config['ttl']))
+
+
+def _emissions_summary_query(by_company: bool, by_period: bool) -> str:
+    # Read the per-category rollup rather than every emissions_data row
+    conditions = (["r.company_id = %s"] if by_company else []) + (["r.reporting_period = %s"] if by_period else [])
+    return f"""
+    SELECT c.scope_number, c.scope_name, SUM(r.total_co2e) as total_emissions,
+           SUM(r.entry_count) as entry_count
+    FROM emissions_rollup r
+    JOIN ghg_categories c ON r.category_id = c.id
+    {"WHERE " + " AND ".join(conditions) if conditions else ""}
+    GROUP BY c.scope_number, c.scope_name ORDER BY c.scope_number
+    """
+
+
+# Built once: prepared cursors only skip the re-prepare when handed the same
+# query object, so the per-call statements must not be rebuilt
+EMISSIONS_SUMMARY_QUERIES = {
+    (by_company, by_period): _emissions_summary_query(by_company, by_period)
+    for by_company in (False, True) for by_period in (False, True)
+}
+
+# Process-wide executor for running independent queries concurrently
+_query_executor = None
+_query_executor_lock = threading.Lock()
+
+def _get_query_executor() -> ThreadPoolExecutor:
+    global _query_executor
+    with _query_executor_lock:
+        if _query_executor is None:
+            _query_executor = ThreadPoolExecutor(
+                max_workers=config.query_workers, thread_name_prefix='db-query'
+            )
+        return _query_executor
+
 class DatabaseManager:
     def __init__(self):
         self.db_config = config.database_config
         self.connection_pool = None
+        self.read_pools = []
         self.connection = None
+        self.read_connection = None
+        self._read_connection_pool = None
+        self._session_depth = 0
+        self._local_state = {}
+        self._catalog_probed = False
+        self._catalog_version = None
         self._setup_connection_pool()
     
     def _setup_connection_pool(self):
-        """Setup connection pool for production deployment"""
-        try:
-            if config.is_production:
-                pool_config = self.db_config.copy()
-                pool_config.update({
-                    'pool_name': 'ghg_pool',
-                    'pool_size': 10,
-                    'pool_reset_session': True
-                })
-                self.connection_pool = pooling.MySQLConnectionPool(**pool_config)
-                logger.info("Database connection pool created successfully")
-            else:
-                logger.info("Development mode: using direct connections")
-        except Error as e:
-            logger.error(f"Error creating connection pool: {e}")
-            if config.is_production:
-                st.error("Database connection pool setup failed")
-                st.stop()
+        """Attach to the process-wide primary and replica pools (created on first use)"""
+        # Pool resets free server-side prepared statements; drop their registry too
+        self.connection_pool = get_pool('primary', self.db_config, on_reset=statement_cache.discard,
+                                        **config.pool_config)
+        self.read_pools = [
+            get_pool(f"replica:{replica['host']}:{replica['port']}", replica,
+                     on_reset=statement_cache.discard, **config.pool_config)
+            for replica in config.read_replica_configs
+        ]
     
     def connect(self) -> bool:
-        """Establish database connection"""
+        """Establish database connection (reuses an already open connection)"""
+        if self.connection is not None:
+            return True
+        return self._open_connection()
+    
+    def disconnect(self):
+        """Close database connection (deferred to the end of an active session)"""
+        if self._session_depth:
+            return
+        self._close_connection()
+    
+    @contextmanager
+    def session(self):
+        """Borrow one connection for the duration of the block.
+        
+        Sessions are re-entrant: nested ``session()``, ``connect()`` and
+        ``disconnect()`` calls reuse the outermost connection, which is only
+        released when the block that opened it exits. A connection already
+        opened with ``connect()`` is reused and left open. Yields True if
+        connected.
+        """
+        owns_connection = self.connection is None
+        connected = self._open_connection() if owns_connection else True
+        
+        self._session_depth += 1
         try:
-            if config.is_production and self.connection_pool:
-                self.connection = self.connection_pool.get_connection()
-            else:
-                self.connection = mysql.connector.connect(**self.db_config)
-            
-            if self.connection and self.connection.is_connected():
-                return True
+            yield connected
+        finally:
+            self._session_depth -= 1
+            if owns_connection:
+                self._close_connection()
+    
+    def _open_connection(self) -> bool:
+        """Borrow a connection from the shared pool"""
+        try:
+            self.connection = self.connection_pool.get_connection()
+            return True
+        except CircuitOpenError as e:
+            logger.warning(f"Database unavailable: {e}")
+            st.error("Database is temporarily unavailable. Please try again shortly.")
+            return False
         except Error as e:
             logger.error(f"Error connecting to MySQL: {e}")
             if config.is_production:
@@ -61,11 +174,104 @@ class DatabaseManager:
                 st.error(f"Database connection failed: {e}")
             return False
     
-    def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            self.connection = None
+    def _close_connection(self):
+        """Return the current connections to the shared pools"""
+        if self.connection is not None:
+            self.connection_pool.release(self.connection)
+        if self.read_connection is not None:
+            self._read_connection_pool.release(self.read_connection)
+        self.connection = None
+        self.read_connection = None
+        self._read_connection_pool = None
+        self._catalog_probed = False
+    
+    def _reader(self):
+        """Connection for SELECTs: a replica, unless this user wrote recently"""
+        if not self.read_pools or self._recently_wrote():
+            return self.connection
+        
+        if self.read_connection is None:
+            pool = self._pick_read_pool()
+            if pool is not self.connection_pool:
+                try:
+                    self.read_connection = pool.get_connection()
+                    self._read_connection_pool = pool
+                except Error as e:
+                    logger.warning(f"Replica '{pool.name}' unavailable, reading from primary: {e}")
+        
+        return self.read_connection or self.connection
+    
+    def _pick_read_pool(self):
+        """Pool to read from: a random replica, or the primary after a recent write"""
+        if not self.read_pools or self._recently_wrote():
+            return self.connection_pool
+        return random.choice(self.read_pools)
+    
+    def _state(self):
+        """Per-user state that survives reruns (Streamlit session state when available)"""
+        if get_script_run_ctx(suppress_warning=True) is not None:
+            return st.session_state
+        return self._local_state
+    
+    def _mark_write(self):
+        """Route this user's reads to the primary for the read-your-writes window"""
+        self._state()['db_last_write_at'] = time.time()
+    
+    def _recently_wrote(self) -> bool:
+        last_write_at = self._state().get('db_last_write_at', 0.0)
+        return time.time() - last_write_at < config.read_your_writes_window
+    
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run ``fn(db, *args, **kwargs)`` concurrently on its own pooled connection.
+        
+        ``db`` is a separate DatabaseManager holding its own session, so
+        independent queries run in parallel instead of one after another,
+        e.g. ``db.submit(DatabaseManager.get_emissions_summary, company_id, period)``.
+        Returns a Future with the result; a failed connection raises Error.
+        """
+        last_write_at = self._state().get('db_last_write_at', 0.0)
+        
+        def run():
+            worker = DatabaseManager()
+            # Carry read-your-writes routing over to the worker thread
+            worker._local_state['db_last_write_at'] = last_write_at
+            with worker.session() as connected:
+                if not connected:
+                    raise Error("Database connection failed")
+                return fn(worker, *args, **kwargs)
+        
+        return _get_query_executor().submit(run)
+    
+    def gather(self, calls: Dict[Any, Callable]) -> Dict[Any, Any]:
+        """Run independent ``fn(db)`` calls and return their results by key.
+        
+        This session already holds a connection, so fanning every call out
+        would hold it while waiting for more (hold-and-wait, which ends in
+        pool timeouts under load). The first call runs on this session's
+        connection, and the others are submitted only while the pool has
+        free connections; the remainder also run here. Errors propagate.
+        """
+        items = list(calls.items())
+        spare = self.connection_pool.available
+        futures = {key: self.submit(fn) for key, fn in items[1:1 + spare]}
+        results = {}
+        with self.session() as connected:
+            if not connected:
+                raise Error("Database connection failed")
+            for key, fn in items:
+                if key not in futures:
+                    results[key] = fn(self)
+        for key, future in futures.items():
+            results[key] = future.result()
+        return {key: results[key] for key, _ in items}
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Live statistics for the shared primary connection pool"""
+        return self.connection_pool.stats()
+    
+    def replica_pool_stats(self) -> List[Dict[str, Any]]:
+        """Live statistics for each read replica pool"""
+        return [pool.stats() for pool in self.read_pools]
     
     def execute_query(self, query: str, params: tuple = None, return_id: bool = False) -> Union[bool, int]:
         """Execute INSERT, UPDATE, DELETE queries"""
@@ -73,6 +279,7 @@ class DatabaseManager:
             cursor = self.connection.cursor()
             cursor.execute(query, params)
             self.connection.commit()
+            self._mark_write()
             
             if return_id:
                 last_id = cursor.lastrowid
@@ -90,7 +297,7 @@ class DatabaseManager:
     def fetch_query(self, query: str, params: tuple = None) -> List[tuple]:
         """Execute SELECT queries and return results"""
         try:
-            cursor = self.connection.cursor()
+            cursor = self._reader().cursor()
             cursor.execute(query, params)
             results = cursor.fetchall()
             cursor.close()
@@ -102,7 +309,7 @@ class DatabaseManager:
     def fetch_one(self, query: str, params: tuple = None) -> Optional[tuple]:
         """Execute SELECT query and return single result"""
         try:
-            cursor = self.connection.cursor()
+            cursor = self._reader().cursor()
             cursor.execute(query, params)
             result = cursor.fetchone()
             cursor.close()
@@ -111,6 +318,73 @@ class DatabaseManager:
             logger.error(f"Error fetching data: {e}")
             return None
     
+    @staticmethod
+    def _execute_prepared_cursor(connection, name: str, query: str, params: tuple = None):
+        """Execute a registered prepared statement, re-preparing it once if the server lost it"""
+        cursor = statement_cache.cursor(connection, name, query)
+        try:
+            cursor.execute(query, params)
+        except Error as e:
+            if e.errno != errorcode.ER_UNKNOWN_STMT_HANDLER:
+                raise
+            logger.warning(f"Prepared statement '{name}' was freed by the server, preparing it again")
+            statement_cache.discard(connection, name)
+            cursor = statement_cache.cursor(connection, name, query)
+            cursor.execute(query, params)
+        return cursor
+    
+    def fetch_prepared(self, name: str, query: str, params: tuple = None) -> List[tuple]:
+        """Execute a SELECT through the prepared statement registered as ``name``"""
+        connection = self._reader()
+        try:
+            cursor = self._execute_prepared_cursor(connection, name, query, params)
+            return cursor.fetchall()
+        except Error as e:
+            logger.error(f"Error fetching prepared statement '{name}': {e}")
+            statement_cache.discard(connection, name)
+            return []
+    
+    def fetch_one_prepared(self, name: str, query: str, params: tuple = None) -> Optional[tuple]:
+        """Execute a prepared SELECT and return its first row"""
+        results = self.fetch_prepared(name, query, params)
+        return results[0] if results else None
+    
+    def execute_prepared(self, name: str, query: str, params: tuple = None) -> bool:
+        """Execute an INSERT, UPDATE or DELETE through a prepared statement"""
+        try:
+            self._execute_prepared_cursor(self.connection, name, query, params)
+            self.connection.commit()
+            self._mark_write()
+            return True
+        except Error as e:
+            logger.error(f"Error executing prepared statement '{name}': {e}")
+            statement_cache.discard(self.connection, name)
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def execute_prepared_transaction(self, statements: List[Tuple[str, str, tuple]]) -> bool:
+        """Execute several (name, query, params) prepared statements in one transaction"""
+        name = None
+        try:
+            self.connection.start_transaction()
+            for name, query, params in statements:
+                self._execute_prepared_cursor(self.connection, name, query, params)
+            self.connection.commit()
+            self._mark_write()
+            return True
+        except Error as e:
+            logger.error(f"Error executing prepared statement '{name}': {e}")
+            if name is not None:
+                statement_cache.discard(self.connection, name)
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def prepared_statement_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the prepared statement registry"""
+        return statement_cache.stats()
+    
     def execute_transaction(self, queries: List[Tuple[str, tuple]]) -> bool:
         """Execute multiple queries in a transaction"""
         try:
@@ -121,6 +395,7 @@ class DatabaseManager:
                 cursor.execute(query, params)
             
             self.connection.commit()
+            self._mark_write()
             cursor.close()
             return True
         except Error as e:
@@ -145,6 +420,9 @@ class DatabaseManager:
         
         success = self.execute_query(query, (username, email, password_hash, role, company_id))
         
+        if success:
+            directory_service.invalidate(USERS)
+        
         if success and created_by:
             # Log user creation
             self._log_audit_trail(created_by, 'CREATE_USER', 'users', 0, {}, {
@@ -167,7 +445,7 @@ class DatabaseManager:
         LEFT JOIN companies c ON u.company_id = c.id
         WHERE u.username = %s AND u.password_hash = %s AND u.is_active = TRUE
         """
-        result = self.fetch_one(query, (username, password_hash))
+        result = self.fetch_one_prepared('authenticate_user', query, (username, password_hash))
         
         if result:
             # Reset failed login attempts on successful login
@@ -229,15 +507,10 @@ class DatabaseManager:
     
     def _log_audit_trail(self, user_id: int, action: str, table_name: str, record_id: int, 
                         old_values: Dict, new_values: Dict, ip_address: str = None):
-        """Log audit trail"""
-        query = """
-        INSERT INTO audit_trail (user_id, action, table_name, record_id, old_values, new_values, ip_address)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """
-        self.execute_query(query, (
-            user_id, action, table_name, record_id,
-            json.dumps(old_values), json.dumps(new_values), ip_address
-        ))
+        """Queue an audit trail entry for the background audit writer"""
+        get_audit_writer(self.connection_pool, **config.audit_config).log(
+            user_id, action, table_name, record_id, old_values, new_values, ip_address
+        )
 
     # Enhanced Company Management
     def create_company(self, company_name: str, company_code: str, industry_sector: str = None, 
@@ -251,6 +524,9 @@ class DatabaseManager:
         success = self.execute_query(query, (company_name, company_code, industry_sector, 
                                            address, contact_email, contact_phone))
         
+        if success:
+            directory_service.invalidate(COMPANIES)
+        
         if success and created_by:
             self._log_audit_trail(created_by, 'CREATE_COMPANY', 'companies', 0, {}, {
                 'company_name': company_name, 'company_code': company_code
@@ -259,21 +535,20 @@ class DatabaseManager:
         return success
     
     def get_companies(self, verification_status: str = None, limit: int = None) -> List[Dict]:
-        """Get companies with optional filters"""
-        base_query = "SELECT * FROM companies"
-        params = []
-        
-        if verification_status:
-            base_query += " WHERE verification_status = %s"
-            params.append(verification_status)
-        
-        base_query += " ORDER BY created_at DESC"
-        
-        if limit:
-            base_query += " LIMIT %s"
-            params.append(limit)
-        
-        results = self.fetch_query(base_query, tuple(params) if params else None)
+        """Get companies with optional filters (served from the directory cache)"""
+        companies = self.get_company_directory().list(verification_status)
+        return companies[:limit] if limit else companies
+
+    def get_company_by_code(self, company_code: str) -> Optional[Dict]:
+        """Look up a company by its code"""
+        return self.get_company_directory().by_code(company_code)
+
+    def get_company_directory(self) -> CompanyDirectory:
+        """All companies, loaded with one query per directory version"""
+        return directory_service.companies(self._load_companies)
+
+    def _load_companies(self) -> List[Dict]:
+        results = self.fetch_query("SELECT * FROM companies ORDER BY created_at DESC")
         
         return [
             {
@@ -303,6 +578,8 @@ class DatabaseManager:
         success = self.execute_query(query, (status, verified_by, company_id))
         
         if success:
+            summary_cache.invalidate(company_id)
+            directory_service.invalidate(COMPANIES)
             self._log_audit_trail(verified_by, 'VERIFY_COMPANY', 'companies', company_id, {}, {
                 'verification_status': status, 'verified_by': verified_by
             })
@@ -310,31 +587,22 @@ class DatabaseManager:
         return success
     
     def get_users(self, company_id: int = None, is_active: bool = None) -> List[Dict]:
-        """Get users with optional filters"""
-        base_query = """
+        """Get users with optional filters (served from the directory cache)"""
+        return self.get_user_directory().list(company_id=company_id, is_active=is_active)
+
+    def get_user_directory(self) -> UserDirectory:
+        """All users, loaded with one query per directory version"""
+        return directory_service.users(self._load_users)
+
+    def _load_users(self) -> List[Dict]:
+        query = """
         SELECT u.id, u.username, u.email, u.role, u.company_id, c.company_name, 
                u.is_active, u.last_login, u.created_at
         FROM users u
         LEFT JOIN companies c ON u.company_id = c.id
+        ORDER BY u.created_at DESC
         """
-        
-        conditions = []
-        params = []
-        
-        if company_id:
-            conditions.append("u.company_id = %s")
-            params.append(company_id)
-        
-        if is_active is not None:
-            conditions.append("u.is_active = %s")
-            params.append(is_active)
-        
-        if conditions:
-            base_query += " WHERE " + " AND ".join(conditions)
-        
-        base_query += " ORDER BY u.created_at DESC"
-        
-        results = self.fetch_query(base_query, tuple(params) if params else None)
+        results = self.fetch_query(query)
         
         return [
             {
@@ -351,46 +619,315 @@ class DatabaseManager:
             for row in results
         ]
 
-    # Enhanced GHG Categories (cache removed to fix display issue)
+    # Enhanced GHG Categories (cached per catalogue version)
     def get_ghg_categories(self, scope: int = None) -> List[Dict]:
-        """Get GHG categories with caching for performance"""
-        if not self.connect():
-            return []
+        """Get active GHG categories from the version-stamped catalogue cache"""
+        index = self.get_category_index()
+        if scope:
+            return index.by_scope(scope)
+        return list(index.categories)
+    
+    def get_category_index(self) -> CategoryIndex:
+        """Lookup index over the active categories, rebuilt only when the catalogue changes"""
+        with self.session() as connected:
+            if not connected:
+                return CategoryIndex([])
+            
+            version = self._probe_catalog_version()
+            index = category_catalog.get(version) if version is not None else None
+            if index is None:
+                share = version is not None and cache_backend.shared
+                rows = catalog_rows_cache.get(str(version)) if share else None
+                if rows is None:
+                    query = """
+                    SELECT * FROM ghg_categories 
+                    WHERE is_active = TRUE 
+                    ORDER BY scope_number, category_code, subcategory_code
+                    """
+                    rows = [self._category_row_to_dict(row) for row in self.fetch_query(query)]
+                    if share and rows:
+                        catalog_rows_cache.set(str(version), rows)
+                index = CategoryIndex(rows)
+                if version is not None and len(index):
+                    category_catalog.store(version, index)
         
-        try:
-            if scope:
-                query = """
-                SELECT * FROM ghg_categories 
-                WHERE scope_number = %s AND is_active = TRUE 
-                ORDER BY category_code, subcategory_code
-                """
-                results = self.fetch_query(query, (scope,))
-            else:
-                query = """
-                SELECT * FROM ghg_categories 
-                WHERE is_active = TRUE 
-                ORDER BY scope_number, category_code, subcategory_code
-                """
-                results = self.fetch_query(query)
+        return index
+    
+    def get_gas_factor_matrix(self) -> GasFactorMatrix:
+        """Per-gas factors for the active categories, rebuilt only when the catalogue changes"""
+        with self.session() as connected:
+            if not connected:
+                return GasFactorMatrix(CategoryIndex([]))
             
-            return [
-                {
-                    'id': row[0],
-                    'scope_number': row[1],
-                    'scope_name': row[2],
-                    'category_code': row[3],
-                    'category_name': row[4],
-                    'subcategory_code': row[5],
-                    'subcategory_name': row[6],
-                    'emission_factor': float(row[7]) if row[7] else 0.0,
-                    'unit': row[8],
-                    'description': row[9],
-                    'is_active': row[10]
-                }
-                for row in results
+            index = self.get_category_index()
+            version = self._catalog_version
+            matrix = gas_factor_cache.get(version) if version is not None else None
+            if matrix is None or matrix.ids is not index.ids:
+                matrix = GasFactorMatrix(index, self.fetch_query(CATEGORY_GAS_FACTORS_QUERY))
+                if version is not None and len(index):
+                    gas_factor_cache.set(version, matrix)
+        
+        return matrix
+    
+    def get_factor_versions(self) -> FactorVersionIndex:
+        """Dated emission factor versions, reloaded only when the catalogue changes"""
+        with self.session() as connected:
+            if not connected:
+                return FactorVersionIndex([])
+            
+            version = self._probe_catalog_version()
+            versions = factor_version_cache.get(version) if version is not None else None
+            if versions is None:
+                versions = FactorVersionIndex(self.fetch_query(FACTOR_VERSIONS_QUERY))
+                if version is not None:
+                    factor_version_cache.set(version, versions)
+        
+        return versions
+    
+    def add_factor_version(self, category_id: int, emission_factor: float, valid_from,
+                           valid_to=None, source: str = None, created_by: int = None) -> bool:
+        """Add a dated factor for a category.
+        
+        An open-ended factor ends the category's open version the day before;
+        one with ``valid_to`` overrides the open version for its range only.
+        """
+        if emission_factor < 0:
+            st.error("Emission factor must be non-negative")
+            return False
+        if valid_to is not None and valid_to < valid_from:
+            st.error("Valid-to date must not be before valid-from date")
+            return False
+        
+        with self.session() as connected:
+            if not connected:
+                return False
+            
+            # A dated correction overrides the open version only for its own range
+            operations = [] if valid_to is not None else [
+                (CLOSE_OPEN_FACTOR_VERSION, (valid_from, category_id, valid_from))
             ]
-        finally:
-            self.disconnect()
+            success = self.execute_transaction(operations + [
+                (INSERT_FACTOR_VERSION, (category_id, emission_factor, valid_from, valid_to,
+                                         source, created_by)),
+                (BUMP_CATALOG_VERSION, (CATALOG_NAME,))
+            ])
+        
+        if success:
+            self.invalidate_category_cache()
+            factor_version_cache.clear()
+            if created_by:
+                self._log_audit_trail(created_by, 'ADD_FACTOR_VERSION', 'emission_factor_versions',
+                                      category_id, {}, {
+                                          'emission_factor': emission_factor,
+                                          'valid_from': str(valid_from),
+                                          'valid_to': str(valid_to) if valid_to else None,
+                                          'source': source
+                                      })
+        
+        return success
+    
+    def recalculate_emissions(self, category_id: int, new_factor: float = None,
+                              reporting_periods: List[str] = None, old_factor: float = None,
+                              dry_run: bool = False, user_id: int = None, chunk_size: int = 5000,
+                              progress: Callable[[int, int], None] = None,
+                              all_factors: bool = False) -> Optional[Dict]:
+        """Bring stored emissions of a category in line with a corrected factor.
+        
+        Only rows entered with ``old_factor`` are changed, unless
+        ``all_factors`` is set, which also rewrites rows with custom factors.
+        Without ``new_factor`` each reporting period gets the factor valid for
+        it (its factor version, else the catalogue factor). The work runs in
+        short chunked transactions, see ``recalculation.RecalculationJob``.
+        Returns the combined report, or None if not connected or neither
+        ``old_factor`` nor ``all_factors`` was given. If a chunk
+        fails, the report covers the chunks committed before it and
+        ``error`` holds the failure; otherwise ``error`` is None.
+        """
+        if (old_factor is None) != all_factors:
+            logger.error("Emissions recalculation needs either old_factor or all_factors=True")
+            return None
+        
+        reports = []
+        error = None
+        with self.session() as connected:
+            if not connected:
+                return None
+            
+            try:
+                if new_factor is not None:
+                    jobs = {new_factor: reporting_periods}
+                else:
+                    periods = reporting_periods or [row[0] for row in self.fetch_query(
+                        "SELECT DISTINCT reporting_period FROM emissions_data WHERE category_id = %s",
+                        (category_id,)
+                    )]
+                    catalogue_factor = self.get_category_index().factor(category_id)
+                    versions = self.get_factor_versions()
+                    jobs = {}
+                    for period in periods:
+                        factor = versions.factor(category_id, period)
+                        factor = catalogue_factor if factor is None else factor
+                        if factor is not None:
+                            jobs.setdefault(factor, []).append(period)
+                
+                for factor, periods in jobs.items():
+                    job = RecalculationJob(self.connection, category_id, factor, periods, old_factor,
+                                           chunk_size, user_id, progress=progress,
+                                           all_factors=all_factors)
+                    try:
+                        job.run(dry_run)
+                    finally:
+                        if job.report:
+                            reports.append(job.report)
+            except Error as e:
+                logger.error(f"Emissions recalculation error: {e}")
+                error = str(e)
+            finally:
+                # Committed chunks are in the database even if a later one failed
+                if not dry_run and any(report['rows'] for report in reports):
+                    self._mark_write()
+                    summary_cache.invalidate()
+        
+        return {
+            'category_id': category_id,
+            'dry_run': dry_run,
+            'rows': sum(report['rows'] for report in reports),
+            'co2e_before': sum(report['co2e_before'] for report in reports),
+            'co2e_after': sum(report['co2e_after'] for report in reports),
+            'co2e_delta': sum(report['co2e_delta'] for report in reports),
+            'jobs': reports,
+            'error': error
+        }
+    
+    def get_eeio_model(self, company_id: int) -> EEIOModel:
+        """EEIO sector intensities and the company's ledger mapping as sparse matrices"""
+        model = eeio_model_cache.get(company_id)
+        if model is not None:
+            return model
+        
+        with self.session() as connected:
+            if not connected:
+                return EEIOModel([])
+            
+            # Not through fetch_query: a failed read must not be cached as an empty model
+            try:
+                cursor = self._reader().cursor()
+                cursor.execute(EEIO_SECTORS_QUERY)
+                sectors = cursor.fetchall()
+                cursor.execute(LEDGER_MAPPING_QUERY, (company_id,))
+                mappings = cursor.fetchall()
+                cursor.close()
+            except Error as e:
+                logger.error(f"Error loading EEIO model: {e}")
+                return EEIOModel([])
+        
+        model = EEIOModel(sectors, mappings)
+        if sectors:
+            eeio_model_cache.set(company_id, model)
+        return model
+    
+    def get_ledger_spend(self, company_id: int, reporting_period: str) -> List[Tuple[str, float]]:
+        """Imported ledger spend per account for a company and period"""
+        with self.session() as connected:
+            if not connected:
+                return []
+            
+            rows = self.fetch_query(LEDGER_SPEND_QUERY, (company_id, reporting_period))
+        return [(row[0], float(row[1])) for row in rows]
+    
+    def import_ledger(self, company_id: int, reporting_period: str, ledger, import_batch: str = None,
+                      user_id: int = None) -> int:
+        """Replace a company's ledger lines for a period in one transaction; returns the rows imported"""
+        return self._run_eeio_import('ledger_lines', insert_ledger, company_id, reporting_period, ledger,
+                                     import_batch, user_id=user_id)
+    
+    def import_ledger_mapping(self, company_id: int, mapping, user_id: int = None) -> int:
+        """Replace a company's ledger account -> EEIO sector mapping; returns the rows imported"""
+        count = self._run_eeio_import('ledger_sector_map', replace_mapping, company_id, mapping, user_id=user_id)
+        eeio_model_cache.pop(company_id)
+        return count
+    
+    def import_eeio_sectors(self, sectors, user_id: int = None) -> int:
+        """Add or update EEIO sectors and their intensities; returns the rows imported"""
+        count = self._run_eeio_import('eeio_sectors', upsert_sectors, sectors, user_id=user_id)
+        eeio_model_cache.clear()
+        return count
+    
+    def _run_eeio_import(self, table_name: str, write, *args, user_id: int = None) -> int:
+        with self.session() as connected:
+            if not connected:
+                return 0
+            
+            cursor = self.connection.cursor()
+            try:
+                self.connection.start_transaction()
+                count = write(cursor, *args)
+                self.connection.commit()
+            except (Error, ValueError, KeyError) as e:
+                logger.error(f"{table_name} import error: {e}")
+                self.connection.rollback()
+                return 0
+            finally:
+                cursor.close()
+        
+        self._mark_write()
+        if user_id:
+            self._log_audit_trail(user_id, f"IMPORT_{table_name.upper()}", table_name, 0, {}, {'rows': count})
+        return count
+    
+    def _probe_catalog_version(self) -> Optional[int]:
+        """Catalogue version, probed once per session (None if the table is missing)"""
+        if not self._catalog_probed:
+            row = self.fetch_one_prepared('catalog_version', CATALOG_VERSION_QUERY, (CATALOG_NAME,))
+            self._catalog_version = row[0] if row else None
+            self._catalog_probed = True
+        return self._catalog_version
+    
+    def invalidate_category_cache(self):
+        """Drop the cached catalogue so the next read reloads it"""
+        category_catalog.invalidate()
+        self._catalog_probed = False
+    
+    def update_emission_factor(self, category_id: int, emission_factor: float, 
+                               updated_by: int) -> bool:
+        """Change a category's emission factor and bump the catalogue version"""
+        if emission_factor < 0:
+            st.error("Emission factor must be non-negative")
+            return False
+        
+        with self.session() as connected:
+            if not connected:
+                return False
+            
+            success = self.execute_transaction([
+                ("UPDATE ghg_categories SET emission_factor = %s WHERE id = %s",
+                 (emission_factor, category_id)),
+                (BUMP_CATALOG_VERSION, (CATALOG_NAME,))
+            ])
+        
+        if success:
+            self.invalidate_category_cache()
+            self._log_audit_trail(updated_by, 'UPDATE_FACTOR', 'ghg_categories', category_id, {}, {
+                'emission_factor': emission_factor
+            })
+        
+        return success
+    
+    @staticmethod
+    def _category_row_to_dict(row: tuple) -> Dict:
+        return {
+            'id': row[0],
+            'scope_number': row[1],
+            'scope_name': row[2],
+            'category_code': row[3],
+            'category_name': row[4],
+            'subcategory_code': row[5],
+            'subcategory_name': row[6],
+            'emission_factor': float(row[7]) if row[7] else 0.0,
+            'unit': row[8],
+            'description': row[9],
+            'is_active': row[10]
+        }
 
     # Enhanced Emissions Data Management
     def add_emission_data(self, company_id: int, user_id: int, category_id: int, 
@@ -410,11 +947,17 @@ class DatabaseManager:
         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
         
-        success = self.execute_query(query, (company_id, user_id, category_id, reporting_period, 
-                                           activity_data, emission_factor, co2_equivalent, 
-                                           data_source, calculation_method, notes))
+        # The rollup is updated in the same transaction as the insert
+        success = self.execute_prepared_transaction([
+            ('insert_emission_data', query, (
+                company_id, user_id, category_id, reporting_period, activity_data, emission_factor,
+                co2_equivalent, data_source, calculation_method, notes
+            )),
+            ('rollup_add_last_insert', ROLLUP_ADD_LAST_INSERT, ())
+        ])
         
         if success:
+            self._update_summary_cache([(company_id, category_id, reporting_period, co2_equivalent)])
             self._log_audit_trail(user_id, 'ADD_EMISSION_DATA', 'emissions_data', 0, {}, {
                 'company_id': company_id, 'category_id': category_id, 
                 'reporting_period': reporting_period, 'co2_equivalent': co2_equivalent
@@ -422,19 +965,275 @@ class DatabaseManager:
         
         return success
     
+    @staticmethod
+    def validate_emission_records(records: List[Dict]) -> Tuple[List[tuple], List[Dict]]:
+        """Check bulk emission records one by one.
+        
+        Returns the insert rows of the valid records and an ``{'index',
+        'error'}`` entry for each rejected record.
+        """
+        required = ('company_id', 'user_id', 'category_id', 'reporting_period',
+                    'activity_data', 'emission_factor')
+        rows, rejected = [], []
+        for index, record in enumerate(records):
+            missing = [key for key in required if record.get(key) is None]
+            if missing:
+                rejected.append({'index': index, 'error': f"Missing {', '.join(missing)}"})
+                continue
+            try:
+                activity_data = float(record['activity_data'])
+                emission_factor = float(record['emission_factor'])
+            except (TypeError, ValueError):
+                rejected.append({'index': index, 'error': "Activity data and emission factor must be numbers"})
+                continue
+            if activity_data < 0 or emission_factor < 0:
+                rejected.append({'index': index, 'error': "Activity data and emission factor cannot be negative"})
+                continue
+            
+            rows.append((
+                record['company_id'], record['user_id'], record['category_id'],
+                record['reporting_period'], activity_data, emission_factor,
+                activity_data * emission_factor, record.get('data_source'),
+                record.get('calculation_method'), record.get('notes')
+            ))
+        return rows, rejected
+    
+    def add_emission_data_bulk(self, records: List[Dict], chunk_size: int = 1000) -> List[int]:
+        """Add many emission rows and their audit entries in one transaction.
+        
+        Each record holds the keyword arguments of ``add_emission_data``. The
+        whole batch is validated with ``validate_emission_records`` before
+        anything is written; if any record is rejected, each rejection is
+        logged and nothing is written. Rows are inserted with multi-row INSERTs
+        of ``chunk_size`` rows, and the rollup and the matching audit_trail rows
+        are written in the same transaction. Returns the new ids in record
+        order, or an empty list if nothing was written.
+        
+        The ids are derived from ``lastrowid``: a multi-row INSERT ... VALUES
+        is a "simple insert", for which InnoDB allocates consecutive
+        auto-increment values (``auto_increment_increment`` apart) under every
+        ``innodb_autoinc_lock_mode``. emissions_data must therefore be an
+        InnoDB table; this is checked before inserting.
+        """
+        rows, rejected = self.validate_emission_records(records)
+        for rejection in rejected:
+            logger.error(f"Bulk emission record {rejection['index']} rejected: {rejection['error']}")
+        if rejected or not rows:
+            return []
+        
+        emission_insert = """
+        INSERT INTO emissions_data 
+        (company_id, user_id, category_id, reporting_period, activity_data, emission_factor, 
+         co2_equivalent, data_source, calculation_method, notes)
+        VALUES """
+        audit_insert = """
+        INSERT INTO audit_trail (user_id, action, table_name, record_id, old_values, new_values, ip_address)
+        VALUES """
+        
+        with self.session() as connected:
+            if not connected:
+                return []
+            
+            try:
+                cursor = self.connection.cursor()
+                self.connection.start_transaction()
+                
+                # Consecutive simple-insert ids are an InnoDB guarantee (see docstring)
+                cursor.execute(
+                    "SELECT engine, @@auto_increment_increment FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = 'emissions_data'"
+                )
+                table = cursor.fetchone()
+                if table is None or str(table[0]).lower() != 'innodb':
+                    raise Error("Bulk insert needs an InnoDB emissions_data table")
+                step = int(table[1])
+                
+                inserted_ids = []
+                for start in range(0, len(rows), chunk_size):
+                    chunk = rows[start:start + chunk_size]
+                    first_id = self._insert_rows(cursor, emission_insert, chunk)
+                    chunk_ids = [first_id + i * step for i in range(len(chunk))]
+                    add_to_rollup(cursor, chunk_ids)
+                    inserted_ids.extend(chunk_ids)
+                
+                audit_rows = [
+                    (row[1], 'ADD_EMISSION_DATA', 'emissions_data', record_id, '{}', json.dumps({
+                        'company_id': row[0], 'category_id': row[2],
+                        'reporting_period': row[3], 'co2_equivalent': row[6]
+                    }), None)
+                    for row, record_id in zip(rows, inserted_ids)
+                ]
+                for start in range(0, len(audit_rows), chunk_size):
+                    self._insert_rows(cursor, audit_insert, audit_rows[start:start + chunk_size])
+                
+                self.connection.commit()
+                self._mark_write()
+                cursor.close()
+                self._update_summary_cache([(row[0], row[2], row[3], row[6]) for row in rows])
+                return inserted_ids
+            except Error as e:
+                logger.error(f"Bulk emission insert error: {e}")
+                self.connection.rollback()
+                return []
+    
+    def delete_emission_data(self, emission_id: int, deleted_by: int) -> bool:
+        """Delete one emission entry and take it out of the rollup in the same transaction"""
+        with self.session() as connected:
+            if not connected:
+                return False
+            
+            try:
+                cursor = self.connection.cursor()
+                self.connection.start_transaction()
+                cursor.execute("""
+                SELECT company_id, reporting_period, category_id, activity_data, emission_factor, co2_equivalent
+                FROM emissions_data WHERE id = %s FOR UPDATE
+                """, (emission_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    self.connection.rollback()
+                    cursor.close()
+                    return False
+                
+                cursor.execute("DELETE FROM emissions_data WHERE id = %s", (emission_id,))
+                remove_from_rollup(cursor, *row)
+                self.connection.commit()
+                self._mark_write()
+                cursor.close()
+            except Error as e:
+                logger.error(f"Error deleting emission data: {e}")
+                self.connection.rollback()
+                return False
+        
+        company_id, reporting_period, category_id = row[0], row[1], row[2]
+        summary_cache.invalidate(company_id, reporting_period)
+        self._log_audit_trail(deleted_by, 'DELETE_EMISSION_DATA', 'emissions_data', emission_id, {
+            'company_id': company_id, 'category_id': category_id,
+            'reporting_period': reporting_period, 'co2_equivalent': row[5]
+        }, {})
+        return True
+    
+    def _update_summary_cache(self, rows: List[tuple]):
+        """Fold committed (company_id, category_id, reporting_period, co2e) rows into cached summaries"""
+        index = self.get_category_index()
+        totals = {}
+        for company_id, category_id, reporting_period, co2_equivalent in rows:
+            category = index.get(category_id)
+            if category is None:
+                # Scope unknown (e.g. inactive category): recompute on next read
+                summary_cache.invalidate(company_id, reporting_period)
+                continue
+            key = (company_id, reporting_period, category['scope_number'], category['scope_name'])
+            emissions, count = totals.get(key, (0.0, 0))
+            # co2_equivalent is stored as DECIMAL(15,4)
+            totals[key] = (emissions + round(float(co2_equivalent), 4), count + 1)
+        
+        for (company_id, reporting_period, scope_number, scope_name), (emissions, count) in totals.items():
+            summary_cache.add(company_id, reporting_period, scope_number, scope_name, emissions, count)
+    
+    def _insert_rows(self, cursor, insert_prefix: str, rows: List[tuple]) -> int:
+        """Insert rows with one multi-row INSERT and return the first new id"""
+        placeholder = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        query = insert_prefix + ", ".join([placeholder] * len(rows))
+        cursor.execute(query, tuple(value for row in rows for value in row))
+        return cursor.lastrowid
+    
     def get_emissions_data(self, company_id: int = None, reporting_period: str = None, 
-                          limit: int = None, offset: int = 0) -> List[Dict]:
+                          limit: int = None, offset: int = 0, scope_number: int = None) -> List[Dict]:
         """Get emissions data with pagination"""
-        base_query = """
-        SELECT e.*, c.subcategory_name, c.scope_number, c.scope_name, c.unit, comp.company_name
-        FROM emissions_data e
-        JOIN ghg_categories c ON e.category_id = c.id
-        JOIN companies comp ON e.company_id = comp.id
+        base_query, params = self._emissions_data_query(company_id, reporting_period, scope_number)
+        
+        if limit:
+            base_query += " LIMIT %s OFFSET %s"
+            params.extend([limit, offset])
+        
+        results = self.fetch_query(base_query, tuple(params))
+        
+        return [self._emission_row_to_dict(row) for row in results]
+    
+    def iter_emissions_data(self, company_id: int = None, reporting_period: str = None,
+                            chunk_size: int = 1000, scope_number: int = None) -> Iterator[List[Dict]]:
+        """Stream emissions data as batches of at most ``chunk_size`` rows.
+        
+        Rows are read with ``fetchmany`` from an unbuffered cursor on a
+        dedicated pooled connection, so memory stays flat however large the
+        table is and the session connection stays free for other queries.
         """
+        base_query, params = self._emissions_data_query(company_id, reporting_period, scope_number)
+        
+        pool = self._pick_read_pool()
+        try:
+            connection = pool.get_connection()
+        except Error as e:
+            logger.error(f"Error connecting to MySQL: {e}")
+            return
         
+        completed = False
+        try:
+            cursor = connection.cursor(buffered=False)
+            cursor.execute(base_query, tuple(params))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [self._emission_row_to_dict(row) for row in rows]
+            cursor.close()
+            completed = True
+        except Error as e:
+            logger.error(f"Error streaming emissions data: {e}")
+        finally:
+            # A partly read unbuffered result leaves rows on the wire, so an
+            # abandoned connection is closed rather than returned to the pool
+            pool.release(connection, discard=not completed)
+    
+    def get_emissions_page(self, company_id: int = None, reporting_period: str = None,
+                           scope_number: int = None, page_size: int = 25, cursor: str = None,
+                           direction: str = 'next') -> Dict:
+        """Get one page of emissions data using keyset pagination.
+        
+        Rows are ordered newest first by ``(created_at, id)``. ``cursor`` is an
+        opaque token from a previous page's ``next_cursor`` (older rows) or
+        ``prev_cursor`` (newer rows, with ``direction='prev'``). Each page
+        seeks straight to its position, so deep pages cost the same as the
+        first one.
+        """
+        keyset = self._decode_page_cursor(cursor) if cursor else None
+        backwards = keyset is not None and direction == 'prev'
+        
+        base_query, params = self._emissions_data_query(
+            company_id, reporting_period, scope_number,
+            keyset=keyset, newer=backwards
+        )
+        base_query += " LIMIT %s"
+        params.append(page_size + 1)
+        
+        results = self.fetch_query(base_query, tuple(params))
+        has_more = len(results) > page_size
+        rows = [self._emission_row_to_dict(row) for row in results[:page_size]]
+        if backwards:
+            rows.reverse()
+        
+        has_newer = has_more if backwards else keyset is not None
+        has_older = keyset is not None if backwards else has_more
+        
+        return {
+            'rows': rows,
+            'next_cursor': self._encode_page_cursor(rows[-1]) if rows and has_older else None,
+            'prev_cursor': self._encode_page_cursor(rows[0]) if rows and has_newer else None
+        }
+    
+    def count_emissions_data(self, company_id: int = None, reporting_period: str = None,
+                             scope_number: int = None) -> int:
+        """Count emissions data rows matching the View Data filters"""
+        query = "SELECT COUNT(*) FROM emissions_data e"
         conditions = []
         params = []
         
+        if scope_number:
+            query += " JOIN ghg_categories c ON e.category_id = c.id"
+            conditions.append("c.scope_number = %s")
+            params.append(scope_number)
+        
         if company_id:
             conditions.append("e.company_id = %s")
             params.append(company_id)
@@ -444,48 +1243,39 @@ class DatabaseManager:
             params.append(reporting_period)
         
         if conditions:
-            base_query += " WHERE " + " AND ".join(conditions)
-        
-        base_query += " ORDER BY e.created_at DESC"
-        
-        if limit:
-            base_query += " LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
+            query += " WHERE " + " AND ".join(conditions)
         
-        results = self.fetch_query(base_query, tuple(params))
+        result = self.fetch_one(query, tuple(params))
+        return result[0] if result else 0
+    
+    def _encode_page_cursor(self, row: Dict) -> str:
+        """Encode a row's (created_at, id) position as an opaque page token"""
+        created_at = row['created_at'].isoformat() if row['created_at'] else ''
+        payload = json.dumps([created_at, row['id']]).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+    
+    def _decode_page_cursor(self, cursor: str) -> Optional[Tuple[datetime, int]]:
+        """Decode a page token back into its (created_at, id) position"""
+        try:
+            created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), int(row_id)
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid page cursor: {e}")
+            return None
+    
+    def _emissions_data_query(self, company_id: int = None, reporting_period: str = None,
+                              scope_number: int = None, keyset: Tuple[datetime, int] = None,
+                              newer: bool = False) -> Tuple[str, List]:
+        """Build the emissions data SELECT and its parameters.
         
-        return [
-            {
-                'id': row[0],
-                'company_id': row[1],
-                'user_id': row[2],
-                'category_id': row[3],
-                'reporting_period': row[4],
-                'activity_data': float(row[5]),
-                'emission_factor': float(row[6]),
-                'co2_equivalent': float(row[7]),
-                'data_source': row[8],
-                'calculation_method': row[9],
-                'verification_status': row[10],
-                'notes': row[11],
-                'created_at': row[12],
-                'updated_at': row[13],
-                'subcategory_name': row[14],
-                'scope_number': row[15],
-                'scope_name': row[16],
-                'unit': row[17],
-                'company_name': row[18]
-            }
-            for row in results
-        ]
-
-    def get_emissions_summary(self, company_id: int = None, reporting_period: str = None) -> Dict:
-        """Get emissions summary by scope with enhanced performance"""
+        With ``keyset`` only rows older than that (created_at, id) position
+        are selected, or newer ones in ascending order when ``newer`` is set.
+        """
         base_query = """
-        SELECT c.scope_number, c.scope_name, SUM(e.co2_equivalent) as total_emissions,
-               COUNT(e.id) as entry_count
+        SELECT e.*, c.subcategory_name, c.scope_number, c.scope_name, c.unit, comp.company_name
         FROM emissions_data e
         JOIN ghg_categories c ON e.category_id = c.id
+        JOIN companies comp ON e.company_id = comp.id
         """
         
         conditions = []
@@ -499,12 +1289,63 @@ class DatabaseManager:
             conditions.append("e.reporting_period = %s")
             params.append(reporting_period)
         
+        if scope_number:
+            conditions.append("c.scope_number = %s")
+            params.append(scope_number)
+        
+        if keyset:
+            operator = '>' if newer else '<'
+            conditions.append(
+                f"(e.created_at {operator} %s OR (e.created_at = %s AND e.id {operator} %s))"
+            )
+            params.extend([keyset[0], keyset[0], keyset[1]])
+        
         if conditions:
             base_query += " WHERE " + " AND ".join(conditions)
         
-        base_query += " GROUP BY c.scope_number, c.scope_name ORDER BY c.scope_number"
+        if newer:
+            base_query += " ORDER BY e.created_at ASC, e.id ASC"
+        else:
+            base_query += " ORDER BY e.created_at DESC, e.id DESC"
         
-        results = self.fetch_query(base_query, tuple(params))
+        return base_query, params
+    
+    def _emission_row_to_dict(self, row: tuple) -> Dict:
+        """Map an emissions data row to a dictionary"""
+        return {
+            'id': row[0],
+            'company_id': row[1],
+            'user_id': row[2],
+            'category_id': row[3],
+            'reporting_period': row[4],
+            'activity_data': float(row[5]),
+            'emission_factor': float(row[6]),
+            'co2_equivalent': float(row[7]),
+            'data_source': row[8],
+            'calculation_method': row[9],
+            'verification_status': row[10],
+            'notes': row[11],
+            'created_at': row[12],
+            'updated_at': row[13],
+            'subcategory_name': row[14],
+            'scope_number': row[15],
+            'scope_name': row[16],
+            'unit': row[17],
+            'company_name': row[18]
+        }
+
+    def get_emissions_summary(self, company_id: int = None, reporting_period: str = None) -> Dict:
+        """Get emissions summary by scope, served from the summary cache when possible"""
+        cached = summary_cache.get(company_id, reporting_period)
+        if cached is not None:
+            return cached
+        generation = summary_cache.generation(company_id)
+        
+        params = tuple(value for value in (company_id, reporting_period) if value)
+        # One prepared statement per filter combination
+        filters = (bool(company_id), bool(reporting_period))
+        results = self.fetch_prepared(f"emissions_summary:{filters[0]}:{filters[1]}",
+                                      EMISSIONS_SUMMARY_QUERIES[filters], params)
         
         summary = {
             'scope_1': 0,
@@ -519,7 +1360,7 @@ class DatabaseManager:
             scope_num = row[0]
             scope_name = row[1]
             emissions = float(row[2]) if row[2] else 0
-            entry_count = row[3]
+            entry_count = int(row[3])
             
             summary['details'].append({
                 'scope_number': scope_num,
@@ -540,27 +1381,54 @@ class DatabaseManager:
             
             summary['total'] += emissions
         
+        # Empty results are not cached: they may come from a failed query
+        if results:
+            summary_cache.put(company_id, reporting_period, summary, generation)
         return summary
+    
+    def summary_cache_stats(self) -> Dict[str, Any]:
+        """Hit ratio and size of the emissions summary cache"""
+        return summary_cache.stats()
 
     def health_check(self) -> Dict[str, Any]:
         """Database health check for monitoring"""
+        breaker = self.connection_pool.breaker
+        if breaker.state == OPEN:
+            # Report without waiting on a database that is known to be down
+            return {
+                'status': 'unhealthy',
+                'timestamp': datetime.now().isoformat(),
+                'database': 'circuit_open',
+                'circuit_breaker': breaker.stats(),
+                'pool': self.pool_stats()
+            }
+        
         try:
-            if self.connect():
+            with self.session() as connected:
                 # Test basic query
-                result = self.fetch_one("SELECT 1 as test")
-                self.disconnect()
-                
-                if result and result[0] == 1:
-                    return {
-                        'status': 'healthy',
-                        'timestamp': datetime.now().isoformat(),
-                        'database': 'connected'
-                    }
+                result = self.fetch_one("SELECT 1 as test") if connected else None
+            
+            if result and result[0] == 1:
+                return {
+                    'status': 'healthy',
+                    'timestamp': datetime.now().isoformat(),
+                    'database': 'connected',
+                    'circuit_breaker': breaker.stats(),
+                    'pool': self.pool_stats(),
+                    'replica_pools': self.replica_pool_stats(),
+                    'prepared_statements': self.prepared_statement_stats(),
+                    'category_catalog': category_catalog.stats(),
+                    'summary_cache': self.summary_cache_stats(),
+                    'directory': directory_service.stats(),
+                    'audit_writer': get_audit_writer(self.connection_pool, **config.audit_config).stats()
+                }
             
             return {
                 'status': 'unhealthy',
                 'timestamp': datetime.now().isoformat(),
-                'database': 'connection_failed'
+                'database': 'connection_failed',
+                'circuit_breaker': breaker.stats(),
+                'pool': self.pool_stats()
             }
         except Exception as e:
             return {
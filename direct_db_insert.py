@@ -1,5 +1,6 @@
 import mysql.connector
 from config import Config
+from category_catalog import bump_catalog_version
 import os
 
 # Create configuration
@@ -55,7 +56,9 @@ try:
         except Exception as e:
             print(f"❌ Error executing query: {e}")
     
-    # Commit changes
+    # Commit changes (bumping the version so running apps reload the catalogue)
+    if added_count:
+        bump_catalog_version(cursor)
     connection.commit()
     
     # Verify the count
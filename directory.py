@@ -0,0 +1,121 @@
+import threading
+import logging
+from typing import Dict, List, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+COMPANIES = 'companies'
+USERS = 'users'
+
+
+class CompanyDirectory:
+    """All companies (newest first) indexed by id, code and verification status"""
+
+    def __init__(self, companies: List[Dict[str, Any]]):
+        self.all = companies
+        self._by_id = {company['id']: company for company in companies}
+        self._by_code = {company['company_code']: company for company in companies}
+        self._by_status: Dict[str, List[Dict[str, Any]]] = {}
+        for company in companies:
+            self._by_status.setdefault(company['verification_status'], []).append(company)
+
+    def list(self, verification_status: str = None) -> List[Dict[str, Any]]:
+        if verification_status:
+            return list(self._by_status.get(verification_status, []))
+        return list(self.all)
+
+    def get(self, company_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(company_id)
+
+    def by_code(self, company_code: str) -> Optional[Dict[str, Any]]:
+        return self._by_code.get(company_code)
+
+    def status_counts(self) -> Dict[str, int]:
+        return {status: len(companies) for status, companies in self._by_status.items()}
+
+
+class UserDirectory:
+    """All users (newest first) indexed by id, role and company"""
+
+    def __init__(self, users: List[Dict[str, Any]]):
+        self.all = users
+        self._by_id = {user['id']: user for user in users}
+        self._by_role: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_company: Dict[int, List[Dict[str, Any]]] = {}
+        for user in users:
+            self._by_role.setdefault(user['role'], []).append(user)
+            self._by_company.setdefault(user['company_id'], []).append(user)
+
+    def list(self, company_id: int = None, role: str = None, is_active: bool = None) -> List[Dict[str, Any]]:
+        if company_id:
+            users = self._by_company.get(company_id, [])
+        elif role:
+            users = self._by_role.get(role, [])
+        else:
+            users = self.all
+        if company_id and role:
+            users = [user for user in users if user['role'] == role]
+        if is_active is not None:
+            users = [user for user in users if bool(user['is_active']) == bool(is_active)]
+        return list(users)
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(user_id)
+
+    def role_counts(self) -> Dict[str, int]:
+        return {role: len(users) for role, users in self._by_role.items()}
+
+
+class DirectoryService:
+    """Cached company and user listings shared by every session.
+
+    Each listing is loaded with one query, stored in the (possibly shared)
+    cache under the listing's version and indexed locally. Writes call
+    ``invalidate``, which bumps the version for every app instance.
+    """
+
+    _builders = {COMPANIES: CompanyDirectory, USERS: UserDirectory}
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._local: Dict[str, tuple] = {}  # listing -> (version, directory)
+        self._loads = 0
+
+    def companies(self, load: Callable[[], List[Dict[str, Any]]]) -> CompanyDirectory:
+        return self._get(COMPANIES, load)
+
+    def users(self, load: Callable[[], List[Dict[str, Any]]]) -> UserDirectory:
+        return self._get(USERS, load)
+
+    def invalidate(self, *listings: str):
+        for listing in listings or (COMPANIES, USERS):
+            self.cache.invalidate(listing)
+            with self._lock:
+                self._local.pop(listing, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.cache.stats(), loads=self._loads)
+
+    def _get(self, listing: str, load: Callable[[], List[Dict[str, Any]]]):
+        version = self.cache.version(listing)
+        with self._lock:
+            local = self._local.get(listing)
+        if version and local is not None and local[0] == version:
+            return local[1]
+
+        rows = self.cache.get('rows', listing, version) if version else None
+        if rows is None:
+            rows = load()
+            with self._lock:
+                self._loads += 1
+            # Empty listings are not cached: they may come from a failed query
+            if rows and version:
+                self.cache.set('rows', rows, listing, version)
+
+        directory = self._builders[listing](rows)
+        if rows and version:
+            with self._lock:
+                self._local[listing] = (version, directory)
+        return directory
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Spend-based Scope 3 emissions from an environmentally-extended input-output
+(EEIO) table.
+
+Each EEIO sector has an emission intensity (kg CO2e per £ of spend). A
+company maps its general-ledger accounts to sectors, per Scope 3 category
+(1 Purchased Goods and Services, 2 Capital Goods), with shares when an
+account spans several sectors. Imported ledger lines are then totalled per
+account and multiplied through the sparse mapping. Bulk imports from CSV:
+
+    python eeio.py sectors eeio_sectors.csv
+    python eeio.py mapping account_map.csv --company 1
+    python eeio.py ledger ledger_2024.csv --company 1 --period 2024
+    python eeio.py totals --company 1 --period 2024
+"""
+
+import argparse
+import logging
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import mysql.connector
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+from scipy import sparse
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Scope 3 categories calculated from spend, with the catalogue subcategory
+# their totals are recorded under
+SPEND_CATEGORIES = ['S3-01', 'S3-02']
+SPEND_SUBCATEGORIES = {'S3-01': 'S3-01-09', 'S3-02': 'S3-02-06'}
+
+EEIO_SECTORS_DDL = """
+CREATE TABLE IF NOT EXISTS eeio_sectors (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    sector_code VARCHAR(20) NOT NULL UNIQUE,
+    sector_name VARCHAR(200) NOT NULL,
+    intensity DECIMAL(15,8) NOT NULL,
+    source VARCHAR(100)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+LEDGER_SECTOR_MAP_DDL = """
+CREATE TABLE IF NOT EXISTS ledger_sector_map (
+    company_id INT NOT NULL,
+    account_code VARCHAR(50) NOT NULL,
+    sector_id INT NOT NULL,
+    scope3_category ENUM('S3-01', 'S3-02') NOT NULL DEFAULT 'S3-01',
+    share DECIMAL(7,6) NOT NULL DEFAULT 1,
+    PRIMARY KEY (company_id, account_code, sector_id, scope3_category),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (sector_id) REFERENCES eeio_sectors(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+LEDGER_LINES_DDL = """
+CREATE TABLE IF NOT EXISTS ledger_lines (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    company_id INT NOT NULL,
+    reporting_period VARCHAR(20) NOT NULL,
+    account_code VARCHAR(50) NOT NULL,
+    description VARCHAR(255),
+    supplier VARCHAR(200),
+    amount DECIMAL(15,2) NOT NULL,
+    import_batch VARCHAR(50),
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_ledger_company_period (company_id, reporting_period, account_code),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+EEIO_SECTORS_QUERY = "SELECT id, sector_code, sector_name, intensity FROM eeio_sectors"
+
+LEDGER_MAPPING_QUERY = """
+SELECT account_code, sector_id, scope3_category, share
+FROM ledger_sector_map
+WHERE company_id = %s
+"""
+
+# Spend per account; the model only needs the totals
+LEDGER_SPEND_QUERY = """
+SELECT account_code, SUM(amount)
+FROM ledger_lines
+WHERE company_id = %s AND reporting_period = %s
+GROUP BY account_code
+"""
+
+UPSERT_SECTOR_PREFIX = "INSERT INTO eeio_sectors (sector_code, sector_name, intensity, source) VALUES "
+UPSERT_SECTOR_SUFFIX = """
+ON DUPLICATE KEY UPDATE sector_name = VALUES(sector_name), intensity = VALUES(intensity),
+                        source = VALUES(source)
+"""
+INSERT_MAPPING_PREFIX = """
+INSERT INTO ledger_sector_map (company_id, account_code, sector_id, scope3_category, share)
+VALUES """
+INSERT_LEDGER_PREFIX = """
+INSERT INTO ledger_lines (company_id, reporting_period, account_code, description, supplier, amount, import_batch)
+VALUES """
+
+# CSV headers accepted for each column, first match wins
+_LEDGER_COLUMNS = {
+    'account_code': ['account_code', 'account', 'nominal_code', 'nominal', 'gl_account', 'gl_code'],
+    'amount': ['amount', 'net_amount', 'net', 'value', 'debit'],
+    'description': ['description', 'details', 'narrative', 'memo'],
+    'supplier': ['supplier', 'vendor', 'payee']
+}
+
+
+class EEIOModel:
+    """EEIO sector intensities and one company's ledger mapping as sparse matrices.
+
+    ``intensities`` is the sector intensity vector (kg CO2e per £). Every
+    spend category has an (accounts x sectors) CSR matrix of mapping shares.
+    Its product with the intensity vector is the effective intensity of each
+    account, so category totals are one sparse matrix-vector product over
+    the spend per account.
+    """
+
+    def __init__(self, sectors: Iterable[Sequence[Any]], mappings: Iterable[Sequence[Any]] = ()):
+        sectors = sorted((int(row[0]), row[1], row[2], float(row[3])) for row in sectors)
+        self.sector_ids = np.array([row[0] for row in sectors], dtype=np.int64)
+        self.sector_codes = [row[1] for row in sectors]
+        self.sector_names = [row[2] for row in sectors]
+        self.intensities = np.array([row[3] for row in sectors], dtype=np.float64)
+
+        mappings = [(str(row[0]), int(row[1]), row[2], float(row[3])) for row in mappings]
+        sector_positions = np.searchsorted(self.sector_ids, [row[1] for row in mappings])
+        known = [
+            position < len(self.sector_ids) and self.sector_ids[position] == row[1] and row[2] in SPEND_CATEGORIES
+            for row, position in zip(mappings, sector_positions)
+        ]
+        if not all(known):
+            logger.error(f"Ignoring {known.count(False)} ledger mappings to unknown sectors or categories")
+        mappings = [row for row, keep in zip(mappings, known) if keep]
+        sector_positions = sector_positions[np.array(known, dtype=bool)]
+
+        self.accounts = pd.Index(sorted({row[0] for row in mappings}), dtype=object)
+        account_positions = self.accounts.get_indexer([row[0] for row in mappings])
+        shape = (len(self.accounts), len(self.sector_ids))
+        self.mappings: Dict[str, sparse.csr_matrix] = {}
+        shares = np.array([row[3] for row in mappings], dtype=np.float64)
+        for category in SPEND_CATEGORIES:
+            rows = np.array([row[2] == category for row in mappings], dtype=bool)
+            self.mappings[category] = sparse.csr_matrix(
+                (shares[rows], (account_positions[rows], sector_positions[rows])), shape=shape
+            )
+        # (accounts x categories) kg CO2e per £, and the share of each account's spend
+        self.account_intensity = np.column_stack(
+            [self.mappings[category] @ self.intensities for category in SPEND_CATEGORIES]
+        )
+        self.account_share = np.column_stack(
+            [np.asarray(self.mappings[category].sum(axis=1)).ravel() for category in SPEND_CATEGORIES]
+        )
+
+    def account_spend(self, account_codes: Sequence[str], amounts: Sequence[float]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Spend per mapped account, and the unmapped spend per account code"""
+        account_codes = pd.Series(account_codes, dtype=object).astype(str)
+        amounts = pd.to_numeric(pd.Series(amounts), errors='coerce').fillna(0.0).to_numpy(dtype=np.float64)
+        positions = self.accounts.get_indexer(account_codes)
+        mapped = positions >= 0
+        spend = np.bincount(positions[mapped], weights=amounts[mapped], minlength=len(self.accounts))
+        unmapped = (pd.DataFrame({'account_code': account_codes[~mapped].to_numpy(), 'amount': amounts[~mapped]})
+                    .groupby('account_code', as_index=False)['amount'].sum()
+                    .sort_values('amount', ascending=False, ignore_index=True))
+        return spend, unmapped
+
+    def totals(self, account_codes: Sequence[str], amounts: Sequence[float]) -> Dict[str, Any]:
+        """Spend and kg CO2e per Scope 3 category for ledger lines (or per-account sums)"""
+        spend, unmapped = self.account_spend(account_codes, amounts)
+        co2e = self.account_intensity.T @ spend
+        mapped_spend = self.account_share.T @ spend
+        return {
+            'categories': {
+                category: {'spend': float(mapped_spend[i]), 'co2e': float(co2e[i])}
+                for i, category in enumerate(SPEND_CATEGORIES)
+            },
+            'total_co2e': float(co2e.sum()),
+            'unmapped_spend': float(unmapped['amount'].sum()),
+            'unmapped_accounts': unmapped
+        }
+
+    def sector_breakdown(self, account_codes: Sequence[str], amounts: Sequence[float]) -> pd.DataFrame:
+        """Spend and kg CO2e per sector and category, largest emitters first"""
+        spend, _ = self.account_spend(account_codes, amounts)
+        frames = []
+        for category in SPEND_CATEGORIES:
+            sector_spend = self.mappings[category].T @ spend
+            present = np.flatnonzero(sector_spend)
+            frames.append(pd.DataFrame({
+                'scope3_category': category,
+                'sector_code': [self.sector_codes[i] for i in present],
+                'sector_name': [self.sector_names[i] for i in present],
+                'spend': sector_spend[present],
+                'co2e': sector_spend[present] * self.intensities[present]
+            }))
+        return pd.concat(frames, ignore_index=True).sort_values('co2e', ascending=False, ignore_index=True)
+
+
+def read_ledger_csv(source) -> pd.DataFrame:
+    """Ledger lines from a CSV export, with account_code, amount, description and supplier columns"""
+    raw = pd.read_csv(source, dtype=str)
+    headers = {column.strip().lower().replace(' ', '_'): column for column in raw.columns}
+    ledger = pd.DataFrame(index=raw.index)
+    for column, aliases in _LEDGER_COLUMNS.items():
+        header = next((headers[alias] for alias in aliases if alias in headers), None)
+        if header is None and column in ('account_code', 'amount'):
+            raise ValueError(f"Ledger CSV has no {column} column (tried: {', '.join(aliases)})")
+        values = raw[header].str.strip() if header is not None else pd.Series(None, raw.index, dtype=object)
+        ledger[column] = values.astype(object).where(values.notna() & (values != ''), None)
+    ledger['amount'] = pd.to_numeric(ledger['amount'].str.replace(r'[£,\s]', '', regex=True), errors='coerce')
+    invalid = ledger['account_code'].isna() | ledger['amount'].isna()
+    if invalid.any():
+        raise ValueError(f"Ledger CSV rows without an account or amount: {list(raw.index[invalid][:10] + 2)}")
+    return ledger
+
+
+def insert_ledger(cursor, company_id: int, reporting_period: str, ledger: pd.DataFrame,
+                  import_batch: str = None, chunk_size: int = 5000) -> int:
+    """Replace a company's ledger lines for a period; run it inside a transaction"""
+    cursor.execute("DELETE FROM ledger_lines WHERE company_id = %s AND reporting_period = %s",
+                   (company_id, reporting_period))
+    ledger = ledger.astype(object).where(ledger.notna(), None)
+    rows = [
+        (company_id, reporting_period, str(account_code), description, supplier, float(amount), import_batch)
+        for account_code, description, supplier, amount in zip(
+            ledger['account_code'], ledger.get('description', [None] * len(ledger)),
+            ledger.get('supplier', [None] * len(ledger)), ledger['amount']
+        )
+    ]
+    _insert_chunks(cursor, INSERT_LEDGER_PREFIX, rows, chunk_size)
+    return len(rows)
+
+
+def replace_mapping(cursor, company_id: int, mapping: pd.DataFrame) -> int:
+    """Replace a company's account -> sector mapping (account_code, sector_code,
+    optional scope3_category and share columns); run it inside a transaction"""
+    cursor.execute("SELECT id, sector_code FROM eeio_sectors")
+    sector_ids = {code: sector_id for sector_id, code in cursor.fetchall()}
+    unknown = sorted(set(mapping['sector_code']) - set(sector_ids))
+    if unknown:
+        raise ValueError(f"Unknown EEIO sector(s): {', '.join(map(str, unknown[:10]))}")
+    categories = mapping['scope3_category'].fillna('S3-01') if 'scope3_category' in mapping else ['S3-01'] * len(mapping)
+    shares = pd.to_numeric(mapping['share']).fillna(1.0) if 'share' in mapping else [1.0] * len(mapping)
+    rows = [
+        (company_id, str(account_code), sector_ids[sector_code], category, float(share))
+        for account_code, sector_code, category, share in zip(
+            mapping['account_code'], mapping['sector_code'], categories, shares
+        )
+    ]
+    cursor.execute("DELETE FROM ledger_sector_map WHERE company_id = %s", (company_id,))
+    _insert_chunks(cursor, INSERT_MAPPING_PREFIX, rows)
+    return len(rows)
+
+
+def upsert_sectors(cursor, sectors: pd.DataFrame) -> int:
+    """Add or update EEIO sectors (sector_code, sector_name, intensity, optional source)"""
+    sources = sectors['source'] if 'source' in sectors else [None] * len(sectors)
+    rows = [
+        (str(code), name, float(intensity), source)
+        for code, name, intensity, source in zip(
+            sectors['sector_code'], sectors['sector_name'], sectors['intensity'], sources
+        )
+    ]
+    for start in range(0, len(rows), 1000):
+        chunk = rows[start:start + 1000]
+        cursor.execute(UPSERT_SECTOR_PREFIX + ", ".join(["(%s, %s, %s, %s)"] * len(chunk)) + UPSERT_SECTOR_SUFFIX,
+                       tuple(value for row in chunk for value in row))
+    return len(rows)
+
+
+def _insert_chunks(cursor, insert_prefix: str, rows: List[tuple], chunk_size: int = 5000):
+    # One multi-row INSERT per chunk
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        placeholder = "(" + ", ".join(["%s"] * len(chunk[0])) + ")"
+        cursor.execute(insert_prefix + ", ".join([placeholder] * len(chunk)),
+                       tuple(value for row in chunk for value in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spend-based Scope 3 emissions from EEIO sectors")
+    parser.add_argument('command', choices=['sectors', 'mapping', 'ledger', 'totals'])
+    parser.add_argument('file', nargs='?', help="CSV file to import")
+    parser.add_argument('--company', type=int, help="companies.id")
+    parser.add_argument('--period', help="reporting period of the ledger")
+    parser.add_argument('--batch', help="import batch label for ledger lines")
+    args = parser.parse_args()
+    if args.command != 'sectors' and args.company is None:
+        parser.error("--company is required")
+    if args.command in ('ledger', 'totals') and not args.period:
+        parser.error("--period is required")
+    if args.command != 'totals' and not args.file:
+        parser.error("a CSV file is required")
+
+    print(f"📒 EEIO {args.command}")
+    print("=" * 40)
+
+    try:
+        connection = mysql.connector.connect(**Config().database_config)
+        cursor = connection.cursor()
+        if args.command == 'totals':
+            cursor.execute(EEIO_SECTORS_QUERY)
+            sectors = cursor.fetchall()
+            cursor.execute(LEDGER_MAPPING_QUERY, (args.company,))
+            model = EEIOModel(sectors, cursor.fetchall())
+            cursor.execute(LEDGER_SPEND_QUERY, (args.company, args.period))
+            spend = cursor.fetchall()
+        else:
+            connection.start_transaction()
+            if args.command == 'sectors':
+                count = upsert_sectors(cursor, pd.read_csv(args.file, dtype={'sector_code': str}))
+            elif args.command == 'mapping':
+                count = replace_mapping(cursor, args.company, pd.read_csv(args.file, dtype=str))
+            else:
+                count = insert_ledger(cursor, args.company, args.period, read_ledger_csv(args.file), args.batch)
+            connection.commit()
+        cursor.close()
+        connection.close()
+    except (Error, ValueError, OSError) as e:
+        print(f"❌ EEIO {args.command} failed: {e}")
+        return False
+
+    if args.command != 'totals':
+        print(f"✅ Imported {count:,} rows")
+        return True
+
+    totals = model.totals([row[0] for row in spend], [float(row[1]) for row in spend])
+    for category, values in totals['categories'].items():
+        print(f"   {category}: £{values['spend']:,.2f} -> {values['co2e']:,.2f} kg CO2e")
+    print(f"✅ Total {totals['total_co2e']:,.2f} kg CO2e")
+    if totals['unmapped_spend']:
+        print(f"⚠️  £{totals['unmapped_spend']:,.2f} on {len(totals['unmapped_accounts'])} unmapped accounts")
+    return True
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Emissions rollup maintenance for the GHG emissions calculator.
+
+emissions_rollup holds one row per (company_id, reporting_period, category_id)
+with the sums and counts of the matching emissions_data rows, so summaries and
+category breakdowns read O(categories) rows instead of O(entries). The
+application keeps it current in the same transaction as every insert and
+delete. Run this script to check it against emissions_data, or with
+--rebuild to recompute it from scratch, e.g. after rows were removed by a
+cascading delete or edited outside the application.
+"""
+
+import argparse
+from typing import Dict, List
+
+import mysql.connector
+from mysql.connector import Error
+
+from config import Config
+
+EMISSIONS_ROLLUP_DDL = """
+CREATE TABLE IF NOT EXISTS emissions_rollup (
+    company_id INT NOT NULL,
+    reporting_period VARCHAR(20) NOT NULL,
+    category_id INT NOT NULL,
+    scope_number INT NOT NULL,
+    total_activity DECIMAL(20,4) NOT NULL DEFAULT 0,
+    total_emission_factor DECIMAL(20,6) NOT NULL DEFAULT 0,
+    total_co2e DECIMAL(20,4) NOT NULL DEFAULT 0,
+    entry_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (company_id, reporting_period, category_id),
+    INDEX idx_rollup_period (reporting_period),
+    FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Aggregates the selected emissions_data rows, so the rollup gets exactly the
+# stored (rounded) DECIMAL values
+_ROLLUP_ADD_SELECT = """
+INSERT INTO emissions_rollup
+    (company_id, reporting_period, category_id, scope_number,
+     total_activity, total_emission_factor, total_co2e, entry_count)
+SELECT e.company_id, e.reporting_period, e.category_id, c.scope_number,
+       SUM(e.activity_data), SUM(e.emission_factor), SUM(e.co2_equivalent), COUNT(*)
+FROM emissions_data e
+JOIN ghg_categories c ON e.category_id = c.id
+WHERE {condition}
+GROUP BY e.company_id, e.reporting_period, e.category_id, c.scope_number
+ON DUPLICATE KEY UPDATE
+    total_activity = total_activity + VALUES(total_activity),
+    total_emission_factor = total_emission_factor + VALUES(total_emission_factor),
+    total_co2e = total_co2e + VALUES(total_co2e),
+    entry_count = entry_count + VALUES(entry_count)
+"""
+
+# Run right after a single-row INSERT INTO emissions_data on the same connection
+ROLLUP_ADD_LAST_INSERT = _ROLLUP_ADD_SELECT.format(condition="e.id = LAST_INSERT_ID()")
+
+ROLLUP_REMOVE = """
+UPDATE emissions_rollup
+SET total_activity = total_activity - %s,
+    total_emission_factor = total_emission_factor - %s,
+    total_co2e = total_co2e - %s,
+    entry_count = entry_count - 1
+WHERE company_id = %s AND reporting_period = %s AND category_id = %s
+"""
+
+ROLLUP_PRUNE = """
+DELETE FROM emissions_rollup
+WHERE company_id = %s AND reporting_period = %s AND category_id = %s AND entry_count <= 0
+"""
+
+_EXPECTED_ROLLUP = """
+SELECT e.company_id, e.reporting_period, e.category_id, c.scope_number,
+       SUM(e.activity_data), SUM(e.emission_factor), SUM(e.co2_equivalent), COUNT(*)
+FROM emissions_data e
+JOIN ghg_categories c ON e.category_id = c.id
+GROUP BY e.company_id, e.reporting_period, e.category_id, c.scope_number
+"""
+
+
+def add_to_rollup(cursor, emission_ids: List[int]):
+    """Fold freshly inserted emissions_data rows into the rollup"""
+    placeholders = ', '.join(['%s'] * len(emission_ids))
+    cursor.execute(_ROLLUP_ADD_SELECT.format(condition=f"e.id IN ({placeholders})"), tuple(emission_ids))
+
+
+def remove_from_rollup(cursor, company_id: int, reporting_period: str, category_id: int,
+                       activity_data, emission_factor, co2_equivalent):
+    """Take one deleted emissions_data row out of the rollup"""
+    key = (company_id, reporting_period, category_id)
+    cursor.execute(ROLLUP_REMOVE, (activity_data, emission_factor, co2_equivalent) + key)
+    cursor.execute(ROLLUP_PRUNE, key)
+
+
+def rebuild_rollup(cursor) -> int:
+    """Recompute the whole rollup from emissions_data; returns the number of rollup rows"""
+    cursor.execute("DELETE FROM emissions_rollup")
+    cursor.execute(
+        "INSERT INTO emissions_rollup "
+        "(company_id, reporting_period, category_id, scope_number, "
+        " total_activity, total_emission_factor, total_co2e, entry_count) " + _EXPECTED_ROLLUP
+    )
+    return cursor.rowcount
+
+
+def verify_rollup(cursor) -> List[Dict]:
+    """Compare the rollup with emissions_data; returns the mismatching keys"""
+    cursor.execute(_EXPECTED_ROLLUP)
+    expected = {row[:3]: row[3:] for row in cursor.fetchall()}
+    cursor.execute(
+        "SELECT company_id, reporting_period, category_id, scope_number, "
+        "total_activity, total_emission_factor, total_co2e, entry_count FROM emissions_rollup"
+    )
+    actual = {row[:3]: row[3:] for row in cursor.fetchall() if row[7] > 0}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if expected.get(key) != actual.get(key):
+            mismatches.append({
+                'company_id': key[0],
+                'reporting_period': key[1],
+                'category_id': key[2],
+                'expected': expected.get(key),
+                'actual': actual.get(key)
+            })
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or rebuild the emissions rollup table")
+    parser.add_argument('--rebuild', action='store_true', help="recompute the rollup from emissions_data")
+    args = parser.parse_args()
+
+    print("📊 Emissions rollup maintenance")
+    print("=" * 40)
+
+    try:
+        connection = mysql.connector.connect(**Config().database_config)
+        cursor = connection.cursor()
+
+        if args.rebuild:
+            connection.start_transaction()
+            rows = rebuild_rollup(cursor)
+            connection.commit()
+            print(f"✅ Rollup rebuilt with {rows} rows")
+
+        mismatches = verify_rollup(cursor)
+        if mismatches:
+            print(f"❌ {len(mismatches)} rollup rows differ from emissions_data:")
+            for mismatch in mismatches[:20]:
+                print(f"   {mismatch}")
+            print("💡 Run with --rebuild to recompute the rollup")
+        else:
+            print("✅ Rollup matches emissions_data")
+
+        cursor.close()
+        connection.close()
+        return not mismatches
+    except Error as e:
+        print(f"❌ Rollup maintenance failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,195 @@
+import re
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Any, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EMISSION_FACTOR_VERSIONS_DDL = """
+CREATE TABLE IF NOT EXISTS emission_factor_versions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    category_id INT NOT NULL,
+    emission_factor DECIMAL(15,8) NOT NULL,
+    valid_from DATE NOT NULL,
+    valid_to DATE NULL,
+    source VARCHAR(100),
+    created_by INT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_factor_version (category_id, valid_from),
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+FACTOR_VERSIONS_QUERY = """
+SELECT category_id, emission_factor, valid_from, valid_to, source
+FROM emission_factor_versions
+"""
+
+# Ends the open version of a category the day before a new one starts
+CLOSE_OPEN_FACTOR_VERSION = """
+UPDATE emission_factor_versions
+SET valid_to = DATE_SUB(%s, INTERVAL 1 DAY)
+WHERE category_id = %s AND valid_to IS NULL AND valid_from < %s
+"""
+
+INSERT_FACTOR_VERSION = """
+INSERT INTO emission_factor_versions (category_id, emission_factor, valid_from, valid_to, source, created_by)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Days are proleptic Gregorian ordinals (date.toordinal, 1 to 3652059), so
+# category_id * _KEY_STRIDE + day sorts by category, then date. Periods that
+# do not parse get _NO_DAY, which is not a day; open versions end on _OPEN_ENDED.
+_KEY_STRIDE = 1 << 22
+_NO_DAY = np.iinfo(np.int64).min
+_OPEN_ENDED = np.iinfo(np.int64).max
+
+_PERIOD_PATTERNS = [
+    (re.compile(r'^(\d{4})$'), lambda m: date(int(m.group(1)), 1, 1)),
+    (re.compile(r'^Q([1-4])-(\d{4})$'), lambda m: date(int(m.group(2)), 3 * int(m.group(1)) - 2, 1)),
+    (re.compile(r'^(\d{4})-Q([1-4])$'), lambda m: date(int(m.group(1)), 3 * int(m.group(2)) - 2, 1)),
+    (re.compile(r'^(\d{4})-(\d{2})$'), lambda m: date(int(m.group(1)), int(m.group(2)), 1)),
+    (re.compile(r'^(\d{4})-(\d{2})-(\d{2})$'), lambda m: date(int(m.group(1)), int(m.group(2)), int(m.group(3)))),
+]
+
+
+def period_start(reporting_period: str) -> Optional[date]:
+    """First day of a reporting period ('2024', 'Q3-2024', '2024-07', ...), or None"""
+    text = str(reporting_period or '').strip()
+    for pattern, to_date in _PERIOD_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            try:
+                return to_date(match)
+            except ValueError:
+                return None
+    return None
+
+
+def _day_number(value: Optional[date]) -> int:
+    return value.toordinal() if value is not None else _NO_DAY
+
+
+def _resolve_overlaps(valid_from: List[int], valid_to: List[int]) -> List[tuple]:
+    """Non-overlapping (valid_from, valid_to, version) segments of one category.
+
+    ``valid_from`` is sorted. Where versions overlap the later-starting one
+    applies, and an earlier version that outlasts it applies again after it.
+    """
+    boundaries = sorted(set(valid_from) | {end + 1 for end in valid_to if end != _OPEN_ENDED})
+    segments = []
+    for position, start in enumerate(boundaries):
+        covering = [version for version in range(len(valid_from))
+                    if valid_from[version] <= start <= valid_to[version]]
+        if not covering:
+            continue
+        version = covering[-1]
+        end = boundaries[position + 1] - 1 if position + 1 < len(boundaries) else valid_to[version]
+        if segments and segments[-1][2] == version and segments[-1][1] + 1 == start:
+            segments[-1] = (segments[-1][0], end, version)
+        else:
+            segments.append((start, end, version))
+    return segments
+
+
+class FactorVersionIndex:
+    """Emission factor versions with validity ranges, as sorted arrays.
+
+    A version applies from ``valid_from`` to ``valid_to`` inclusive, or
+    indefinitely when ``valid_to`` is NULL. Overlapping versions of a
+    category are split into non-overlapping segments at load, the
+    later-starting version taking precedence. Segments are sorted by
+    (category_id, valid_from), so a whole batch of (category, period) pairs
+    resolves with one ``searchsorted``.
+    """
+
+    def __init__(self, versions: Iterable[Sequence[Any]]):
+        rows = sorted(
+            (int(row[0]), _day_number(row[2]),
+             _day_number(row[3]) if row[3] is not None else _OPEN_ENDED,
+             float(row[1]), row[4] if len(row) > 4 else None)
+            for row in versions if row[2] is not None
+        )
+        self.category_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.valid_from = np.array([row[1] for row in rows], dtype=np.int64)
+        self.valid_to = np.array([row[2] for row in rows], dtype=np.int64)
+        self.factors = np.array([row[3] for row in rows], dtype=np.float64)
+        self.sources = [row[4] for row in rows]
+
+        # Versions are their own segments unless a category has overlaps
+        self._segment_version = np.arange(len(rows), dtype=np.int64)
+        self._segment_to = self.valid_to
+        segment_from = self.valid_from
+        overlapping = np.flatnonzero((self.category_ids[1:] == self.category_ids[:-1]) &
+                                     (self.valid_to[:-1] >= self.valid_from[1:]))
+        if len(overlapping):
+            overlapping_categories = set(self.category_ids[overlapping].tolist())
+            segments = []
+            for category_id in np.unique(self.category_ids).tolist():
+                start, end = np.searchsorted(self.category_ids, [category_id, category_id + 1])
+                if category_id in overlapping_categories:
+                    segments.extend((start_day, end_day, start + version) for start_day, end_day, version in
+                                    _resolve_overlaps(self.valid_from[start:end].tolist(),
+                                                      self.valid_to[start:end].tolist()))
+                else:
+                    segments.extend(zip(self.valid_from[start:end].tolist(), self.valid_to[start:end].tolist(),
+                                        range(start, end)))
+            self._segment_version = np.array([segment[2] for segment in segments], dtype=np.int64)
+            self._segment_to = np.array([segment[1] for segment in segments], dtype=np.int64)
+            segment_from = np.array([segment[0] for segment in segments], dtype=np.int64)
+        self._segment_category = self.category_ids[self._segment_version]
+        self._keys = self._segment_category * _KEY_STRIDE + segment_from
+
+    def __len__(self) -> int:
+        return len(self.factors)
+
+    def positions_for(self, category_ids, reporting_periods) -> np.ndarray:
+        """Index of the version covering each (category, period) pair, -1 where none does"""
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        days = self._period_days(reporting_periods)
+        if not len(self._keys):
+            return np.full(category_ids.shape, -1, dtype=np.int64)
+
+        dated = days != _NO_DAY
+        keys = category_ids * _KEY_STRIDE + np.where(dated, days, 0)
+        segments = np.searchsorted(self._keys, keys, side='right') - 1
+        clipped = np.maximum(segments, 0)
+        covered = ((segments >= 0) & dated &
+                   (self._segment_category[clipped] == category_ids) &
+                   (self._segment_to[clipped] >= days))
+        return np.where(covered, self._segment_version[clipped], -1)
+
+    def factors_for(self, category_ids, reporting_periods) -> np.ndarray:
+        """Versioned factors for arrays of category ids and periods (NaN where none applies)"""
+        positions = self.positions_for(category_ids, reporting_periods)
+        if not len(self.factors):
+            return np.full(positions.shape, np.nan)
+        return np.where(positions >= 0, self.factors[np.maximum(positions, 0)], np.nan)
+
+    def factor(self, category_id: int, reporting_period: str) -> Optional[float]:
+        value = self.factors_for([category_id], [reporting_period])[0]
+        return None if np.isnan(value) else float(value)
+
+    def versions(self, category_id: int) -> List[Dict[str, Any]]:
+        """All versions of one category, oldest first"""
+        start, end = np.searchsorted(self.category_ids, [category_id, category_id + 1])
+        return [
+            {
+                'emission_factor': float(self.factors[i]),
+                'valid_from': date.fromordinal(int(self.valid_from[i])),
+                'valid_to': (None if self.valid_to[i] == _OPEN_ENDED else
+                             date.fromordinal(int(self.valid_to[i]))),
+                'source': self.sources[i]
+            }
+            for i in range(start, end)
+        ]
+
+    @staticmethod
+    def _period_days(reporting_periods) -> np.ndarray:
+        # Parse each distinct period once
+        codes, periods = pd.factorize(np.asarray(reporting_periods, dtype=object))
+        days = np.array([_day_number(period_start(period)) for period in periods] + [_NO_DAY], dtype=np.int64)
+        return days[codes]  # code -1 (missing) picks the trailing _NO_DAY
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+In-memory stand-ins for DatabaseManager shared by the tests and benchmarks
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterable
+
+from category_catalog import CategoryIndex
+from factor_versions import FactorVersionIndex
+from gwp import GasFactorMatrix
+
+def make_category(category_id, scope, category_code, subcategory_code, factor) -> Dict:
+    """A ghg_categories row as the category catalogue loads it"""
+    return {
+        'id': category_id,
+        'scope_number': scope,
+        'scope_name': f"Scope {scope}",
+        'category_code': category_code,
+        'category_name': category_code,
+        'subcategory_code': subcategory_code,
+        'subcategory_name': subcategory_code,
+        'emission_factor': factor,
+        'unit': 'kg CO2e/unit',
+        'description': None,
+        'is_active': True
+    }
+
+class IndexOnlyDatabase:
+    """Serves the category and factor version indexes, all calculate_batch needs"""
+
+    def __init__(self, index: CategoryIndex, versions: FactorVersionIndex = None):
+        self.index = index
+        self.versions = versions if versions is not None else FactorVersionIndex([])
+
+    def get_category_index(self) -> CategoryIndex:
+        return self.index
+
+    def get_factor_versions(self) -> FactorVersionIndex:
+        return self.versions
+
+class GasDatabase(IndexOnlyDatabase):
+    """Adds the per-gas factor matrix and canned emissions rows for the GWP paths"""
+
+    def __init__(self, index: CategoryIndex, gas_rows: Iterable[tuple], emissions_rows: Iterable[tuple] = ()):
+        super().__init__(index)
+        self.matrix = GasFactorMatrix(index, gas_rows)
+        self.emissions_rows = list(emissions_rows)
+
+    @contextmanager
+    def session(self):
+        yield True
+
+    def fetch_query(self, query, params=None):
+        return self.emissions_rows
+
+    def get_gas_factor_matrix(self) -> GasFactorMatrix:
+        return self.matrix
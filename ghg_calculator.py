@@ -1,42 +1,43 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 from database_operations import DatabaseManager
+from unit_conversion import unit_registry, activity_unit
+from gwp import GASES, GWP_SETS, DEFAULT_GWP_SET, CO2E, gas_emissions, to_co2e
+from uncertainty import MonteCarloSimulation
+from eeio import SPEND_CATEGORIES, SPEND_SUBCATEGORIES
+from config import Config
+import logging
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+# Per-line outcomes of calculate_batch, in priority order after 'Valid'
+BATCH_VALIDATION_MESSAGES = [
+    'Valid',
+    'Unknown category',
+    'Activity data is missing',
+    'Activity data cannot be negative',
+    'Activity data cannot be zero',
+    'Emission factor cannot be negative',
+    'Unit cannot be converted'
+]
+
 class GHGCalculator:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
     def calculate_emissions(self, category_id: int, activity_data: float, 
-                          custom_emission_factor: float = None) -> Tuple[float, Dict]:
+                          custom_emission_factor: float = None,
+                          reporting_period: str = None) -> Tuple[float, Dict]:
         """Calculate CO2 equivalent emissions"""
-        if not self.db.connect():
-            return 0.0, {}
-        
-        # Get category details
-        category_query = "SELECT * FROM ghg_categories WHERE id = %s"
-        category_result = self.db.fetch_one(category_query, (category_id,))
-        
-        if not category_result:
-            self.db.disconnect()
+        # Resolve the category from the cached catalogue index
+        category_data = self.db.get_category_index().get(category_id)
+        if category_data is None:
             return 0.0, {}
         
-        category_data = {
-            'id': category_result[0],
-            'scope_number': category_result[1],
-            'scope_name': category_result[2],
-            'category_code': category_result[3],
-            'category_name': category_result[4],
-            'subcategory_code': category_result[5],
-            'subcategory_name': category_result[6],
-            'emission_factor': float(category_result[7]) if category_result[7] else 0.0,
-            'unit': category_result[8],
-            'description': category_result[9]
-        }
-        
-        self.db.disconnect()
-        
-        # Use custom emission factor if provided, otherwise use default
-        emission_factor = custom_emission_factor if custom_emission_factor is not None else category_data['emission_factor']
+        # Use custom emission factor if provided, otherwise the one valid for the period
+        emission_factor = (custom_emission_factor if custom_emission_factor is not None
+                           else self.get_emission_factor(category_id, reporting_period))
         
         # Calculate CO2 equivalent
         co2_equivalent = activity_data * emission_factor
@@ -51,41 +52,269 @@ class GHGCalculator:
         
         return co2_equivalent, calculation_details
     
-    def get_scope_totals(self, company_id: int, reporting_period: str) -> Dict:
-        """Get total emissions by scope for a company and period"""
-        if not self.db.connect():
+    def get_emission_factor(self, category_id: int, reporting_period: str = None) -> Optional[float]:
+        """Factor version valid for the reporting period, else the catalogue factor"""
+        if reporting_period:
+            versioned = self.db.get_factor_versions().factor(category_id, reporting_period)
+            if versioned is not None:
+                return versioned
+        return self.db.get_category_index().factor(category_id)
+    
+    def calculate_batch(self, lines) -> pd.DataFrame:
+        """Calculate CO2 equivalent emissions for many lines at once.
+        
+        ``lines`` is a DataFrame (or a mapping of equal-length arrays) with
+        ``category_id`` and ``activity_data`` columns and an optional
+        ``emission_factor`` column of overrides, NaN meaning the default.
+        All factors and scopes resolve in one vectorized lookup against the
+        cached catalogue index. Returns a copy of ``lines`` with
+        ``emission_factor``, ``factor_source``, ``scope_number``,
+        ``co2_equivalent``, ``valid`` and ``validation`` columns; invalid
+        lines keep their computed values but are flagged.
+        
+        With a ``reporting_period`` column, each line uses the factor version
+        valid for its period where one exists (``factor_source`` 'versioned'),
+        resolved for the whole batch in one interval lookup.
+        
+        With a ``unit`` column, activity data in any compatible unit (gallon,
+        therm, mile, ...) is converted to the category's activity unit first;
+        blank units mean it is already in that unit. The original values go
+        to ``input_activity_data`` and the unit used to ``activity_unit``.
+        """
+        lines = lines.copy() if isinstance(lines, pd.DataFrame) else pd.DataFrame(lines)
+        
+        category_ids = pd.to_numeric(lines['category_id'], errors='coerce')
+        category_ids = category_ids.fillna(-1).to_numpy(dtype=np.int64)
+        activity = pd.to_numeric(lines['activity_data'], errors='coerce').to_numpy(dtype=np.float64)
+        if 'emission_factor' in lines:
+            overrides = pd.to_numeric(lines['emission_factor'], errors='coerce').to_numpy(dtype=np.float64)
+        else:
+            overrides = np.full(len(lines), np.nan)
+        
+        index = self.db.get_category_index()
+        default_factors, scope_numbers, known = index.lookup(category_ids)
+        
+        unconvertible = np.zeros(len(lines), dtype=bool)
+        if 'unit' in lines:
+            # Parse each distinct category unit once, then convert every line
+            unit_codes, category_units = pd.factorize(index.units_for(category_ids))
+            activity_units = np.array([activity_unit(unit) for unit in category_units], dtype=object)
+            activity_units = activity_units[unit_codes] if len(activity_units) else activity_units
+            conversion = unit_registry.factors(lines['unit'].to_numpy(dtype=object), activity_units)
+            unconvertible = known & np.isnan(conversion)
+            lines['input_activity_data'] = activity
+            lines['activity_unit'] = pd.Categorical(activity_units)
+            activity = activity * conversion
+        
+        versioned = np.zeros(len(lines), dtype=bool)
+        if 'reporting_period' in lines:
+            period_factors = self.db.get_factor_versions().factors_for(
+                category_ids, lines['reporting_period'].to_numpy(dtype=object)
+            )
+            versioned = ~np.isnan(period_factors)
+            default_factors = np.where(versioned, period_factors, default_factors)
+        
+        custom = ~np.isnan(overrides)
+        factors = np.where(custom, overrides, default_factors)
+        sources = np.where(custom, 1, np.where(versioned, 2, 0)).astype(np.int8)
+        
+        with np.errstate(invalid='ignore'):
+            codes = np.select(
+                [~known, unconvertible, np.isnan(activity), activity < 0, activity == 0, factors < 0],
+                [1, 6, 2, 3, 4, 5],
+                default=0
+            ).astype(np.int8)
+        
+        lines['category_id'] = category_ids
+        lines['activity_data'] = activity
+        lines['emission_factor'] = factors
+        lines['factor_source'] = pd.Categorical.from_codes(sources, ['default', 'custom', 'versioned'])
+        lines['scope_number'] = scope_numbers
+        lines['co2_equivalent'] = activity * factors
+        lines['valid'] = codes == 0
+        lines['validation'] = pd.Categorical.from_codes(codes, BATCH_VALIDATION_MESSAGES)
+        return lines
+    
+    def calculate_gases(self, lines, gwp_sets: Sequence[str] = (DEFAULT_GWP_SET,)) -> pd.DataFrame:
+        """Gas-level and CO2e results for a batch of lines.
+        
+        Runs ``calculate_batch`` and expands every line into kg of each gas
+        using the category's gas factors; lines with a custom or versioned
+        factor keep it as pre-aggregated CO2e. Adds a ``kg_<gas>`` column per gas and a
+        ``co2e_<set>`` column per GWP set, all from one matrix product.
+        """
+        result = self.calculate_batch(lines)
+        gas_factors, _ = self.db.get_gas_factor_matrix().factors_for(result['category_id'].to_numpy())
+        
+        aggregated = (result['factor_source'] != 'default').to_numpy()
+        gas_factors[aggregated] = 0.0
+        gas_factors[aggregated, CO2E] = result['emission_factor'].to_numpy()[aggregated]
+        
+        gas_kg = gas_emissions(gas_factors, result['activity_data'].to_numpy())
+        co2e = to_co2e(gas_kg, gwp_sets)
+        for gas, column in zip(GASES, gas_kg.T):
+            result[f"kg_{gas}"] = column
+        for gwp_set, column in zip(gwp_sets, co2e.T):
+            result[f"co2e_{gwp_set}"] = column
+        if DEFAULT_GWP_SET in gwp_sets:
+            # Catalogue factors are rounded published values (R-410A is 2088,
+            # its 50/50 gas split 2087.5), so the basis set keeps them as is
+            result[f"co2e_{DEFAULT_GWP_SET}"] = result['co2_equivalent']
+        return result
+    
+    def restate_inventory(self, company_id: int, reporting_period: str,
+                          gwp_sets: Sequence[str] = tuple(GWP_SETS)) -> pd.DataFrame:
+        """Gas-level and CO2e totals per category of an inventory under each GWP set.
+        
+        Under the basis set (``DEFAULT_GWP_SET``) every line keeps its stored
+        CO2e, so restating to it changes nothing.
+        """
+        query = """
+        SELECT category_id, activity_data, emission_factor, co2_equivalent
+        FROM emissions_data
+        WHERE company_id = %s AND reporting_period = %s
+        """
+        with self.db.session() as connected:
+            if not connected:
+                return pd.DataFrame()
+            
+            rows = self.db.fetch_query(query, (company_id, reporting_period))
+            if not rows:
+                return pd.DataFrame()
+            index = self.db.get_category_index()
+            
+            lines = pd.DataFrame(rows, columns=['category_id', 'activity_data', 'emission_factor',
+                                                'stored_co2e'])
+            stored = pd.to_numeric(lines['emission_factor']).to_numpy(dtype=np.float64)
+            # Entries made with the catalogue factor restate gas by gas; entries
+            # made with their own factor can only keep it as CO2e
+            defaults = index.factors_for(lines['category_id'].to_numpy())
+            lines['emission_factor'] = np.where(np.isclose(stored, defaults, rtol=1e-6), np.nan, stored)
+            result = self.calculate_gases(lines, gwp_sets)
+            if DEFAULT_GWP_SET in gwp_sets:
+                result[f"co2e_{DEFAULT_GWP_SET}"] = pd.to_numeric(result['stored_co2e']).to_numpy(dtype=np.float64)
+        
+        columns = [f"kg_{gas}" for gas in GASES] + [f"co2e_{gwp_set}" for gwp_set in gwp_sets]
+        return result.groupby(['scope_number', 'category_id'])[columns].sum().reset_index()
+    
+    def estimate_uncertainty(self, company_id: int, reporting_period: str, seed: int = None) -> Dict:
+        """Monte Carlo p5/p50/p95 CO2e of an inventory, in total, per scope and per category"""
+        return self.estimate_uncertainty_many([company_id], reporting_period, seed).get(company_id, {})
+    
+    def estimate_uncertainty_many(self, company_ids: Sequence[int], reporting_period: str,
+                                  seed: int = None) -> Dict[int, Dict]:
+        """``estimate_uncertainty`` for many companies, simulated in a process pool"""
+        if not company_ids:
             return {}
+        query = f"""
+        SELECT company_id, category_id, activity_data, emission_factor
+        FROM emissions_data
+        WHERE reporting_period = %s AND company_id IN ({', '.join(['%s'] * len(company_ids))})
+        """
+        with self.db.session() as connected:
+            if not connected:
+                return {}
+            
+            rows = self.db.fetch_query(query, (reporting_period,) + tuple(company_ids))
+            if not rows:
+                return {}
+            # Stored factors are the ones each entry was calculated with
+            lines = self.calculate_batch(pd.DataFrame(
+                rows, columns=['company_id', 'category_id', 'activity_data', 'emission_factor']
+            ))
         
-        summary = self.db.get_emissions_summary(company_id, reporting_period)
-        self.db.disconnect()
+        simulation = MonteCarloSimulation(seed=seed, **Config().uncertainty_config)
+        return simulation.run_many({
+            int(company_id): company_lines for company_id, company_lines in lines.groupby('company_id')
+        })
+    
+    def calculate_spend_based(self, company_id: int, reporting_period: str) -> Dict:
+        """Scope 3 category 1 and 2 emissions from the imported ledger and EEIO sectors.
         
-        return summary
+        Returns spend and kg CO2e per category, the unmapped spend and
+        accounts, and the per-sector breakdown.
+        """
+        model = self.db.get_eeio_model(company_id)
+        spend = self.db.get_ledger_spend(company_id, reporting_period)
+        accounts = [row[0] for row in spend]
+        amounts = [row[1] for row in spend]
+        totals = model.totals(accounts, amounts)
+        totals['sectors'] = model.sector_breakdown(accounts, amounts)
+        return totals
     
-    def get_category_breakdown(self, company_id: int, reporting_period: str) -> List[Dict]:
-        """Get detailed breakdown by category"""
-        if not self.db.connect():
+    def record_spend_based(self, company_id: int, reporting_period: str, user_id: int) -> List[int]:
+        """Record the spend-based category totals as emission entries (once per period)"""
+        index = self.db.get_category_index()
+        categories = {code: index.by_subcategory_code(SPEND_SUBCATEGORIES[code]) for code in SPEND_CATEGORIES}
+        missing = [SPEND_SUBCATEGORIES[code] for code, category in categories.items() if category is None]
+        if missing:
+            logger.error(f"Spend-based subcategories missing from the catalogue: {', '.join(missing)}")
             return []
         
+        category_ids = [category['id'] for category in categories.values()]
+        with self.db.session() as connected:
+            if not connected:
+                return []
+            
+            existing = self.db.fetch_one(f"""
+            SELECT COUNT(*) FROM emissions_data
+            WHERE company_id = %s AND reporting_period = %s AND category_id IN ({', '.join(['%s'] * len(category_ids))})
+            """, (company_id, reporting_period) + tuple(category_ids))
+            if existing and existing[0]:
+                logger.error(f"Spend-based emissions already recorded for company {company_id}, {reporting_period}")
+                return []
+            
+            totals = self.calculate_spend_based(company_id, reporting_period)
+            records = [
+                {
+                    'company_id': company_id,
+                    'user_id': user_id,
+                    'category_id': categories[code]['id'],
+                    'reporting_period': reporting_period,
+                    'activity_data': values['spend'],
+                    'emission_factor': values['co2e'] / values['spend'],
+                    'data_source': 'General ledger',
+                    'calculation_method': 'Spend × EEIO sector intensity',
+                    'notes': f"Average intensity of {SPEND_SUBCATEGORIES[code]} ledger spend"
+                }
+                for code, values in totals['categories'].items() if values['spend'] > 0
+            ]
+            return self.db.add_emission_data_bulk(records) if records else []
+    
+    def get_scope_totals(self, company_id: int, reporting_period: str) -> Dict:
+        """Get total emissions by scope for a company and period"""
+        with self.db.session() as connected:
+            if not connected:
+                return {}
+            
+            return self.db.get_emissions_summary(company_id, reporting_period)
+    
+    def get_category_breakdown(self, company_id: int, reporting_period: str) -> List[Dict]:
+        """Get detailed breakdown by category"""
+        # One rollup row per category, instead of aggregating every entry
         query = """
         SELECT 
             c.scope_number,
             c.scope_name,
             c.category_name,
             c.subcategory_name,
-            SUM(e.activity_data) as total_activity,
-            AVG(e.emission_factor) as avg_emission_factor,
-            SUM(e.co2_equivalent) as total_emissions,
+            r.total_activity,
+            r.total_emission_factor / r.entry_count as avg_emission_factor,
+            r.total_co2e,
             c.unit,
-            COUNT(e.id) as entry_count
-        FROM emissions_data e
-        JOIN ghg_categories c ON e.category_id = c.id
-        WHERE e.company_id = %s AND e.reporting_period = %s
-        GROUP BY c.id, c.scope_number, c.scope_name, c.category_name, c.subcategory_name, c.unit
+            r.entry_count,
+            r.category_id
+        FROM emissions_rollup r
+        JOIN ghg_categories c ON r.category_id = c.id
+        WHERE r.company_id = %s AND r.reporting_period = %s AND r.entry_count > 0
         ORDER BY c.scope_number, c.category_name, c.subcategory_name
         """
         
-        results = self.db.fetch_query(query, (company_id, reporting_period))
-        self.db.disconnect()
+        with self.db.session() as connected:
+            if not connected:
+                return []
+            
+            results = self.db.fetch_query(query, (company_id, reporting_period))
         
         breakdown = []
         for row in results:
@@ -98,7 +327,8 @@ class GHGCalculator:
                 'avg_emission_factor': float(row[5]),
                 'total_emissions': float(row[6]),
                 'unit': row[7],
-                'entry_count': row[8]
+                'entry_count': row[8],
+                'category_id': row[9]
             })
         
         return breakdown
@@ -116,13 +346,7 @@ class GHGCalculator:
     
     def get_emission_factors_by_scope(self, scope: int) -> List[Dict]:
         """Get all emission factors for a specific scope"""
-        if not self.db.connect():
-            return []
-        
-        categories = self.db.get_ghg_categories(scope)
-        self.db.disconnect()
-        
-        return categories
+        return self.db.get_ghg_categories(scope)
     
     def calculate_percentage_by_scope(self, emissions_summary: Dict) -> Dict:
         """Calculate percentage contribution by scope"""
@@ -146,35 +370,27 @@ def create_emissions_input_form(db_manager: DatabaseManager, calculator: GHGCalc
     # Add a button to refresh categories if needed
     if st.button("🔄 Refresh Categories", help="Click if categories don't appear correctly"):
         st.cache_data.clear()
+        db_manager.invalidate_category_cache()
         st.rerun()
     
     # Get categories for selection
-    if db_manager.connect():
-        all_categories = db_manager.get_ghg_categories()
-        db_manager.disconnect()
-        
-        # Debug: Show what we actually got from database (simplified)
-        if len(all_categories) > 0:
-            st.info(f"📊 Database contains {len(all_categories)} total emission categories")
-        else:
-            st.error("No categories found in database")
+    with db_manager.session() as connected:
+        if not connected:
+            st.error("Database connection failed")
+            return
         
+        category_index = db_manager.get_category_index()
+    
+    # Debug: Show what we actually got from database (simplified)
+    if len(category_index) > 0:
+        st.info(f"📊 Database contains {len(category_index)} total emission categories")
     else:
-        st.error("Database connection failed")
-        return
+        st.error("No categories found in database")
     
-    if not all_categories:
+    if not len(category_index):
         st.error("No GHG categories found. Please contact your administrator.")
         return
     
-    # Organize categories by scope
-    scope_categories = {}
-    for cat in all_categories:
-        scope_key = f"Scope {cat['scope_number']}"
-        if scope_key not in scope_categories:
-            scope_categories[scope_key] = []
-        scope_categories[scope_key].append(cat)
-    
     # Create two columns for layout
     col1, col2 = st.columns(2)
     
@@ -189,61 +405,58 @@ def create_emissions_input_form(db_manager: DatabaseManager, calculator: GHGCalc
         )
         
         # Show available scopes
-        scope_options = list(scope_categories.keys())
-        selected_scope = st.selectbox("Select Scope", scope_options)
+        selected_scope = st.selectbox(
+            "Select Scope",
+            category_index.scopes(),
+            format_func=lambda scope: f"Scope {scope}"
+        )
+        scope_categories = category_index.by_scope(selected_scope)
         
-        # Show category count for selected scope
-        if selected_scope in scope_categories:
-            st.info(f"� {len(scope_categories[selected_scope])} categories available in {selected_scope}")
-            
-            # Create category options for the selected scope
-            category_options = []
-            category_ids = []
+        if scope_categories:
+            st.info(f"📋 {len(scope_categories)} categories available in Scope {selected_scope}")
             
-            for cat in scope_categories[selected_scope]:
-                display_name = f"{cat['category_name']} - {cat['subcategory_name']}"
-                category_options.append(display_name)
-                category_ids.append(cat['id'])
+            # Options are category ids, so the selection resolves without a search
+            selected_category_id = st.selectbox(
+                "Select Category",
+                [cat['id'] for cat in scope_categories],
+                format_func=lambda category_id: (
+                    f"{category_index.get(category_id)['category_name']} - "
+                    f"{category_index.get(category_id)['subcategory_name']}"
+                ),
+                key=f"cat_sel_Scope_{selected_scope}",
+                help=f"Choose from {len(scope_categories)} available categories",
+                label_visibility="visible"
+            )
+            selected_category = category_index.get(selected_category_id)
             
-            if category_options:
-                # Show available categories count
-                if len(category_options) != len(scope_categories[selected_scope]):
-                    st.warning(f"⚠️ Showing {len(category_options)} of {len(scope_categories[selected_scope])} categories")
-                
-                # Use a simpler key structure to avoid JS conflicts
-                category_selectbox_key = f"cat_sel_{selected_scope.replace(' ', '_').replace('-', '_')}"
-                
-                selected_category_display = st.selectbox(
-                    "Select Category",
-                    category_options,
-                    key=category_selectbox_key,
-                    help=f"Choose from {len(category_options)} available categories",
-                    label_visibility="visible"
-                )
-                
-                # Find the selected category ID
-                selected_index = category_options.index(selected_category_display)
-                selected_category_id = category_ids[selected_index]
-                selected_category = next((cat for cat in all_categories if cat['id'] == selected_category_id), None)
-                
-                if selected_category:
-                    st.success(f"✅ Selected: {selected_category['subcategory_name']}")
-            else:
-                st.warning(f"No categories available for {selected_scope}")
+            if selected_category:
+                st.success(f"✅ Selected: {selected_category['subcategory_name']}")
         else:
-            st.error("Invalid scope selection")
+            st.warning(f"No categories available for Scope {selected_scope}")
     
     with col2:
         if selected_category:
+            # Offer every unit that converts to the category's activity unit
+            category_unit = activity_unit(selected_category['unit'])
+            input_units = [category_unit] + [
+                unit for unit in unit_registry.compatible_units(category_unit) if unit != category_unit
+            ] if category_unit else []
+            input_unit = st.selectbox(
+                "Input Unit", input_units, key=f"unit_sel_{selected_category_id}"
+            ) if len(input_units) > 1 else category_unit
+            
             activity_data = st.number_input(
-                f"Activity Data ({selected_category['unit']})",
+                f"Activity Data ({input_unit or selected_category['unit']})",
                 min_value=0.0,
                 step=0.01,
                 format="%.4f"
             )
+            if input_unit != category_unit:
+                activity_data *= unit_registry.factor(input_unit, category_unit)
+                st.caption(f"= {activity_data:.4f} {category_unit}")
             
-            # Show default emission factor but allow override
-            default_ef = selected_category['emission_factor']
+            # Show the factor valid for the period but allow override
+            default_ef = calculator.get_emission_factor(selected_category_id, reporting_period)
             st.info(f"Default Emission Factor: {default_ef} kg CO2e/{selected_category['unit']}")
             
             use_custom_ef = st.checkbox("Use Custom Emission Factor")
@@ -278,7 +491,7 @@ def create_emissions_input_form(db_manager: DatabaseManager, calculator: GHGCalc
             # Calculate emissions
             custom_ef = emission_factor if use_custom_ef else None
             co2_equivalent, calc_details = calculator.calculate_emissions(
-                selected_category_id, activity_data, custom_ef
+                selected_category_id, activity_data, custom_ef, reporting_period
             )
             
             # Display calculation results
@@ -296,7 +509,11 @@ def create_emissions_input_form(db_manager: DatabaseManager, calculator: GHGCalc
                 st.write(f"**Method:** {calc_details['calculation_method']}")
             
             # Save to database
-            if db_manager.connect():
+            with db_manager.session() as connected:
+                if not connected:
+                    st.error("❌ Database connection failed")
+                    return
+                
                 success = db_manager.add_emission_data(
                     company_id=user_data['company_id'],
                     user_id=user_data['id'],
@@ -308,12 +525,9 @@ def create_emissions_input_form(db_manager: DatabaseManager, calculator: GHGCalc
                     calculation_method=calculation_method,
                     notes=notes
                 )
-                db_manager.disconnect()
-                
-                if success:
-                    st.success("✅ Emission data saved successfully!")
-                    st.balloons()
-                else:
-                    st.error("❌ Failed to save emission data")
+            
+            if success:
+                st.success("✅ Emission data saved successfully!")
+                st.balloons()
             else:
-                st.error("❌ Database connection failed")
+                st.error("❌ Failed to save emission data")
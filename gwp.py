@@ -0,0 +1,100 @@
+import logging
+from typing import Iterable, Sequence, Tuple
+
+import numpy as np
+
+from category_catalog import CategoryIndex
+
+logger = logging.getLogger(__name__)
+
+# Gas columns of every factor and GWP matrix. 'CO2e' holds factors that are
+# only known pre-aggregated; it has a GWP of 1 in every set, so those
+# categories keep their CO2e value when an inventory is restated.
+GASES = ['CO2', 'CH4', 'N2O', 'HFC-32', 'HFC-125', 'HFC-134a', 'HFC-143a', 'SF6', 'CO2e']
+GAS_INDEX = {gas: position for position, gas in enumerate(GASES)}
+CO2E = GAS_INDEX['CO2e']
+
+# 100-year GWPs from the IPCC Fourth, Fifth and Sixth Assessment Reports
+# (AR6 CH4 without the fossil/non-fossil split)
+GWP_SETS = ['AR4', 'AR5', 'AR6']
+GWP_MATRIX = np.array([
+    #  CO2  CH4    N2O    HFC-32  HFC-125  HFC-134a  HFC-143a  SF6      CO2e
+    [1.0, 25.0, 298.0, 675.0, 3500.0, 1430.0, 4470.0, 22800.0, 1.0],  # AR4
+    [1.0, 28.0, 265.0, 677.0, 3170.0, 1300.0, 4800.0, 23500.0, 1.0],  # AR5
+    [1.0, 27.9, 273.0, 771.0, 3740.0, 1530.0, 5810.0, 25200.0, 1.0],  # AR6
+], dtype=np.float64)
+
+# ghg_categories.emission_factor values were derived with AR4 GWPs
+DEFAULT_GWP_SET = 'AR4'
+
+CATEGORY_GAS_FACTORS_DDL = """
+CREATE TABLE IF NOT EXISTS category_gas_factors (
+    category_id INT NOT NULL,
+    gas VARCHAR(20) NOT NULL,
+    factor DECIMAL(20,10) NOT NULL,
+    PRIMARY KEY (category_id, gas),
+    FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+CATEGORY_GAS_FACTORS_QUERY = "SELECT category_id, gas, factor FROM category_gas_factors"
+
+
+def gwp_rows(gwp_sets: Sequence[str]) -> np.ndarray:
+    """GWP matrix rows for the given sets, shape (len(gwp_sets), len(GASES))"""
+    unknown = [gwp_set for gwp_set in gwp_sets if gwp_set not in GWP_SETS]
+    if unknown:
+        raise ValueError(f"Unknown GWP set(s): {', '.join(unknown)}")
+    return GWP_MATRIX[[GWP_SETS.index(gwp_set) for gwp_set in gwp_sets]]
+
+
+class GasFactorMatrix:
+    """Per-gas factors (kg gas per activity unit) for every active category.
+
+    Rows are aligned with ``index.ids``. Categories without rows in
+    ``category_gas_factors`` get their pre-aggregated factor in the CO2e
+    column, so every row times the default GWP set gives the catalogue's
+    CO2e factor, up to the rounding of published blend values (R-410A).
+    """
+
+    def __init__(self, index: CategoryIndex, gas_rows: Iterable[Tuple[int, str, float]] = ()):
+        self.ids = index.ids
+        self.matrix = np.zeros((len(self.ids), len(GASES)), dtype=np.float64)
+        self.matrix[:, CO2E] = index.factors
+
+        split = set()
+        for category_id, gas, factor in gas_rows:
+            position = np.searchsorted(self.ids, category_id)
+            if position >= len(self.ids) or self.ids[position] != category_id:
+                continue  # inactive category
+            if gas not in GAS_INDEX:
+                logger.error(f"Ignoring unknown gas {gas!r} for category {category_id}")
+                continue
+            if position not in split:
+                self.matrix[position, CO2E] = 0.0
+                split.add(position)
+            self.matrix[position, GAS_INDEX[gas]] = float(factor)
+        self.split_categories = len(split)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def factors_for(self, category_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """Gas factor rows for an array of category ids (zeros where unknown) and a found mask"""
+        category_ids = np.asarray(category_ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.zeros(category_ids.shape + (len(GASES),)), np.zeros(category_ids.shape, dtype=bool)
+        positions = np.minimum(np.searchsorted(self.ids, category_ids), len(self.ids) - 1)
+        found = self.ids[positions] == category_ids
+        return np.where(found[:, None], self.matrix[positions], 0.0), found
+
+
+def gas_emissions(factor_rows: np.ndarray, activity: np.ndarray) -> np.ndarray:
+    """kg of each gas per line: activity scaled gas factor rows, shape (lines, gases)"""
+    return factor_rows * np.asarray(activity, dtype=np.float64)[:, None]
+
+
+def to_co2e(gas_kg: np.ndarray, gwp_sets: Sequence[str] = (DEFAULT_GWP_SET,)) -> np.ndarray:
+    """CO2e per line under each GWP set with one matrix product, shape (lines, sets)"""
+    return gas_kg @ gwp_rows(gwp_sets).T
+
@@ -14,7 +14,7 @@ config = Config()
 from database_operations import DatabaseManager
 from authentication import AuthenticationManager, create_login_form, create_registration_form
 from ghg_calculator import GHGCalculator, create_emissions_input_form
-from data_visualization import DataVisualization, create_dashboard
+from data_visualization import DataVisualization, create_dashboard, figure_cache
 
 # Setup logging
 logging.basicConfig(
@@ -107,13 +107,12 @@ def create_sidebar_navigation(auth_manager: AuthenticationManager):
         if user['company_id']:
             with st.sidebar.expander("📈 Quick Stats", expanded=False):
                 try:
-                    db_manager = DatabaseManager()
-                    if db_manager.connect():
-                        summary = db_manager.get_emissions_summary(
+                    with auth_manager.db.session() as connected:
+                        summary = auth_manager.db.get_emissions_summary(
                             user['company_id'], "2024"
-                        )
-                        db_manager.disconnect()
-                        
+                        ) if connected else None
+                    
+                    if summary is not None:
                         if summary['total'] > 0:
                             st.metric("Total 2024 Emissions", f"{summary['total']:.2f} kg CO2e")
                             st.metric("Scope 1", f"{summary['scope_1']:.2f} kg CO2e")
@@ -134,6 +133,78 @@ def create_sidebar_navigation(auth_manager: AuthenticationManager):
         st.sidebar.info("Please login to access the application")
         return "Login"
 
+def create_view_data_page(db_manager: DatabaseManager, user: dict):
+    """Emissions data browser with keyset pagination"""
+    st.title("📋 Emissions Data")
+    
+    # Enhanced filters
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        periods = ["All", "2024", "2023", "2022", "Q4-2024", "Q3-2024", "Q2-2024", "Q1-2024"]
+        selected_period = st.selectbox("📅 Reporting Period", periods)
+        period_filter = None if selected_period == "All" else selected_period
+    
+    with col2:
+        scopes = ["All", "Scope 1", "Scope 2", "Scope 3"]
+        selected_scope = st.selectbox("🎯 Scope Filter", scopes)
+        scope_filter = None if selected_scope == "All" else int(selected_scope.split()[1])
+    
+    with col3:
+        page_size = st.selectbox("📄 Items per page", [10, 25, 50, 100])
+    
+    company_id = user['company_id'] if user['role'] != 'admin' else None
+    filters = {'company_id': company_id, 'reporting_period': period_filter, 'scope_number': scope_filter}
+    
+    # Start from the first page whenever the filters change
+    filter_key = (company_id, period_filter, scope_filter, page_size)
+    if st.session_state.get('view_data_filter_key') != filter_key:
+        st.session_state.view_data_filter_key = filter_key
+        st.session_state.view_data_cursor = None
+        st.session_state.view_data_direction = 'next'
+        st.session_state.view_data_page_number = 1
+        st.session_state.view_data_total = None
+    
+    # Get and display data
+    with db_manager.session() as connected:
+        if not connected:
+            st.error("❌ Database connection failed")
+            return
+        
+        page = db_manager.get_emissions_page(
+            page_size=page_size,
+            cursor=st.session_state.view_data_cursor,
+            direction=st.session_state.view_data_direction,
+            **filters
+        )
+        
+        # The total only changes with the filters, so count once per filter set
+        if st.session_state.view_data_total is None:
+            st.session_state.view_data_total = db_manager.count_emissions_data(**filters)
+    
+    total = st.session_state.view_data_total
+    page_number = st.session_state.view_data_page_number
+    page_count = max((total + page_size - 1) // page_size, 1)
+    
+    viz = DataVisualization(db_manager)
+    viz.display_data_table(
+        page['rows'], f"Emissions Data (page {page_number} of {page_count}, {total} records)",
+        export_filters=filters
+    )
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Newer", disabled=page['prev_cursor'] is None):
+            st.session_state.view_data_cursor = page['prev_cursor']
+            st.session_state.view_data_direction = 'prev'
+            st.session_state.view_data_page_number = max(page_number - 1, 1)
+            st.rerun()
+    with col3:
+        if st.button("Older →", disabled=page['next_cursor'] is None):
+            st.session_state.view_data_cursor = page['next_cursor']
+            st.session_state.view_data_direction = 'next'
+            st.session_state.view_data_page_number = page_number + 1
+            st.rerun()
+
 def create_company_management_page(db_manager: DatabaseManager, user_data: dict):
     """Enhanced company management page"""
     st.title("🏢 Company Management")
@@ -147,10 +218,10 @@ def create_company_management_page(db_manager: DatabaseManager, user_data: dict)
     
     with tab1:
         st.subheader("Companies Pending Verification")
-        if db_manager.connect():
-            pending_companies = db_manager.get_companies(verification_status='pending')
-            db_manager.disconnect()
-            
+        with db_manager.session() as connected:
+            pending_companies = db_manager.get_companies(verification_status='pending') if connected else None
+        
+        if pending_companies is not None:
             if pending_companies:
                 for company in pending_companies:
                     with st.expander(f"🏢 {company['company_name']} ({company['company_code']})"):
@@ -166,22 +237,20 @@ def create_company_management_page(db_manager: DatabaseManager, user_data: dict)
                         col1, col2, col3 = st.columns(3)
                         with col1:
                             if st.button(f"✅ Verify", key=f"verify_{company['id']}", type="primary"):
-                                if db_manager.connect():
-                                    if db_manager.verify_company(company['id'], user_data['id'], 'verified'):
+                                with db_manager.session() as connected:
+                                    if connected and db_manager.verify_company(company['id'], user_data['id'], 'verified'):
                                         st.success("Company verified successfully!")
                                         st.rerun()
                                     else:
                                         st.error("Failed to verify company")
-                                    db_manager.disconnect()
                         with col2:
                             if st.button(f"❌ Reject", key=f"reject_{company['id']}", type="secondary"):
-                                if db_manager.connect():
-                                    if db_manager.verify_company(company['id'], user_data['id'], 'rejected'):
+                                with db_manager.session() as connected:
+                                    if connected and db_manager.verify_company(company['id'], user_data['id'], 'rejected'):
                                         st.success("Company rejected!")
                                         st.rerun()
                                     else:
                                         st.error("Failed to reject company")
-                                    db_manager.disconnect()
                         with col3:
                             if st.button(f"📧 Contact", key=f"contact_{company['id']}", type="secondary"):
                                 st.info(f"Contact: {company['contact_email'] or 'No email provided'}")
@@ -190,10 +259,10 @@ def create_company_management_page(db_manager: DatabaseManager, user_data: dict)
     
     with tab2:
         st.subheader("Verified Companies")
-        if db_manager.connect():
-            verified_companies = db_manager.get_companies(verification_status='verified')
-            db_manager.disconnect()
-            
+        with db_manager.session() as connected:
+            verified_companies = db_manager.get_companies(verification_status='verified') if connected else None
+        
+        if verified_companies is not None:
             if verified_companies:
                 # Search functionality
                 search_term = st.text_input("🔍 Search companies...")
@@ -239,21 +308,20 @@ def create_company_management_page(db_manager: DatabaseManager, user_data: dict)
             
             if st.form_submit_button("➕ Add Company", type="primary"):
                 if company_name and company_code:
-                    if db_manager.connect():
-                        success = db_manager.create_company(
-                            company_name, company_code, industry_sector, 
-                            address, contact_email, contact_phone, user_data['id']
-                        )
-                        
-                        if success and auto_verify:
-                            # Get the company ID and verify it
-                            companies = db_manager.get_companies()
-                            new_company = next((c for c in companies if c['company_code'] == company_code), None)
-                            if new_company:
-                                db_manager.verify_company(new_company['id'], user_data['id'], 'verified')
-                        
-                        db_manager.disconnect()
-                        
+                    with db_manager.session() as connected:
+                        if connected:
+                            success = db_manager.create_company(
+                                company_name, company_code, industry_sector, 
+                                address, contact_email, contact_phone, user_data['id']
+                            )
+                            
+                            if success and auto_verify:
+                                # Get the company ID and verify it
+                                new_company = db_manager.get_company_by_code(company_code)
+                                if new_company:
+                                    db_manager.verify_company(new_company['id'], user_data['id'], 'verified')
+                    
+                    if connected:
                         if success:
                             st.success("✅ Company added successfully!")
                             if auto_verify:
@@ -267,10 +335,10 @@ def create_company_management_page(db_manager: DatabaseManager, user_data: dict)
     
     with tab4:
         st.subheader("Company Statistics")
-        if db_manager.connect():
-            all_companies = db_manager.get_companies()
-            db_manager.disconnect()
-            
+        with db_manager.session() as connected:
+            all_companies = db_manager.get_companies() if connected else None
+        
+        if all_companies is not None:
             if all_companies:
                 # Statistics
                 total_companies = len(all_companies)
@@ -312,10 +380,10 @@ def create_user_management_page(db_manager: DatabaseManager):
     
     with tab1:
         st.subheader("All Users")
-        if db_manager.connect():
-            users = db_manager.get_users()
-            db_manager.disconnect()
-            
+        with db_manager.session() as connected:
+            users = db_manager.get_users() if connected else None
+        
+        if users is not None:
             if users:
                 # Search and filter
                 col1, col2 = st.columns(2)
@@ -358,10 +426,10 @@ def create_user_management_page(db_manager: DatabaseManager):
     
     with tab3:
         st.subheader("User Statistics")
-        if db_manager.connect():
-            users = db_manager.get_users()
-            db_manager.disconnect()
-            
+        with db_manager.session() as connected:
+            users = db_manager.get_users() if connected else None
+        
+        if users is not None:
             if users:
                 # Role distribution
                 role_counts = {}
@@ -385,7 +453,7 @@ def create_user_management_page(db_manager: DatabaseManager):
                 fig = px.bar(df, x='Role', y='Count', title="User Distribution by Role")
                 st.plotly_chart(fig, use_container_width=True)
 
-def create_system_settings_page():
+def create_system_settings_page(db_manager: DatabaseManager):
     """System settings page (admin only)"""
     st.title("⚙️ System Settings")
     
@@ -412,7 +480,6 @@ def create_system_settings_page():
         
         if st.button("🔍 Run Health Check", type="primary"):
             with st.spinner("Running health check..."):
-                db_manager = DatabaseManager()
                 health_status = db_manager.health_check()
                 
                 if health_status['status'] == 'healthy':
@@ -421,6 +488,29 @@ def create_system_settings_page():
                 else:
                     st.error("❌ System health issues detected")
                     st.json(health_status)
+        
+        st.subheader("Connection Pool")
+        pool_stats = db_manager.pool_stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("In Use", pool_stats['in_use'])
+        with col2:
+            st.metric("Idle", pool_stats['idle'])
+        with col3:
+            st.metric("Avg Wait", f"{pool_stats['avg_wait_ms']:.1f} ms")
+        with col4:
+            st.metric("Avg Borrow", f"{pool_stats['avg_borrow_ms']:.1f} ms")
+        st.caption(
+            f"Size {pool_stats['pool_size']} + {pool_stats['max_overflow']} overflow · "
+            f"{pool_stats['waiting']} waiting · {pool_stats['timeouts']} timeouts · "
+            f"{pool_stats['borrows']} borrows · circuit {pool_stats['circuit_state']}"
+        )
+        
+        cache_stats = db_manager.summary_cache_stats()
+        cache_backend = cache_stats.get('backend', {}).get('backend', 'local')
+        st.caption(f"Summary cache ({cache_backend}): hit ratio {cache_stats['hit_ratio']:.0%}")
+        figure_stats = figure_cache.stats()
+        st.caption(f"Chart cache: {figure_stats['size']} figures, hit ratio {figure_stats['hit_ratio']:.0%}")
     
     with tab3:
         st.subheader("Audit Trail")
@@ -442,98 +532,68 @@ def main():
         auth_manager = AuthenticationManager(db_manager)
         calculator = GHGCalculator(db_manager)
         
-        # Navigation
-        selected_page = create_sidebar_navigation(auth_manager)
+        # Borrow one connection for the whole rerun; page code reuses it
+        with db_manager.session():
+            # Navigation
+            selected_page = create_sidebar_navigation(auth_manager)
         
-        # Page routing with error handling
-        try:
-            if selected_page == "Login":
-                st.title("🌱 GHG Emission Calculator")
-                st.markdown("### Greenhouse Gas Emission Tracking and Reporting System")
-                st.markdown("---")
+            # Page routing with error handling
+            try:
+                if selected_page == "Login":
+                    st.title("🌱 GHG Emission Calculator")
+                    st.markdown("### Greenhouse Gas Emission Tracking and Reporting System")
+                    st.markdown("---")
                 
-                col1, col2 = st.columns([2, 1])
-                with col1:
-                    st.markdown("""
-                    **Features:**
-                    - ✅ Complete GHG Protocol compliance (Scope 1, 2, 3)
-                    - ✅ UK emission factors database
-                    - ✅ Role-based access control
-                    - ✅ Company verification system
-                    - ✅ Interactive data visualization
-                    - ✅ Comprehensive reporting
-                    """)
+                    col1, col2 = st.columns([2, 1])
+                    with col1:
+                        st.markdown("""
+                        **Features:**
+                        - ✅ Complete GHG Protocol compliance (Scope 1, 2, 3)
+                        - ✅ UK emission factors database
+                        - ✅ Role-based access control
+                        - ✅ Company verification system
+                        - ✅ Interactive data visualization
+                        - ✅ Comprehensive reporting
+                        """)
                 
-                with col2:
-                    tab1, tab2 = st.tabs(["🔐 Login", "📝 Register"])
-                    with tab1:
-                        create_login_form(auth_manager)
-                    with tab2:
-                        create_registration_form(db_manager)
+                    with col2:
+                        tab1, tab2 = st.tabs(["🔐 Login", "📝 Register"])
+                        with tab1:
+                            create_login_form(auth_manager)
+                        with tab2:
+                            create_registration_form(db_manager)
             
-            elif selected_page == "Dashboard":
-                auth_manager.require_authentication()
-                create_dashboard(db_manager, auth_manager.get_current_user())
+                elif selected_page == "Dashboard":
+                    auth_manager.require_authentication()
+                    create_dashboard(db_manager, auth_manager.get_current_user())
             
-            elif selected_page == "Add Emissions":
-                auth_manager.require_company_verification()
-                create_emissions_input_form(db_manager, calculator, auth_manager.get_current_user())
+                elif selected_page == "Add Emissions":
+                    auth_manager.require_company_verification()
+                    create_emissions_input_form(db_manager, calculator, auth_manager.get_current_user())
             
-            elif selected_page == "View Data":
-                auth_manager.require_authentication()
-                user = auth_manager.get_current_user()
-                
-                st.title("📋 Emissions Data")
-                
-                # Enhanced filters
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    periods = ["All", "2024", "2023", "2022", "Q4-2024", "Q3-2024", "Q2-2024", "Q1-2024"]
-                    selected_period = st.selectbox("📅 Reporting Period", periods)
-                    period_filter = None if selected_period == "All" else selected_period
-                
-                with col2:
-                    scopes = ["All", "Scope 1", "Scope 2", "Scope 3"]
-                    selected_scope = st.selectbox("🎯 Scope Filter", scopes)
-                
-                with col3:
-                    page_size = st.selectbox("📄 Items per page", [10, 25, 50, 100])
+                elif selected_page == "View Data":
+                    auth_manager.require_authentication()
+                    user = auth_manager.get_current_user()
                 
-                # Get and display data
-                if db_manager.connect():
-                    company_id = user['company_id'] if user['role'] != 'admin' else None
-                    emissions_data = db_manager.get_emissions_data(
-                        company_id, period_filter, limit=page_size
-                    )
-                    db_manager.disconnect()
-                    
-                    # Filter by scope if selected
-                    if selected_scope != "All":
-                        scope_num = int(selected_scope.split()[1])
-                        emissions_data = [e for e in emissions_data if e['scope_number'] == scope_num]
-                    
-                    viz = DataVisualization(db_manager)
-                    viz.display_data_table(emissions_data, f"Emissions Data ({len(emissions_data)} records)")
-                else:
-                    st.error("❌ Database connection failed")
+                    create_view_data_page(db_manager, user)
             
-            elif selected_page == "Company Management":
-                auth_manager.require_role('manager')
-                create_company_management_page(db_manager, auth_manager.get_current_user())
+                elif selected_page == "Company Management":
+                    auth_manager.require_role('manager')
+                    create_company_management_page(db_manager, auth_manager.get_current_user())
             
-            elif selected_page == "User Management":
-                auth_manager.require_role('admin')
-                create_user_management_page(db_manager)
+                elif selected_page == "User Management":
+                    auth_manager.require_role('admin')
+                    create_user_management_page(db_manager)
             
-            elif selected_page == "System Settings":
-                auth_manager.require_role('admin')
-                create_system_settings_page()
+                elif selected_page == "System Settings":
+                    auth_manager.require_role('admin')
+                    create_system_settings_page(db_manager)
             
-        except Exception as page_error:
-            logger.error(f"Page error: {page_error}")
-            st.error("An error occurred while loading the page. Please try again.")
-            if not config.is_production:
-                st.exception(page_error)
+            except Exception as page_error:
+                logger.error(f"Page error: {page_error}")
+                st.error("An error occurred while loading the page. Please try again.")
+                if not config.is_production:
+                    st.exception(page_error)
     
     except Exception as app_error:
         logger.error(f"Application error: {app_error}")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Bulk recalculation of stored emissions after an emission factor correction.
+
+Rows of one category entered with the old factor (optionally limited to
+reporting periods) get the new factor and a recomputed
+co2_equivalent. Work is done in chunks of consecutive primary keys, each in
+its own short transaction that also adjusts emissions_rollup and writes one
+summarised audit_trail row. A dry run reports the same chunks without
+writing anything:
+
+    python recalculation.py --category 12 --factor 0.18293 --old-factor 0.18385 --period 2024 --dry-run
+
+Rewriting every row whose factor differs, including rows entered with a
+custom factor, needs an explicit --all-factors instead of --old-factor.
+"""
+
+import argparse
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# {filter} narrows emissions_data to the affected rows; every statement
+# binds the new factor first (where used), then the filter parameters
+_NEW_FACTOR = "ROUND(%s, 6)"
+_NEW_CO2E = "ROUND(e.activity_data * ROUND(%s, 6), 4)"
+
+_CHUNK_BOUNDS = """
+SELECT COUNT(*), MAX(id) FROM (
+    SELECT e.id FROM emissions_data e
+    WHERE {filter} AND e.id > %s
+    ORDER BY e.id
+    LIMIT %s
+) chunk
+"""
+
+_CHUNK_TOTALS = f"""
+SELECT COUNT(*), COALESCE(SUM(e.co2_equivalent), 0), COALESCE(SUM({_NEW_CO2E}), 0)
+FROM emissions_data e
+WHERE {{filter}} AND e.id > %s AND e.id <= %s
+"""
+
+_CHUNK_SAMPLE = f"""
+SELECT e.id, e.company_id, e.reporting_period, e.activity_data, e.emission_factor,
+       e.co2_equivalent, {_NEW_CO2E}
+FROM emissions_data e
+WHERE {{filter}} AND e.id > %s AND e.id <= %s
+ORDER BY e.id
+LIMIT %s
+"""
+
+# Runs before the UPDATE, while the rows still hold their old values
+_ROLLUP_ADJUST = f"""
+UPDATE emissions_rollup r
+JOIN (
+    SELECT e.company_id, e.reporting_period, e.category_id,
+           SUM({_NEW_FACTOR} - e.emission_factor) AS factor_delta,
+           SUM({_NEW_CO2E} - e.co2_equivalent) AS co2e_delta
+    FROM emissions_data e
+    WHERE {{filter}} AND e.id > %s AND e.id <= %s
+    GROUP BY e.company_id, e.reporting_period, e.category_id
+) d ON r.company_id = d.company_id AND r.reporting_period = d.reporting_period
+   AND r.category_id = d.category_id
+SET r.total_emission_factor = r.total_emission_factor + d.factor_delta,
+    r.total_co2e = r.total_co2e + d.co2e_delta
+"""
+
+_UPDATE_CHUNK = f"""
+UPDATE emissions_data e
+SET e.emission_factor = {_NEW_FACTOR},
+    e.co2_equivalent = {_NEW_CO2E}
+WHERE {{filter}} AND e.id > %s AND e.id <= %s
+"""
+
+_AUDIT_CHUNK = """
+INSERT INTO audit_trail (user_id, action, table_name, record_id, old_values, new_values, ip_address)
+VALUES (%s, 'RECALCULATE_EMISSIONS', 'emissions_data', %s, %s, %s, NULL)
+"""
+
+
+class RecalculationJob:
+    """Recompute co2_equivalent for one category with a corrected factor.
+
+    Rows are selected by ``category_id``, ``old_factor`` and optionally
+    ``reporting_periods``. Passing ``all_factors=True`` instead of
+    ``old_factor`` selects every row whose factor differs, including rows
+    entered with a custom factor, so it has to be asked for explicitly.
+    ``progress`` is called with (rows done, rows total) after each chunk.
+    """
+
+    def __init__(self, connection, category_id: int, new_factor: float,
+                 reporting_periods: List[str] = None, old_factor: float = None,
+                 chunk_size: int = 5000, user_id: int = None, sample_size: int = 20,
+                 progress: Callable[[int, int], None] = None, all_factors: bool = False):
+        if (old_factor is None) != all_factors:
+            raise ValueError("Give either old_factor or all_factors=True")
+        self.connection = connection
+        self.category_id = category_id
+        self.new_factor = new_factor
+        self.reporting_periods = list(reporting_periods or [])
+        self.old_factor = old_factor
+        self.all_factors = all_factors
+        self.chunk_size = chunk_size
+        self.user_id = user_id
+        self.sample_size = sample_size
+        self.progress = progress
+        self.report: Dict[str, Any] = {}
+
+        conditions = ["e.category_id = %s"]
+        self._filter_params: List[Any] = [category_id]
+        if self.reporting_periods:
+            conditions.append(f"e.reporting_period IN ({', '.join(['%s'] * len(self.reporting_periods))})")
+            self._filter_params.extend(self.reporting_periods)
+        if old_factor is not None:
+            conditions.append("e.emission_factor = ROUND(%s, 6)")
+            self._filter_params.append(old_factor)
+        else:
+            conditions.append("e.emission_factor <> ROUND(%s, 6)")
+            self._filter_params.append(new_factor)
+        self._filter = ' AND '.join(conditions)
+
+    def _sql(self, template: str) -> str:
+        return template.format(filter=self._filter)
+
+    def count(self, cursor) -> int:
+        cursor.execute(self._sql("SELECT COUNT(*) FROM emissions_data e WHERE {filter}"),
+                       tuple(self._filter_params))
+        return int(cursor.fetchone()[0])
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Process every chunk; returns totals, per-chunk results and (dry run) sample diffs.
+
+        ``report`` is kept up to date after each chunk, so when a chunk
+        fails it still holds the chunks committed before it.
+        """
+        self.report = report = {
+            'category_id': self.category_id,
+            'new_factor': self.new_factor,
+            'old_factor': self.old_factor,
+            'reporting_periods': self.reporting_periods,
+            'dry_run': dry_run,
+            'rows': 0,
+            'co2e_before': 0.0,
+            'co2e_after': 0.0,
+            'co2e_delta': 0.0,
+            'chunks': [],
+            'sample': []
+        }
+        params = tuple(self._filter_params)
+        cursor = self.connection.cursor()
+        try:
+            total = self.count(cursor)
+            last_id = 0
+            while True:
+                cursor.execute(self._sql(_CHUNK_BOUNDS), params + (last_id, self.chunk_size))
+                rows, high_id = cursor.fetchone()
+                if not rows:
+                    break
+                bounds = (last_id, high_id)
+
+                cursor.execute(self._sql(_CHUNK_TOTALS), (self.new_factor,) + params + bounds)
+                rows, co2e_before, co2e_after = cursor.fetchone()
+                chunk = {
+                    'first_id': last_id + 1,
+                    'last_id': int(high_id),
+                    'rows': int(rows),
+                    'co2e_before': float(co2e_before),
+                    'co2e_after': float(co2e_after)
+                }
+
+                if dry_run:
+                    if len(report['sample']) < self.sample_size:
+                        cursor.execute(self._sql(_CHUNK_SAMPLE), (self.new_factor,) + params + bounds +
+                                       (self.sample_size - len(report['sample']),))
+                        report['sample'].extend(self._sample_row(row) for row in cursor.fetchall())
+                else:
+                    self._apply_chunk(cursor, params, bounds, chunk)
+
+                report['chunks'].append(chunk)
+                report['rows'] += chunk['rows']
+                report['co2e_before'] += chunk['co2e_before']
+                report['co2e_after'] += chunk['co2e_after']
+                report['co2e_delta'] = report['co2e_after'] - report['co2e_before']
+                last_id = int(high_id)
+                if self.progress:
+                    self.progress(report['rows'], max(total, report['rows']))
+        finally:
+            cursor.close()
+
+        return report
+
+    def _apply_chunk(self, cursor, params: tuple, bounds: tuple, chunk: Dict[str, Any]):
+        self.connection.start_transaction()
+        try:
+            cursor.execute(self._sql(_ROLLUP_ADJUST), (self.new_factor, self.new_factor) + params + bounds)
+            cursor.execute(self._sql(_UPDATE_CHUNK), (self.new_factor, self.new_factor) + params + bounds)
+            if self.user_id:
+                cursor.execute(_AUDIT_CHUNK, (
+                    self.user_id, chunk['last_id'],
+                    json.dumps({'emission_factor': self.old_factor, 'co2e_total': chunk['co2e_before']}),
+                    json.dumps({
+                        'category_id': self.category_id,
+                        'reporting_periods': self.reporting_periods,
+                        'emission_factor': self.new_factor,
+                        'first_id': chunk['first_id'],
+                        'last_id': chunk['last_id'],
+                        'rows': chunk['rows'],
+                        'co2e_total': chunk['co2e_after']
+                    })
+                ))
+            self.connection.commit()
+        except Error:
+            self.connection.rollback()
+            raise
+
+    @staticmethod
+    def _sample_row(row: tuple) -> Dict[str, Any]:
+        return {
+            'id': row[0],
+            'company_id': row[1],
+            'reporting_period': row[2],
+            'activity_data': float(row[3]),
+            'old_emission_factor': float(row[4]),
+            'old_co2_equivalent': float(row[5]),
+            'new_co2_equivalent': float(row[6])
+        }
+
+
+def print_progress(done: int, total: int):
+    print(f"   {done:,}/{total:,} rows ({done / total:.0%})" if total else "   0 rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recalculate stored emissions after a factor correction")
+    parser.add_argument('--category', type=int, required=True, help="ghg_categories.id")
+    parser.add_argument('--factor', type=float, required=True, help="corrected emission factor")
+    rows = parser.add_mutually_exclusive_group(required=True)
+    rows.add_argument('--old-factor', type=float, help="only rows entered with this factor")
+    rows.add_argument('--all-factors', action='store_true',
+                      help="every row whose factor differs, including custom factors")
+    parser.add_argument('--period', action='append', help="reporting period (repeatable)")
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--user-id', type=int, help="user recorded in the audit trail")
+    parser.add_argument('--dry-run', action='store_true', help="report the changes without writing")
+    args = parser.parse_args()
+
+    print("🔁 Emissions recalculation" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 40)
+
+    connection = None
+    try:
+        connection = mysql.connector.connect(**Config().database_config)
+        job = RecalculationJob(connection, args.category, args.factor, args.period, args.old_factor,
+                               args.chunk_size, args.user_id, progress=print_progress,
+                               all_factors=args.all_factors)
+        report = job.run(dry_run=args.dry_run)
+    except Error as e:
+        print(f"❌ Recalculation failed: {e}")
+        return False
+    finally:
+        if connection is not None:
+            connection.close()
+
+    for row in report['sample']:
+        print(f"   #{row['id']}: {row['old_co2_equivalent']:.4f} -> {row['new_co2_equivalent']:.4f} kg CO2e")
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"✅ {verb} {report['rows']:,} rows in {len(report['chunks'])} chunks; "
+          f"CO2e {report['co2e_before']:,.4f} -> {report['co2e_after']:,.4f} kg "
+          f"({report['co2e_delta']:+,.4f})")
+    if not args.dry_run and report['rows']:
+        print("💡 Restart the app or wait for the summary cache TTL to see updated summaries")
+    return True
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
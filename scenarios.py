@@ -0,0 +1,197 @@
+import logging
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCOPES = (1, 2, 3)
+BASELINE = 'Baseline'
+
+
+class Lever:
+    """A change applied to some categories of an inventory.
+
+    ``multiplier`` scales their activity, e.g. 0.7 for a 30% cut in air
+    travel. ``factor`` substitutes the emission factor (kg CO2e per unit of
+    the category's activity) for a ``share`` of the activity, e.g. the
+    electricity-per-km factor for half of a fleet switching to EVs.
+    """
+
+    def __init__(self, name: str, category_ids: Sequence[int], multiplier: float = 1.0,
+                 factor: float = None, share: float = 1.0):
+        if multiplier < 0:
+            raise ValueError("Lever multiplier cannot be negative")
+        if factor is not None and factor < 0:
+            raise ValueError("Substitute emission factor cannot be negative")
+        if not 0 <= share <= 1:
+            raise ValueError("Substituted share must be between 0 and 1")
+        self.name = name
+        self.category_ids = [int(category_id) for category_id in category_ids]
+        self.multiplier = float(multiplier)
+        self.factor = None if factor is None else float(factor)
+        self.share = float(share)
+
+    def apply(self, activity: np.ndarray, emissions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """New (activity, emissions) of the lever's categories"""
+        activity = activity * self.multiplier
+        emissions = emissions * self.multiplier
+        if self.factor is not None:
+            emissions = emissions * (1 - self.share) + activity * self.share * self.factor
+        return activity, emissions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.name, 'category_ids': self.category_ids, 'multiplier': self.multiplier,
+                'factor': self.factor, 'share': self.share}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Lever':
+        return cls(data['name'], data['category_ids'], data.get('multiplier', 1.0),
+                   data.get('factor'), data.get('share', 1.0))
+
+
+class _Scenario:
+    def __init__(self, activity: np.ndarray, emissions: np.ndarray, scope_totals: np.ndarray):
+        self.levers: List[Lever] = []
+        self.activity = activity.copy()
+        self.emissions = emissions.copy()
+        self.scope_totals = scope_totals.copy()
+
+
+class ScenarioModel:
+    """What-if scenarios over one cached inventory baseline.
+
+    The baseline is a ``GHGCalculator.get_category_breakdown`` result, so
+    scenarios never query emissions_data. Each scenario keeps its own
+    per-category activity and emissions and its scope totals. Adding or
+    removing a lever replays the scenario's levers over that lever's
+    categories only, and adjusts the scope totals by their change.
+    """
+
+    def __init__(self, breakdown: List[Dict]):
+        self.scenarios_recomputed = 0
+        self.categories_recomputed = 0
+        self._scenarios: Dict[str, _Scenario] = {}
+        self._load(breakdown)
+
+    @classmethod
+    def load(cls, calculator, company_id: int, reporting_period: str) -> 'ScenarioModel':
+        return cls(calculator.get_category_breakdown(company_id, reporting_period))
+
+    def _load(self, breakdown: List[Dict]):
+        self.breakdown = list(breakdown)
+        self.category_ids = np.array([row['category_id'] for row in self.breakdown], dtype=np.int64)
+        self.scope_index = np.array([SCOPES.index(row['scope_number']) for row in self.breakdown],
+                                    dtype=np.int64)
+        self.activity = np.array([row['total_activity'] for row in self.breakdown], dtype=np.float64)
+        self.emissions = np.array([row['total_emissions'] for row in self.breakdown], dtype=np.float64)
+        self.baseline = self._scope_sums(np.arange(len(self.breakdown)), self.emissions)
+        self._positions = {int(category_id): position for position, category_id in enumerate(self.category_ids)}
+
+    def rebase(self, breakdown: List[Dict]):
+        """Replace the baseline (e.g. after new entries) and replay every scenario on it"""
+        levers = {name: scenario.levers for name, scenario in self._scenarios.items()}
+        self._load(breakdown)
+        self._scenarios = {}
+        for name, scenario_levers in levers.items():
+            self.add_scenario(name, scenario_levers)
+
+    def scenarios(self) -> List[str]:
+        return list(self._scenarios)
+
+    def levers(self, name: str) -> List[Lever]:
+        return list(self._scenarios[name].levers)
+
+    def add_scenario(self, name: str, levers: Iterable[Lever] = ()):
+        """Create (or reset) a scenario, starting from the baseline"""
+        self._scenarios[name] = _Scenario(self.activity, self.emissions, self.baseline)
+        for lever in levers:
+            self.add_lever(name, lever)
+
+    def remove_scenario(self, name: str):
+        self._scenarios.pop(name, None)
+
+    def add_lever(self, name: str, lever: Lever):
+        scenario = self._scenarios[name]
+        scenario.levers.append(lever)
+        self._recompute(scenario, self._lever_positions(lever))
+
+    def remove_lever(self, name: str, lever_name: str):
+        scenario = self._scenarios[name]
+        removed = [lever for lever in scenario.levers if lever.name == lever_name]
+        scenario.levers = [lever for lever in scenario.levers if lever.name != lever_name]
+        if removed:
+            self._recompute(scenario, np.unique(np.concatenate([self._lever_positions(lever) for lever in removed])))
+
+    def result(self, name: str) -> Dict[str, Any]:
+        """Scope totals of a scenario and its reduction against the baseline"""
+        if name == BASELINE:
+            return self._totals(BASELINE, self.baseline, [])
+        scenario = self._scenarios[name]
+        return self._totals(name, scenario.scope_totals, [lever.name for lever in scenario.levers])
+
+    def compare(self, names: Sequence[str] = None) -> pd.DataFrame:
+        """One row per scenario, baseline first"""
+        names = self.scenarios() if names is None else list(names)
+        return pd.DataFrame([self.result(BASELINE)] + [self.result(name) for name in names])
+
+    def category_changes(self, name: str) -> pd.DataFrame:
+        """Categories a scenario changes, with baseline and scenario emissions"""
+        scenario = self._scenarios[name]
+        changed = np.flatnonzero(scenario.emissions != self.emissions)
+        return pd.DataFrame({
+            'category_id': self.category_ids[changed],
+            'scope_number': np.array(SCOPES)[self.scope_index[changed]],
+            'category_name': [self.breakdown[position]['category_name'] for position in changed],
+            'subcategory_name': [self.breakdown[position]['subcategory_name'] for position in changed],
+            'baseline_emissions': self.emissions[changed],
+            'scenario_emissions': scenario.emissions[changed],
+            'change': scenario.emissions[changed] - self.emissions[changed]
+        })
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'categories': len(self.category_ids),
+            'scenarios': len(self._scenarios),
+            'scenarios_recomputed': self.scenarios_recomputed,
+            'categories_recomputed': self.categories_recomputed
+        }
+
+    def _lever_positions(self, lever: Lever) -> np.ndarray:
+        # Categories without emissions in the baseline have nothing to change
+        return np.array([self._positions[category_id] for category_id in lever.category_ids
+                         if category_id in self._positions], dtype=np.int64)
+
+    def _recompute(self, scenario: _Scenario, positions: np.ndarray):
+        """Replay the scenario's levers over ``positions`` from the baseline"""
+        if not len(positions):
+            return
+        activity, emissions = self.activity[positions], self.emissions[positions]
+        for lever in scenario.levers:
+            rows = np.isin(positions, self._lever_positions(lever))
+            if rows.any():
+                activity[rows], emissions[rows] = lever.apply(activity[rows], emissions[rows])
+
+        scenario.scope_totals += self._scope_sums(positions, emissions - scenario.emissions[positions])
+        scenario.activity[positions] = activity
+        scenario.emissions[positions] = emissions
+        self.scenarios_recomputed += 1
+        self.categories_recomputed += len(positions)
+
+    def _scope_sums(self, positions: np.ndarray, values: np.ndarray) -> np.ndarray:
+        return np.bincount(self.scope_index[positions], weights=values, minlength=len(SCOPES)).astype(np.float64)
+
+    def _totals(self, name: str, scope_totals: np.ndarray, lever_names: List[str]) -> Dict[str, Any]:
+        total = float(scope_totals.sum())
+        baseline_total = float(self.baseline.sum())
+        reduction = baseline_total - total
+        result = {'scenario': name}
+        result.update({f"scope_{scope}": float(value) for scope, value in zip(SCOPES, scope_totals)})
+        result.update({
+            'total': total,
+            'reduction': reduction,
+            'reduction_pct': reduction / baseline_total * 100 if baseline_total else 0.0,
+            'levers': lever_names
+        })
+        return result
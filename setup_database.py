@@ -9,6 +9,12 @@ from mysql.connector import Error
 from dotenv import load_dotenv
 import os
 
+from category_catalog import CATALOG_VERSION_DDL, bump_catalog_version
+from emissions_rollup import EMISSIONS_ROLLUP_DDL
+from gwp import CATEGORY_GAS_FACTORS_DDL
+from factor_versions import EMISSION_FACTOR_VERSIONS_DDL
+from eeio import EEIO_SECTORS_DDL, LEDGER_SECTOR_MAP_DDL, LEDGER_LINES_DDL
+
 # Load environment variables
 load_dotenv()
 
@@ -109,12 +115,29 @@ def create_database_schema():
                 notes TEXT,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_emissions_created (created_at),
+                INDEX idx_emissions_company_created (company_id, created_at),
+                INDEX idx_emissions_company_period_created (company_id, reporting_period, created_at),
                 FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE CASCADE,
                 FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
                 FOREIGN KEY (category_id) REFERENCES ghg_categories(id) ON DELETE CASCADE
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """,
             
+            'emissions_rollup': EMISSIONS_ROLLUP_DDL,
+            
+            'catalog_version': CATALOG_VERSION_DDL,
+            
+            'category_gas_factors': CATEGORY_GAS_FACTORS_DDL,
+            
+            'emission_factor_versions': EMISSION_FACTOR_VERSIONS_DDL,
+            
+            'eeio_sectors': EEIO_SECTORS_DDL,
+            
+            'ledger_sector_map': LEDGER_SECTOR_MAP_DDL,
+            
+            'ledger_lines': LEDGER_LINES_DDL,
+            
             'audit_trail': """
             CREATE TABLE IF NOT EXISTS audit_trail (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -168,6 +191,7 @@ def create_database_schema():
         
         cursor.executemany(insert_category_sql, sample_categories)
         print(f"✅ Inserted {cursor.rowcount} GHG categories")
+        bump_catalog_version(cursor)
         
         # Insert a sample company
         print("\n🏢 Creating sample company...")
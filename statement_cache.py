@@ -0,0 +1,87 @@
+import threading
+import weakref
+import logging
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class PreparedStatementCache:
+    """Per-connection registry of server-side prepared cursors.
+
+    Statements are keyed by a logical name. Each pooled connection keeps one
+    prepared cursor per name, so repeated calls skip the server-side parse
+    and only send COM_STMT_EXECUTE. Registries are tied to the server thread
+    id, so a reconnected connection re-prepares its statements.
+    """
+
+    def __init__(self):
+        self._registries = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._reprepares = 0
+
+    def cursor(self, connection, name: str, query: str):
+        """Get the prepared cursor for ``name`` on ``connection``, preparing it if needed"""
+        connection_id = connection.connection_id
+        with self._lock:
+            registry = self._registries.get(connection)
+            if registry is None or registry['connection_id'] != connection_id:
+                if registry is not None:
+                    self._reprepares += len(registry['statements'])
+                registry = {'connection_id': connection_id, 'statements': {}}
+                self._registries[connection] = registry
+
+            entry = registry['statements'].get(name)
+            if entry is not None and entry[0] == query:
+                self._hits += 1
+                return entry[1]
+
+            self._misses += 1
+
+        # The statement is prepared on the cursor's first execute
+        cursor = connection.cursor(prepared=True)
+        with self._lock:
+            registry['statements'][name] = (query, cursor)
+        return cursor
+
+    def discard(self, connection, name: str = None):
+        """Drop a statement after an error so it is prepared afresh next time.
+
+        Without ``name`` the connection's whole registry is dropped, e.g. when
+        the pool resets the session (which frees its prepared statements) or
+        closes the connection.
+        """
+        with self._lock:
+            registry = self._registries.get(connection)
+            if registry is None:
+                return
+            if name is None:
+                del self._registries[connection]
+                entries = list(registry['statements'].items())
+            else:
+                entry = registry['statements'].pop(name, None)
+                entries = [(name, entry)] if entry is not None else []
+        for statement_name, (_, cursor) in entries:
+            try:
+                cursor.close()
+            except Exception as e:
+                logger.debug(f"Error closing prepared statement '{statement_name}': {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the registry"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'reprepares': self._reprepares,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'connections': len(self._registries),
+                'statements': sum(len(r['statements']) for r in self._registries.values())
+            }
+
+
+# Process-wide registry shared by every DatabaseManager
+statement_cache = PreparedStatementCache()
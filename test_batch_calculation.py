@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized batch emission calculation
+"""
+
+import numpy as np
+import pandas as pd
+
+from datetime import date
+
+from category_catalog import CategoryIndex
+from factor_versions import FactorVersionIndex
+from ghg_calculator import GHGCalculator
+from fake_database import IndexOnlyDatabase, make_category
+
+def test_calculate_batch():
+    print("🧪 Testing Batch Calculation")
+    print("=" * 30)
+
+    index = CategoryIndex([
+        make_category(3, 1, 'S1-MC', 'S1-MC-01', 2.31),
+        make_category(7, 2, 'S2-EC', 'S2-EC-01', 0.5)
+    ])
+    calculator = GHGCalculator(IndexOnlyDatabase(index))
+
+    lines = pd.DataFrame({
+        'invoice': ['A', 'B', 'C', 'D', 'E', 'F', 'G'],
+        'category_id': [3, 7, 7, 99, 3, 3, 7],
+        'activity_data': [10.0, 100.0, 100.0, 5.0, -1.0, 0.0, np.nan],
+        'emission_factor': [np.nan, np.nan, 0.25, np.nan, np.nan, np.nan, np.nan]
+    })
+    result = calculator.calculate_batch(lines)
+
+    assert list(result['invoice']) == list(lines['invoice'])
+    assert np.allclose(result['co2_equivalent'][:3], [23.1, 50.0, 25.0])
+    assert list(result['factor_source'][:3]) == ['default', 'default', 'custom']
+    assert list(result['scope_number']) == [1, 2, 2, 0, 1, 1, 2]
+    print("✅ Default and custom factors resolved per line")
+
+    assert list(result['valid']) == [True, True, True, False, False, False, False]
+    assert list(result['validation'][3:]) == [
+        'Unknown category', 'Activity data cannot be negative',
+        'Activity data cannot be zero', 'Activity data is missing'
+    ]
+    assert np.isnan(result['co2_equivalent'][3])
+    assert 'factor_source' not in lines
+    print("✅ Invalid lines flagged, input left untouched")
+
+    single, _ = calculator.calculate_emissions(3, 10.0)
+    assert np.isclose(single, result['co2_equivalent'][0])
+    minimal = calculator.calculate_batch({'category_id': [7], 'activity_data': [2]})
+    assert minimal['co2_equivalent'][0] == 1.0 and minimal['valid'][0]
+    print("✅ Matches calculate_emissions")
+
+    fuel = dict(make_category(4, 1, 'S1-01', 'S1-01-03', 2.5), unit='kg CO2e/litre')
+    power = dict(make_category(8, 2, 'S2-EC', 'S2-EC-01', 0.2), unit='kg CO2e/kWh')
+    calculator = GHGCalculator(IndexOnlyDatabase(CategoryIndex([fuel, power])))
+    result = calculator.calculate_batch(pd.DataFrame({
+        'category_id': [4, 4, 8, 8],
+        'activity_data': [10.0, 1.0, 1.0, 5.0],
+        'unit': ['litre', 'gallon', 'therm', 'litre']
+    }))
+    assert np.allclose(result['activity_data'][:3], [10.0, 3.785411784, 29.3071070])
+    assert list(result['input_activity_data']) == [10.0, 1.0, 1.0, 5.0]
+    assert list(result['activity_unit']) == ['litre', 'litre', 'kWh', 'kWh']
+    assert list(result['validation']) == ['Valid', 'Valid', 'Valid', 'Unit cannot be converted']
+    print("✅ Mixed input units converted to each category's unit")
+
+    calculator = GHGCalculator(IndexOnlyDatabase(index, FactorVersionIndex([
+        (3, 2.0, date(2023, 1, 1), date(2023, 12, 31), None),
+        (3, 2.5, date(2024, 1, 1), None, None)
+    ])))
+    result = calculator.calculate_batch(pd.DataFrame({
+        'category_id': [3, 3, 3, 3, 7],
+        'activity_data': [1.0, 1.0, 1.0, 1.0, 1.0],
+        'reporting_period': ['2022', '2023', 'Q3-2024', '2024', '2024'],
+        'emission_factor': [np.nan, np.nan, np.nan, 3.0, np.nan]
+    }))
+    assert list(result['emission_factor']) == [2.31, 2.0, 2.5, 3.0, 0.5]
+    assert list(result['factor_source']) == ['default', 'versioned', 'versioned', 'custom', 'default']
+    assert calculator.get_emission_factor(3, '2023') == 2.0 and calculator.get_emission_factor(3) == 2.31
+    print("✅ Factor versions resolved per reporting period")
+    print("\n🎉 Batch calculation tests completed!")
+
+if __name__ == "__main__":
+    test_calculate_batch()
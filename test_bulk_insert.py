@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test the bulk emissions insert against a scripted cursor
+"""
+
+from category_catalog import CategoryIndex
+from database_operations import DatabaseManager
+
+class ScriptedCursor:
+    """Hands out auto-increment ids for emissions_data INSERTs"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = None
+        self.lastrowid = None
+
+    def execute(self, query, params=None):
+        self.connection.statements.append((' '.join(query.split()), params))
+        if 'information_schema.tables' in query:
+            self.result = (self.connection.engine, self.connection.step)
+        elif query.lstrip().startswith('INSERT INTO emissions_data'):
+            rows = len(params) // 10
+            self.lastrowid = self.connection.next_id
+            self.connection.next_id += rows * self.connection.step
+
+    def fetchone(self):
+        return self.result
+
+    def close(self):
+        pass
+
+class ScriptedConnection:
+    def __init__(self, engine='InnoDB', step=2, next_id=101):
+        self.engine = engine
+        self.step = step
+        self.next_id = next_id
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+def make_records(count):
+    return [{'company_id': 1, 'user_id': 7, 'category_id': 3, 'reporting_period': '2024',
+             'activity_data': 10.0 + i, 'emission_factor': 0.5} for i in range(count)]
+
+def make_manager(connection):
+    db = DatabaseManager()
+    db.connection = connection
+    db.get_category_index = lambda: CategoryIndex([])
+    return db
+
+def test_bulk_insert():
+    print("🧪 Testing Bulk Emissions Insert")
+    print("=" * 30)
+
+    connection = ScriptedConnection()
+    ids = make_manager(connection).add_emission_data_bulk(make_records(5), chunk_size=2)
+    assert ids == [101, 103, 105, 107, 109] and connection.commits == 1
+    queries = [query for query, _ in connection.statements]
+    assert sum(query.startswith('INSERT INTO emissions_data') for query in queries) == 3
+    assert sum(query.startswith('INSERT INTO emissions_rollup') for query in queries) == 3
+    audits = [params for query, params in connection.statements if query.startswith('INSERT INTO audit_trail')]
+    assert len(audits) == 3 and audits[0][3] == 101 and audits[-1][3] == 109
+    print("✅ Chunked inserts, rollup and audit rows with ids stepped by auto_increment_increment")
+
+    connection = ScriptedConnection(engine='MyISAM')
+    assert make_manager(connection).add_emission_data_bulk(make_records(2)) == []
+    assert connection.rollbacks == 1 and connection.commits == 0
+    print("✅ Refused on a table without consecutive simple-insert ids")
+
+def test_validation():
+    print("\n🧪 Testing Bulk Record Validation")
+    print("=" * 30)
+
+    records = make_records(4)
+    records[1]['activity_data'] = 'twelve'
+    records[2]['emission_factor'] = -1.0
+    del records[3]['user_id']
+    rows, rejected = DatabaseManager.validate_emission_records(records)
+    assert len(rows) == 1 and rows[0][6] == 5.0
+    assert [rejection['index'] for rejection in rejected] == [1, 2, 3]
+    assert rejected[2]['error'] == 'Missing user_id'
+    print("✅ Every bad record reported with its reason")
+
+    connection = ScriptedConnection()
+    assert make_manager(connection).add_emission_data_bulk(records) == []
+    assert connection.statements == []
+    print("✅ Nothing written when a record is rejected")
+    print("\n🎉 Bulk insert tests completed!")
+
+if __name__ == "__main__":
+    test_bulk_insert()
+    test_validation()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test the cache backends against a local Redis stand-in, SQLite and memory
+"""
+
+import os
+import socketserver
+import tempfile
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from cache_backends import (MemoryBackend, SQLiteBackend, RedisBackend, SharedCache,
+                            serialize, deserialize)
+from caching import SummaryCache
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough RESP for GET, MGET, SET [PX], DEL and INCR"""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def write_bulk(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            now = time.time()
+            for key in [key for key, (_, expires) in store.items() if expires and expires <= now]:
+                del store[key]
+            if command == b'GET':
+                self.write_bulk(store.get(args[1], (None, None))[0])
+            elif command == b'MGET':
+                self.wfile.write(b'*%d\r\n' % (len(args) - 1))
+                for key in args[1:]:
+                    self.write_bulk(store.get(key, (None, None))[0])
+            elif command == b'SET':
+                expires = now + int(args[4]) / 1000 if len(args) > 3 else None
+                store[args[1]] = (args[2], expires)
+                self.wfile.write(b'+OK\r\n')
+            elif command == b'DEL':
+                self.wfile.write(b':%d\r\n' % int(store.pop(args[1], None) is not None))
+            elif command == b'INCR':
+                value = int(store.get(args[1], (b'0', None))[0]) + 1
+                store[args[1]] = (str(value).encode(), None)
+                self.wfile.write(b':%d\r\n' % value)
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+def start_fake_redis():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.store = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def check_shared_cache(make_backend, name):
+    # Two instances on the same backend behave like two app replicas
+    first = SharedCache(make_backend(), 'summaries', ttl=60)
+    second = SharedCache(make_backend(), 'summaries', ttl=60)
+
+    summary = {'total': 12.5, 'details': [{'scope_number': 1, 'emissions': 12.5}]}
+    first.set('1:2024', summary, scope='company:1')
+    assert second.get('1:2024', scope='company:1') == summary
+
+    version = second.version('company:1')
+    first.invalidate('company:1')
+    assert second.get('1:2024', scope='company:1') is None
+    second.set('1:2024', {'total': 1.0}, scope='company:1', version=version)
+    assert first.get('1:2024', scope='company:1') is None
+
+    first.set('2:2024', {'total': 3.0}, scope='company:2')
+    second.invalidate()
+    assert first.get('2:2024', scope='company:2') is None
+
+    first.set('short', 1, ttl=0.2)
+    assert second.get('short') == 1
+    time.sleep(0.3)
+    assert second.get('short') is None
+    print(f"✅ {name}: sharing, versioned invalidation and TTL")
+
+def test_serialization():
+    print("🧪 Testing Cache Serialization")
+    print("=" * 30)
+    value = {'created_at': datetime(2024, 5, 1, 12, 30), 'amount': Decimal('1.2500'),
+             'rows': [{'id': i, 'name': 'x' * 20} for i in range(100)]}
+    data = serialize(value)
+    assert data[:1] == b'z'
+    assert deserialize(data) == value
+    assert serialize({'a': 1}) == b'j{"a":1}'
+    print(f"✅ Compact round trip ({len(data)} bytes)")
+
+def test_cache_backends():
+    print("\n🧪 Testing Cache Backends")
+
+    memory = MemoryBackend()
+    check_shared_cache(lambda: memory, "memory")
+
+    small = MemoryBackend(maxsize=2)
+    versions = SharedCache(small, 'evict')
+    versions.invalidate('company:1')
+    version = versions.version('company:1')
+    for number in range(10):
+        small.set(f"filler:{number}", b'x')
+    assert versions.version('company:1') == version
+    print("✅ Memory version counters survive LRU eviction")
+
+    path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+    check_shared_cache(lambda: SQLiteBackend(path), "sqlite")
+
+    server = start_fake_redis()
+    port = server.server_address[1]
+    check_shared_cache(lambda: RedisBackend('127.0.0.1', port), "redis")
+
+    summaries = SummaryCache(shared=SharedCache(RedisBackend('127.0.0.1', port), 'summaries'))
+    generation = summaries.generation(1)
+    summaries.put(1, '2024', {'total': 5.0}, generation)
+    assert summaries.get(1, '2024') == {'total': 5.0}
+    summaries.add(1, '2024', 1, 'Scope 1', 2.0)
+    assert summaries.get(1, '2024') is None
+    print("✅ Summary cache invalidates across instances")
+
+    server.shutdown()
+    server.server_close()
+    down = SharedCache(RedisBackend('127.0.0.1', port, timeout=0.2), 'summaries')
+    down.set('1:2024', {'total': 1.0})
+    assert down.get('1:2024') is None
+    assert down.stats()['errors'] > 0
+    print("✅ Unreachable Redis degrades to cache misses")
+    print("\n🎉 Cache backend tests completed!")
+
+if __name__ == "__main__":
+    test_serialization()
+    test_cache_backends()
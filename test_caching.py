@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test the TTL/LRU cache and the emissions summary cache
+"""
+
+from caching import TTLCache, SummaryCache, FigureCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_summary(scope_1=0.0, scope_2=0.0):
+    details = []
+    if scope_1:
+        details.append({'scope_number': 1, 'scope_name': 'Scope 1', 'emissions': scope_1, 'entry_count': 1})
+    if scope_2:
+        details.append({'scope_number': 2, 'scope_name': 'Scope 2', 'emissions': scope_2, 'entry_count': 1})
+    return {
+        'scope_1': scope_1, 'scope_2': scope_2, 'scope_3': 0, 'total': scope_1 + scope_2,
+        'details': details,
+        'entry_counts': {'scope_1': int(bool(scope_1)), 'scope_2': int(bool(scope_2)), 'scope_3': 0}
+    }
+
+def test_ttl_cache():
+    print("🧪 Testing TTL Cache")
+    print("=" * 30)
+
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # evicts 'b', the least recently used
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    clock.now = 11
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 2
+    assert stats['evictions'] == 1 and stats['expirations'] == 1
+    print(f"✅ LRU eviction and expiry: {stats}")
+
+def test_summary_cache():
+    print("\n🧪 Testing Summary Cache")
+
+    cache = SummaryCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.put(1, '2024', make_summary(scope_1=10.0), generation)
+    cache.put(1, None, make_summary(scope_1=10.0, scope_2=5.0), generation)
+    cache.put(2, '2024', make_summary(scope_2=7.0), generation)
+
+    cache.add(1, '2024', 2, 'Scope 2', 4.5, 2)
+    summary = cache.get(1, '2024')
+    assert summary['scope_2'] == 4.5 and summary['total'] == 14.5
+    assert summary['entry_counts']['scope_2'] == 2
+    assert [d['scope_number'] for d in summary['details']] == [1, 2]
+    assert cache.get(1, None)['total'] == 19.5
+    assert cache.get(2, '2024')['total'] == 7.0
+    print("✅ Inserts adjust every covering summary")
+
+    summary['total'] = -1
+    assert cache.get(1, '2024')['total'] == 14.5
+    print("✅ Callers get copies")
+
+    stale_generation = cache.generation()
+    cache.invalidate(1)
+    assert cache.get(1, '2024') is None and cache.get(1, None) is None
+    assert cache.get(2, '2024') is not None
+    cache.put(1, '2024', make_summary(scope_1=1.0), stale_generation)
+    assert cache.get(1, '2024') is None
+    print(f"✅ Invalidation and stale-read protection: {cache.stats()}")
+
+def test_figure_cache():
+    print("\n🧪 Testing Figure Cache")
+    print("=" * 30)
+
+    class FakeFigure:
+        builds = 0
+
+        def __init__(self, values):
+            FakeFigure.builds += 1
+            self.values = values
+
+    cache = FigureCache(maxsize=2)
+    first = cache.get_or_build('pie', [['Scope 1'], [1.5], 'Title'], lambda: FakeFigure([1.5]))
+    again = cache.get_or_build('pie', [['Scope 1'], [1.5], 'Title'], lambda: FakeFigure([1.5]))
+    assert first is again and first.values == [1.5] and FakeFigure.builds == 1
+    print("✅ Equal inputs reuse the built figure without rebuilding it")
+
+    cache.get_or_build('pie', [['Scope 1'], [2.0], 'Title'], lambda: FakeFigure([2.0]))
+    cache.get_or_build('bar', [['Scope 1'], [1.5], 'Title'], lambda: FakeFigure([1.5]))
+    assert FakeFigure.builds == 3
+    assert FigureCache.key('pie', [{'a': 1, 'b': 2}]) == FigureCache.key('pie', [{'b': 2, 'a': 1}])
+    print("✅ Keys cover the chart kind and data, not dict order")
+
+    assert cache.stats()['size'] == 2 and cache.stats()['evictions'] == 1
+    print(f"✅ LRU bound respected: {cache.stats()}")
+    print("\n🎉 Caching tests completed!")
+
+if __name__ == "__main__":
+    test_ttl_cache()
+    test_summary_cache()
+    test_figure_cache()
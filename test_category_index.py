@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory category index
+"""
+
+import numpy as np
+
+from category_catalog import CategoryIndex, CategoryCatalog
+from fake_database import make_category
+
+def test_category_index():
+    print("🧪 Testing Category Index")
+    print("=" * 30)
+
+    index = CategoryIndex([
+        make_category(12, 1, 'S1-FC', 'S1-FC-01', 2.032),
+        make_category(3, 1, 'S1-MC', 'S1-MC-01', 2.31),
+        make_category(7, 2, 'S2-EC', 'S2-EC-01', 0.499),
+        make_category(5, 3, 'S3-BT', 'S3-BT-01', 0.255),
+        make_category(9, 3, 'S3-BT', 'S3-BT-02', 0.195)
+    ])
+
+    assert len(index) == 5
+    assert index.get(7)['subcategory_code'] == 'S2-EC-01'
+    assert index.get(99) is None
+    assert index.scopes() == [1, 2, 3]
+    assert [cat['id'] for cat in index.by_scope(1)] == [12, 3]
+    assert [cat['id'] for cat in index.by_category_code('S3-BT')] == [5, 9]
+    assert index.by_subcategory_code('S3-BT-02')['id'] == 9
+    assert index.factor(3) == 2.31
+    print("✅ Lookups by id, scope and code")
+
+    factors = index.factors_for([9, 12, 99, 3, 1])
+    assert np.allclose(factors[[0, 1, 3]], [0.195, 2.032, 2.31])
+    assert np.isnan(factors[2]) and np.isnan(factors[4])
+    assert np.isnan(CategoryIndex([]).factors_for([1])).all()
+    factors, scopes, found = index.lookup([7, 99, 5])
+    assert list(scopes) == [2, 0, 3] and list(found) == [True, False, True]
+    print("✅ Vectorised factor lookup")
+
+    catalog = CategoryCatalog()
+    assert catalog.get(1) is None
+    catalog.store(1, index)
+    assert catalog.get(1) is index
+    assert catalog.get(2) is None
+    catalog.invalidate()
+    assert catalog.get(1) is None
+    print(f"✅ Catalogue cache follows the version: {catalog.stats()}")
+    print("\n🎉 Category index tests completed!")
+
+if __name__ == "__main__":
+    test_category_index()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the database circuit breaker
+"""
+
+from mysql.connector import Error
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from connection_pool import ConnectionPool
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_circuit_breaker():
+    print("🧪 Testing Circuit Breaker")
+    print("=" * 30)
+
+    clock = FakeClock()
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=30, clock=clock)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    print("✅ Opens after 3 consecutive failures")
+
+    try:
+        breaker.before_call()
+        assert False, "Open circuit should reject calls"
+    except CircuitOpenError:
+        pass
+    print("✅ Fails fast while open")
+
+    clock.now = 31
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    try:
+        breaker.before_call()
+        assert False, "Only one probe should be let through"
+    except CircuitOpenError:
+        pass
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    print("✅ Failed probe re-opens the circuit")
+
+    clock.now = 62
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    stats = breaker.stats()
+    assert stats['times_opened'] == 2 and stats['rejected_calls'] == 2
+    print(f"✅ Successful probe closes the circuit: {stats}")
+
+def test_pool_fails_fast():
+    print("\n🧪 Testing pool fail-fast")
+
+    attempts = []
+
+    def failing_factory(**kwargs):
+        attempts.append(kwargs)
+        raise Error("Can't connect to MySQL server")
+
+    pool = ConnectionPool({}, pool_size=1, max_overflow=0, failure_threshold=2,
+                          reset_timeout=60, name='breaker_test', connection_factory=failing_factory)
+    for _ in range(5):
+        try:
+            pool.get_connection()
+            assert False, "Connection should fail"
+        except CircuitOpenError:
+            pass
+        except Error:
+            pass
+
+    assert len(attempts) == 2
+    assert pool.stats()['circuit_state'] == OPEN
+    assert pool.stats()['total'] == 0
+    print("✅ Pool stops connecting once the circuit opens")
+    print("\n🎉 Circuit breaker tests completed!")
+
+if __name__ == "__main__":
+    test_circuit_breaker()
+    test_pool_fails_fast()
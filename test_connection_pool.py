@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the shared connection pool: session reset on return and the reset hook
+"""
+
+from mysql.connector import Error
+
+from connection_pool import ConnectionPool
+
+class SessionConnection:
+    in_transaction = False
+
+    def __init__(self, fail_reset=False):
+        self.fail_reset = fail_reset
+        self.resets = 0
+        self.closed = False
+
+    def reset_session(self):
+        if self.fail_reset:
+            raise Error("Lost connection to MySQL server")
+        self.resets += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def make_pool(connections, **kwargs):
+    connections = list(connections)
+    return ConnectionPool({}, pool_size=2, max_overflow=0, name='pool_test',
+                          connection_factory=lambda **config: connections.pop(0), **kwargs)
+
+def test_session_reset():
+    print("🧪 Testing Pool Session Reset")
+    print("=" * 30)
+
+    first, second = SessionConnection(), SessionConnection(fail_reset=True)
+    pool = make_pool([first, second])
+    assert pool.available == 2
+    connection = pool.get_connection()
+    assert pool.available == 1
+    pool.release(connection)
+    assert pool.available == 2
+    assert first.resets == 1 and pool.get_connection() is first
+    print("✅ Returned connections have their session reset")
+
+    assert pool.get_connection() is second
+    pool.release(second)
+    assert second.closed and pool.stats()['total'] == 1 and pool.stats()['idle'] == 0
+    print("✅ Connections that cannot be reset are discarded")
+
+    unreset = SessionConnection()
+    pool = make_pool([unreset], reset_session=False)
+    pool.release(pool.get_connection())
+    assert unreset.resets == 0
+    print("✅ Reset can be turned off")
+
+def test_reset_hook():
+    print("\n🧪 Testing Pool Reset Hook")
+    print("=" * 30)
+
+    reset = []
+    first, second = SessionConnection(), SessionConnection()
+    pool = make_pool([first, second], on_reset=reset.append, recycle=0)
+    pool.release(pool.get_connection())
+    assert reset == [first]
+    print("✅ Hook called before a returned connection is reset")
+
+    pool.get_connection()
+    pool.release(first, discard=True)
+    assert reset == [first, first] and first.closed
+    pool.release(pool.get_connection())
+    pool.close_all()
+    assert reset == [first, first, second, second]
+    print("✅ Hook called for discarded and closed connections")
+
+    failing = make_pool([SessionConnection()], on_reset=lambda connection: 1 / 0)
+    connection = failing.get_connection()
+    failing.release(connection)
+    assert connection.resets == 1
+    print("✅ A failing hook does not stop the reset")
+    print("\n🎉 Connection pool tests completed!")
+
+if __name__ == "__main__":
+    test_session_reset()
+    test_reset_hook()
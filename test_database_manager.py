@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Test DatabaseManager session handling, replica routing and query fan-out against fake pools
+"""
+
+from concurrent.futures import Future
+
+from mysql.connector import Error
+
+from circuit_breaker import OPEN
+from connection_pool import ConnectionPool
+from database_operations import DatabaseManager
+
+class FakeCursor:
+    """Answers every SELECT with the name of the connection it ran on"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        pass
+
+    def fetchall(self):
+        return [(self.connection.name,)]
+
+    def fetchone(self):
+        return (self.connection.name,)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self, name):
+        self.name = name
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def __repr__(self):
+        return f"FakeConnection({self.name!r})"
+
+class FakePool:
+    """Hands out named fake connections and records borrows and returns"""
+
+    def __init__(self, name='primary', available=10, fail=None):
+        self.name = name
+        self.available = available
+        self.fail = fail
+        self.borrowed = 0
+        self.released = []
+
+    def get_connection(self):
+        if self.fail is not None:
+            raise self.fail
+        self.borrowed += 1
+        return FakeConnection(f"{self.name}-{self.borrowed}")
+
+    def release(self, connection, discard=False):
+        self.released.append(connection)
+
+class RecordingManager(DatabaseManager):
+    """Runs submitted calls on a fresh manager over the same fake pool"""
+
+    def __init__(self, pool):
+        super().__init__()
+        self.connection_pool = pool
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(fn)
+        worker = RecordingManager(self.connection_pool)
+        future = Future()
+        with worker.session():
+            future.set_result(fn(worker, *args, **kwargs))
+        return future
+
+class Rerun(BaseException):
+    """Stands in for Streamlit's RerunException / StopException"""
+
+def test_sessions():
+    print("🧪 Testing Re-entrant Sessions")
+    print("=" * 30)
+
+    pool = FakePool()
+    db = DatabaseManager()
+    db.connection_pool = pool
+    with db.session() as connected:
+        outer = db.connection
+        with db.session():
+            assert db.connect() and db.connection is outer
+            db.disconnect()
+            assert db.connection is outer
+        assert db.connection is outer and db._session_depth == 1
+    assert connected and pool.borrowed == 1 and pool.released == [outer]
+    assert db.connection is None and db._session_depth == 0
+    print("✅ Nested sessions, connect() and disconnect() share one connection")
+
+    assert db.connect()
+    opened = db.connection
+    with db.session():
+        assert db.connection is opened
+    assert db.connection is opened and pool.released == [outer]
+    db.disconnect()
+    assert pool.borrowed == 2 and pool.released == [outer, opened]
+    print("✅ A connection opened with connect() is reused and left open")
+
+    try:
+        with db.session():
+            with db.session():
+                raise Rerun()
+    except Rerun:
+        pass
+    assert db.connection is None and db._session_depth == 0
+    assert pool.borrowed == 3 and len(pool.released) == 3
+    print("✅ The connection is released when a rerun or stop unwinds the session")
+
+    pool.fail = Error("Can't connect to MySQL server")
+    with db.session() as connected:
+        assert not connected and db.connection is None
+    assert db._session_depth == 0 and len(pool.released) == 3
+    print("✅ A failed borrow yields False and releases nothing")
+
+def test_gather():
+    print("\n🧪 Testing Query Fan-Out")
+    print("=" * 30)
+
+    pool = FakePool(available=1)
+    db = RecordingManager(pool)
+    calls = {period: (lambda db, period=period: (period, db.connection.name)) for period in ['a', 'b', 'c', 'd']}
+    with db.session():
+        results = db.gather(calls)
+    assert list(results) == ['a', 'b', 'c', 'd'] and len(db.submitted) == 1
+    assert results['a'] == ('a', 'primary-1') and results['b'] == ('b', 'primary-2')
+    assert results['c'][1] == results['d'][1] == 'primary-1'
+    assert pool.borrowed == 2 and len(pool.released) == 2
+    print("✅ First call and calls beyond the free connections run on the session's connection")
+
+    pool.available = 0
+    with db.session():
+        db.gather(calls)
+    assert len(db.submitted) == 1 and pool.borrowed == 3
+    print("✅ Nothing is fanned out when the pool has no free connections")
+
+def make_routed_manager(*replicas):
+    db = DatabaseManager()
+    db.connection_pool = FakePool('primary')
+    db.read_pools = list(replicas)
+    return db
+
+def read_from(db):
+    return db.fetch_one("SELECT 1")[0]
+
+def test_replica_routing():
+    print("\n🧪 Testing Read Replica Routing")
+    print("=" * 30)
+
+    replica = FakePool('replica')
+    db = make_routed_manager(replica)
+    with db.session():
+        assert read_from(db) == 'replica-1' and read_from(db) == 'replica-1'
+        assert db.fetch_query("SELECT 1") == [('replica-1',)]
+    assert replica.borrowed == 1 and [c.name for c in replica.released] == ['replica-1']
+    assert db.read_connection is None
+    print("✅ Reads go to one replica connection per session and it is returned")
+
+    with db.session():
+        assert read_from(db) == 'replica-2'
+        assert db.execute_query("UPDATE users SET is_active = 1")
+        assert read_from(db) == 'primary-2'
+    with db.session():
+        assert read_from(db) == 'primary-3'
+    assert replica.borrowed == 2
+    print("✅ Reads right after a write go to the primary")
+
+    db._state()['db_last_write_at'] = 0.0
+    with db.session():
+        assert read_from(db) == 'replica-3'
+    print("✅ Reads return to the replica once the read-your-writes window has passed")
+
+    db = make_routed_manager()
+    with db.session():
+        assert read_from(db) == 'primary-1'
+    print("✅ Without replicas every read uses the primary")
+
+def test_replica_fallback():
+    print("\n🧪 Testing Replica Fallback")
+    print("=" * 30)
+
+    attempts = []
+
+    def unreachable(**config):
+        attempts.append(config)
+        raise Error("Can't connect to MySQL server on 'replica'")
+
+    replica = ConnectionPool({}, pool_size=1, max_overflow=0, failure_threshold=1, reset_timeout=60,
+                             name='replica_test', connection_factory=unreachable)
+    db = make_routed_manager(replica)
+    with db.session():
+        assert read_from(db) == 'primary-1'
+    assert replica.breaker.state == OPEN and len(attempts) == 1
+    print("✅ A failing replica falls back to the primary and opens its breaker")
+
+    with db.session():
+        assert read_from(db) == 'primary-2' and read_from(db) == 'primary-2'
+    assert len(attempts) == 1 and db.read_connection is None
+    assert [c.name for c in db.connection_pool.released] == ['primary-1', 'primary-2']
+    print("✅ While the replica breaker is open reads use the primary without trying it")
+    print("\n🎉 Database manager tests completed!")
+
+if __name__ == "__main__":
+    test_sessions()
+    test_gather()
+    test_replica_routing()
+    test_replica_fallback()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test the cached company and user directory
+"""
+
+from datetime import datetime
+from cache_backends import MemoryBackend, SharedCache
+from directory import DirectoryService, COMPANIES, USERS
+
+COMPANY_ROWS = [
+    {'id': 3, 'company_name': 'Gamma', 'company_code': 'GAM', 'verification_status': 'pending',
+     'created_at': datetime(2024, 3, 1)},
+    {'id': 2, 'company_name': 'Beta', 'company_code': 'BET', 'verification_status': 'verified',
+     'created_at': datetime(2024, 2, 1)},
+    {'id': 1, 'company_name': 'Alpha', 'company_code': 'ALP', 'verification_status': 'verified',
+     'created_at': datetime(2024, 1, 1)},
+]
+
+USER_ROWS = [
+    {'id': 11, 'username': 'carol', 'role': 'normal_user', 'company_id': 2, 'is_active': 1},
+    {'id': 10, 'username': 'bob', 'role': 'company_admin', 'company_id': 2, 'is_active': 0},
+    {'id': 9, 'username': 'admin', 'role': 'admin', 'company_id': None, 'is_active': 1},
+]
+
+class Loader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return list(self.rows)
+
+def test_directory_indexes():
+    print("🧪 Testing Directory Indexes")
+    print("=" * 30)
+
+    service = DirectoryService(SharedCache(MemoryBackend(), 'directory'))
+    companies = service.companies(Loader(COMPANY_ROWS))
+    assert [c['id'] for c in companies.list()] == [3, 2, 1]
+    assert [c['id'] for c in companies.list('verified')] == [2, 1]
+    assert companies.list('rejected') == []
+    assert companies.get(2)['company_name'] == 'Beta'
+    assert companies.by_code('ALP')['id'] == 1
+    assert companies.status_counts() == {'pending': 1, 'verified': 2}
+    print("✅ Companies by status, id and code")
+
+    users = service.users(Loader(USER_ROWS))
+    assert [u['id'] for u in users.list(company_id=2)] == [11, 10]
+    assert [u['id'] for u in users.list(company_id=2, is_active=True)] == [11]
+    assert [u['id'] for u in users.list(role='admin')] == [9]
+    assert [u['id'] for u in users.list(is_active=False)] == [10]
+    assert users.role_counts() == {'normal_user': 1, 'company_admin': 1, 'admin': 1}
+    print("✅ Users by company, role and status")
+
+def test_directory_caching():
+    print("\n🧪 Testing Directory Caching")
+    print("=" * 30)
+
+    backend = MemoryBackend()
+    first = DirectoryService(SharedCache(backend, 'directory'))
+    second = DirectoryService(SharedCache(backend, 'directory'))
+    load_companies = Loader(COMPANY_ROWS)
+
+    for _ in range(3):
+        first.companies(load_companies).list('pending')
+    assert load_companies.calls == 1
+    second.companies(load_companies)
+    assert load_companies.calls == 1
+    print("✅ One query serves every page render and instance")
+
+    first.invalidate(COMPANIES)
+    second.companies(load_companies)
+    assert load_companies.calls == 2
+    first.companies(load_companies)
+    assert load_companies.calls == 2
+    print("✅ Invalidation reaches every instance")
+
+    load_users = Loader(USER_ROWS)
+    first.users(load_users)
+    first.invalidate(COMPANIES)
+    first.users(load_users)
+    assert load_users.calls == 1
+    first.invalidate(USERS)
+    first.users(load_users)
+    assert load_users.calls == 2
+    print("✅ Listings are invalidated independently")
+
+    empty = Loader([])
+    first.invalidate(COMPANIES)
+    assert first.companies(empty).list() == []
+    assert first.companies(empty).list() == []
+    assert empty.calls == 2
+    print(f"✅ Empty listings are not cached: {first.stats()}")
+    print("\n🎉 Directory tests completed!")
+
+if __name__ == "__main__":
+    test_directory_indexes()
+    test_directory_caching()
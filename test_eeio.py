@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the spend-based EEIO calculation and ledger import
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+
+from database_operations import DatabaseManager, eeio_model_cache
+from eeio import EEIOModel, insert_ledger, read_ledger_csv, replace_mapping
+
+SECTORS = [(1, 'SIC-69', 'Legal and accounting', 0.1), (2, 'SIC-26', 'Computers', 0.5),
+           (3, 'SIC-41', 'Construction', 0.4)]
+# 7100 is split: 60% computers (category 1), 40% building works (category 2)
+MAPPINGS = [('6000', 1, 'S3-01', 1.0), ('7100', 2, 'S3-01', 0.6), ('7100', 3, 'S3-02', 0.4),
+            ('8000', 99, 'S3-01', 1.0)]
+
+class RecordingCursor:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class ModelConnection:
+    """Answers the EEIO model queries with the given sectors and mappings, or raises"""
+
+    def __init__(self, sectors, mappings, fail=False):
+        self.results = {'eeio_sectors': sectors, 'ledger_sector_map': mappings}
+        self.fail = fail
+
+    def cursor(self):
+        connection = self
+        cursor = RecordingCursor()
+
+        def execute(query, params=None):
+            if connection.fail:
+                raise Error("Lost connection to MySQL server during query")
+            table = 'ledger_sector_map' if 'ledger_sector_map' in query else 'eeio_sectors'
+            cursor.rows = connection.results[table]
+        cursor.execute = execute
+        return cursor
+
+def test_model():
+    print("🧪 Testing EEIO Model")
+    print("=" * 30)
+
+    model = EEIOModel(SECTORS, MAPPINGS)
+    assert model.mappings['S3-01'].shape == (2, 3) and model.mappings['S3-01'].nnz == 2
+    assert np.allclose(model.account_intensity, [[0.1, 0.0], [0.3, 0.16]])
+    print("✅ Mapping shares as sparse matrices, unknown sectors ignored")
+
+    totals = model.totals(['6000', '7100', '7100', '9999'], [100.0, 50.0, 50.0, 10.0])
+    assert np.isclose(totals['categories']['S3-01']['co2e'], 100 * 0.1 + 60 * 0.5)
+    assert np.isclose(totals['categories']['S3-01']['spend'], 160.0)
+    assert np.isclose(totals['categories']['S3-02']['co2e'], 40 * 0.4)
+    assert totals['unmapped_spend'] == 10.0 and list(totals['unmapped_accounts']['account_code']) == ['9999']
+    print("✅ Category totals from the ledger spend per account")
+
+    sectors = model.sector_breakdown(['6000', '7100'], [100.0, 100.0])
+    assert list(sectors['sector_code']) == ['SIC-26', 'SIC-41', 'SIC-69']
+    assert np.isclose(sectors['co2e'].sum(), model.totals(['6000', '7100'], [100.0, 100.0])['total_co2e'])
+    print("✅ Sector breakdown adds up to the totals")
+
+    empty = EEIOModel(SECTORS)
+    assert empty.totals(['6000'], [5.0])['total_co2e'] == 0.0
+
+def test_ledger_import():
+    print("\n🧪 Testing Ledger Import")
+    print("=" * 30)
+
+    ledger = read_ledger_csv(io.StringIO(
+        "Nominal Code,Details,Vendor,Net Amount\n"
+        "6000,Audit fee,Acme LLP,\"£1,200.50\"\n"
+        "7100,Laptops,,830\n"
+    ))
+    assert list(ledger['account_code']) == ['6000', '7100']
+    assert list(ledger['amount']) == [1200.5, 830.0]
+    assert ledger['supplier'].iloc[1] is None
+    print("✅ Ledger CSV headers and amounts normalised")
+
+    cursor = RecordingCursor()
+    assert insert_ledger(cursor, 1, '2024', ledger, 'gl-2024', chunk_size=1) == 2
+    assert cursor.statements[0][0].startswith('DELETE FROM ledger_lines')
+    assert len(cursor.statements) == 3
+    assert cursor.statements[2][1] == (1, '2024', '7100', 'Laptops', None, 830.0, 'gl-2024')
+    print("✅ Ledger lines replaced with chunked multi-row inserts")
+
+    try:
+        read_ledger_csv(io.StringIO("Account,Amount\n6000,\n"))
+        assert False, "line without an amount accepted"
+    except ValueError:
+        pass
+    try:
+        replace_mapping(RecordingCursor([(1, 'SIC-69')]), 1,
+                        pd.DataFrame({'account_code': ['6000'], 'sector_code': ['SIC-99']}))
+        assert False, "unknown sector accepted"
+    except ValueError:
+        print("✅ Invalid ledger lines and unknown sectors rejected")
+
+def test_model_cache():
+    print("\n🧪 Testing EEIO Model Cache")
+    print("=" * 30)
+
+    eeio_model_cache.clear()
+    db = DatabaseManager()
+    db.connection = ModelConnection(SECTORS, MAPPINGS, fail=True)
+    assert db.get_eeio_model(1).totals(['6000'], [5.0])['total_co2e'] == 0.0
+    assert eeio_model_cache.get(1) is None
+    db.connection = ModelConnection([], MAPPINGS)
+    db.get_eeio_model(1)
+    assert eeio_model_cache.get(1) is None
+    print("✅ Failed or empty reads are not cached")
+
+    db.connection = ModelConnection(SECTORS, MAPPINGS)
+    model = db.get_eeio_model(1)
+    assert model.mappings['S3-01'].nnz == 2 and eeio_model_cache.get(1) is model
+    print("✅ Models from a successful read are cached")
+    eeio_model_cache.clear()
+    print("\n🎉 EEIO tests completed!")
+
+if __name__ == "__main__":
+    test_model()
+    test_ledger_import()
+    test_model_cache()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test the time-versioned emission factor index
+"""
+
+from datetime import date
+
+import numpy as np
+
+from factor_versions import FactorVersionIndex, period_start
+
+VERSIONS = [
+    (1, 0.21, date(2024, 1, 1), None, 'Release 2024'),
+    (1, 0.20, date(2023, 1, 1), date(2023, 12, 31), 'Release 2023'),
+    (2, 5.0, date(2024, 7, 1), None, None),
+    (3, 1.5, date(2022, 1, 1), date(2022, 12, 31), None)
+]
+
+def test_period_start():
+    print("🧪 Testing Reporting Period Parsing")
+    print("=" * 30)
+
+    assert period_start('2024') == date(2024, 1, 1)
+    assert period_start('Q3-2024') == date(2024, 7, 1)
+    assert period_start('2024-Q4') == date(2024, 10, 1)
+    assert period_start('2024-05') == date(2024, 5, 1)
+    assert period_start('2024-13') is None
+    assert period_start('FY24') is None and period_start(None) is None
+    print("✅ Periods map to their first day")
+
+def test_factor_version_lookup():
+    print("\n🧪 Testing Factor Version Lookup")
+    print("=" * 30)
+
+    index = FactorVersionIndex(VERSIONS)
+    assert len(index) == 4
+    factors = index.factors_for(
+        [1, 1, 1, 2, 2, 3, 3, 4, 1],
+        ['2022', '2023', 'Q2-2024', 'Q2-2024', 'Q3-2024', '2022', '2023', '2024', 'someday']
+    )
+    expected = [np.nan, 0.20, 0.21, np.nan, 5.0, 1.5, np.nan, np.nan, np.nan]
+    assert np.allclose(factors, expected, equal_nan=True)
+    print("✅ Whole batch resolved across periods in one call")
+
+    assert index.factor(1, '2023') == 0.20 and index.factor(3, '2030') is None
+    assert [version['valid_from'] for version in index.versions(1)] == [date(2023, 1, 1), date(2024, 1, 1)]
+    assert index.versions(1)[-1]['valid_to'] is None and index.versions(9) == []
+    assert np.isnan(FactorVersionIndex([]).factors_for([1], ['2024'])).all()
+    print("✅ Scalar lookups and version history")
+
+    overlapping = FactorVersionIndex([
+        (5, 1.0, date(2020, 1, 1), None, 'Open'),
+        (5, 2.0, date(2022, 1, 1), date(2022, 12, 31), 'Correction for 2022'),
+        (5, 3.0, date(2022, 7, 1), date(2022, 9, 30), 'Correction for Q3-2022'),
+        (6, 0.5, date(1969, 1, 1), date(1969, 12, 31), None)
+    ])
+    factors = overlapping.factors_for([5] * 6 + [6, 6],
+                                      ['2021', '2022', 'Q3-2022', 'Q4-2022', '2023', '2019', '1969', '1970'])
+    assert np.allclose(factors, [1.0, 2.0, 3.0, 2.0, 1.0, np.nan, 0.5, np.nan], equal_nan=True)
+    assert len(overlapping) == 4 and len(overlapping.versions(5)) == 3
+    print("✅ Overlapping versions resolved, earlier open version resumes after a correction")
+    print("\n🎉 Factor version tests completed!")
+
+if __name__ == "__main__":
+    test_period_start()
+    test_factor_version_lookup()
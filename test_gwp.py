@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test the multi-gas GWP calculation
+"""
+
+import numpy as np
+import pandas as pd
+
+from category_catalog import CategoryIndex
+from ghg_calculator import GHGCalculator
+from gwp import GASES, GasFactorMatrix, gas_emissions, gwp_rows, to_co2e
+from fake_database import GasDatabase, make_category
+
+def make_index():
+    return CategoryIndex([
+        make_category(1, 1, 'S1-04', 'S1-04-01', 1430.0),   # R-134a
+        make_category(2, 1, 'S1-04', 'S1-04-05', 2088.0),   # R-410A
+        make_category(3, 2, 'S2-EC', 'S2-EC-01', 0.5)       # no gas split
+    ])
+
+GAS_ROWS = [(1, 'HFC-134a', 1.0), (2, 'HFC-32', 0.5), (2, 'HFC-125', 0.5), (99, 'CO2', 1.0)]
+
+def test_gas_factor_matrix():
+    print("🧪 Testing Gas Factor Matrix")
+    print("=" * 30)
+
+    matrix = GasFactorMatrix(make_index(), GAS_ROWS)
+    assert matrix.split_categories == 2
+    rows, found = matrix.factors_for([3, 2, 42])
+    assert list(found) == [True, True, False]
+    assert rows[0, GASES.index('CO2e')] == 0.5 and rows[0].sum() == 0.5
+    assert rows[1, GASES.index('HFC-32')] == 0.5 and rows[1, GASES.index('CO2e')] == 0.0
+    assert not rows[2].any()
+    print("✅ Gas rows replace the CO2e factor, unsplit categories keep it")
+
+    co2e = to_co2e(gas_emissions(rows, [10.0, 2.0, 1.0]), ['AR4', 'AR5', 'AR6'])
+    assert co2e.shape == (3, 3)
+    assert np.allclose(co2e[0], 5.0)
+    assert np.allclose(co2e[1], [2 * 0.5 * (675 + 3500), 2 * 0.5 * (677 + 3170), 2 * 0.5 * (771 + 3740)])
+    print("✅ CO2e under every GWP set in one product")
+
+    try:
+        gwp_rows(['AR3'])
+        assert False, "unknown GWP set accepted"
+    except ValueError:
+        print("✅ Unknown GWP sets rejected")
+
+def test_calculate_gases():
+    print("\n🧪 Testing Gas-Level Batch Calculation")
+    print("=" * 30)
+
+    calculator = GHGCalculator(GasDatabase(make_index(), GAS_ROWS))
+    result = calculator.calculate_gases(pd.DataFrame({
+        'category_id': [1, 2, 3, 1],
+        'activity_data': [2.0, 4.0, 100.0, 1.0],
+        'emission_factor': [np.nan, np.nan, np.nan, 1500.0]
+    }), ['AR4', 'AR6'])
+
+    assert list(result['kg_HFC-134a']) == [2.0, 0.0, 0.0, 0.0]
+    assert np.allclose(result['co2e_AR4'], result['co2_equivalent'])
+    assert np.allclose(result['co2e_AR6'], [3060.0, 2 * (771 + 3740), 50.0, 1500.0])
+    print("✅ Default GWP set reproduces the catalogue CO2e; custom factors stay CO2e")
+
+def test_restate_inventory():
+    print("\n🧪 Testing Inventory Restatement")
+    print("=" * 30)
+
+    # category_id, activity_data, emission_factor, co2_equivalent as stored
+    emissions_rows = [(1, 2.0, 1430.0, 2860.0), (2, 4.0, 2088.0, 8352.0), (3, 100.0, 0.5, 50.0)]
+    calculator = GHGCalculator(GasDatabase(make_index(), GAS_ROWS, emissions_rows))
+    restated = calculator.restate_inventory(1, '2024').set_index('category_id')
+
+    assert list(restated['co2e_AR4']) == [row[3] for row in emissions_rows]
+    assert np.isclose(restated.loc[2, 'kg_HFC-32'], 2.0) and np.isclose(restated.loc[2, 'kg_HFC-125'], 2.0)
+    assert np.isclose(restated.loc[2, 'co2e_AR6'], 2 * (771 + 3740))
+    print("✅ AR4 to AR4 restatement is an identity; other sets restate gas by gas")
+    print("\n🎉 GWP tests completed!")
+
+if __name__ == "__main__":
+    test_gas_factor_matrix()
+    test_calculate_gases()
+    test_restate_inventory()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the keyset pagination cursors used by the View Data page
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from database_operations import DatabaseManager
+
+def make_row(row_id, created_at):
+    return (row_id, 1, 7, 3, '2024', 10.0, 2.5, 25.0, 'Meter', 'Activity', 'pending', None,
+            created_at, created_at, 'Diesel', 1, 'Scope 1', 'kg CO2e/litre', 'Acme')
+
+class KeysetDatabase(DatabaseManager):
+    """Answers the emissions page query from rows in memory, applying the keyset like MySQL"""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+        self.queries = []
+
+    def fetch_query(self, query, params=None):
+        self.queries.append((query, params))
+        *conditions, limit = params
+        newer = 'ORDER BY e.created_at ASC' in query
+        rows = sorted(self.rows, key=lambda row: (row[12], row[0]), reverse=not newer)
+        if conditions:
+            created_at, _, row_id = conditions
+            if newer:
+                rows = [row for row in rows if (row[12], row[0]) > (created_at, row_id)]
+            else:
+                rows = [row for row in rows if (row[12], row[0]) < (created_at, row_id)]
+        return rows[:limit]
+
+def page_ids(page):
+    return [row['id'] for row in page['rows']]
+
+def test_cursor_round_trip():
+    print("🧪 Testing Page Cursor Encoding")
+    print("=" * 30)
+
+    db = DatabaseManager()
+    created_at = datetime(2024, 5, 1, 9, 30, 15)
+    cursor = db._encode_page_cursor({'created_at': created_at, 'id': 42})
+    assert db._decode_page_cursor(cursor) == (created_at, 42)
+    assert cursor.isascii() and '+' not in cursor and '/' not in cursor
+    print("✅ Cursors round-trip (created_at, id) as URL-safe tokens")
+
+    tied = db._encode_page_cursor({'created_at': created_at, 'id': 43})
+    assert tied != cursor and db._decode_page_cursor(tied) == (created_at, 43)
+    print("✅ Rows sharing created_at get distinct cursors")
+
+    query, params = db._emissions_data_query(company_id=1, keyset=(created_at, 42))
+    assert "(e.created_at < %s OR (e.created_at = %s AND e.id < %s))" in query
+    assert params == [1, created_at, created_at, 42]
+    assert query.rstrip().endswith("ORDER BY e.created_at DESC, e.id DESC")
+    query, _ = db._emissions_data_query(keyset=(created_at, 42), newer=True)
+    assert "e.id > %s" in query and query.rstrip().endswith("ORDER BY e.created_at ASC, e.id ASC")
+    print("✅ The keyset compares (created_at, id) so ties break on id")
+
+def test_invalid_cursors():
+    print("\n🧪 Testing Invalid Page Cursors")
+    print("=" * 30)
+
+    db = DatabaseManager()
+    cursor = db._encode_page_cursor({'created_at': datetime(2024, 5, 1), 'id': 42})
+    tampered = [
+        'not base64!',
+        cursor[:-3],
+        base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+        base64.urlsafe_b64encode(b'{"created_at": "2024-05-01"}').decode(),
+        base64.urlsafe_b64encode(json.dumps(42).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps(['yesterday', 42]).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps(['2024-05-01T00:00:00', 'x']).encode()).decode(),
+        base64.urlsafe_b64encode(json.dumps(['2024-05-01T00:00:00', 42, 1]).encode()).decode(),
+    ]
+    for token in tampered:
+        assert db._decode_page_cursor(token) is None, token
+    print("✅ Tampered or malformed cursors decode to None")
+
+    rows = [make_row(row_id, datetime(2024, 5, row_id)) for row_id in range(1, 4)]
+    page = KeysetDatabase(rows).get_emissions_page(page_size=2, cursor='not base64!')
+    assert page_ids(page) == [3, 2] and page['prev_cursor'] is None
+    print("✅ An invalid cursor falls back to the first page")
+
+def test_paging_through_ties():
+    print("\n🧪 Testing Keyset Paging Through Tied Timestamps")
+    print("=" * 30)
+
+    tied = datetime(2024, 5, 1, 12, 0)
+    rows = [make_row(row_id, tied) for row_id in range(1, 6)] + [make_row(6, datetime(2024, 5, 2))]
+    db = KeysetDatabase(rows)
+    pages = [db.get_emissions_page(page_size=2)]
+    while pages[-1]['next_cursor']:
+        pages.append(db.get_emissions_page(page_size=2, cursor=pages[-1]['next_cursor']))
+    assert [page_ids(page) for page in pages] == [[6, 5], [4, 3], [2, 1]]
+    assert pages[0]['prev_cursor'] is None and pages[-1]['next_cursor'] is None
+    print("✅ Every row appears exactly once when created_at values tie")
+
+    previous = db.get_emissions_page(page_size=2, cursor=pages[2]['prev_cursor'], direction='prev')
+    assert page_ids(previous) == [4, 3] and previous['next_cursor'] and previous['prev_cursor']
+    first = db.get_emissions_page(page_size=2, cursor=previous['prev_cursor'], direction='prev')
+    assert page_ids(first) == [6, 5] and first['prev_cursor'] is None
+    print("✅ Paging back returns the same pages in newest-first order")
+    print("\n🎉 Page cursor tests completed!")
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_invalid_cursors()
+    test_paging_through_ties()
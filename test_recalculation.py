@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test the chunked emissions recalculation job against a scripted connection
+"""
+
+from mysql.connector import Error
+
+from database_operations import DatabaseManager, summary_cache
+from recalculation import RecalculationJob
+
+class ScriptedCursor:
+    """Answers the job's SELECTs from a list of emissions_data ids"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.result = None
+
+    def execute(self, query, params=None):
+        self.connection.statements.append((' '.join(query.split()), params))
+        ids = self.connection.ids
+        if query.lstrip().startswith('SELECT COUNT(*) FROM emissions_data'):
+            self.result = [(len(ids),)]
+        elif 'LIMIT %s\n) chunk' in query:
+            last_id, limit = params[-2:]
+            chunk = [i for i in ids if i > last_id][:limit]
+            self.result = [(len(chunk), chunk[-1] if chunk else None)]
+        elif 'COALESCE(SUM' in query:
+            low, high = params[-2:]
+            rows = [i for i in ids if low < i <= high]
+            self.result = [(len(rows), 1.0 * len(rows), 2.0 * len(rows))]
+        elif 'ORDER BY e.id\nLIMIT %s' in query:
+            low, high, limit = params[-3:]
+            self.result = [(i, 1, '2024', 10.0, 0.1, 1.0, 2.0) for i in ids if low < i <= high][:limit]
+        elif query.lstrip().startswith('UPDATE emissions_data'):
+            low, high = params[-2:]
+            self.connection.ids = [i for i in ids if not low < i <= high]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+class ScriptedConnection:
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.statements = []
+        self.commits = 0
+
+    def cursor(self):
+        return ScriptedCursor(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+class FailingConnection(ScriptedConnection):
+    """Raises on the row update of the ``fail_chunk``-th chunk"""
+
+    def __init__(self, ids, fail_chunk):
+        super().__init__(ids)
+        self.fail_chunk = fail_chunk
+        self.rollbacks = 0
+
+    def cursor(self):
+        cursor = ScriptedCursor(self)
+        execute = cursor.execute
+
+        def failing_execute(query, params=None):
+            if query.lstrip().startswith('UPDATE emissions_data') and self.commits + 1 == self.fail_chunk:
+                raise Error("Lock wait timeout exceeded")
+            execute(query, params)
+        cursor.execute = failing_execute
+        return cursor
+
+    def rollback(self):
+        self.rollbacks += 1
+
+def test_dry_run():
+    print("🧪 Testing Recalculation Dry Run")
+    print("=" * 30)
+
+    connection = ScriptedConnection([3, 5, 8, 13, 21])
+    progress = []
+    job = RecalculationJob(connection, 12, 0.2, ['2024'], old_factor=0.1, chunk_size=2,
+                           sample_size=3, progress=lambda done, total: progress.append((done, total)))
+    report = job.run(dry_run=True)
+
+    assert report['rows'] == 5 and len(report['chunks']) == 3
+    assert [(c['first_id'], c['last_id']) for c in report['chunks']] == [(1, 5), (6, 13), (14, 21)]
+    assert report['co2e_delta'] == 5.0
+    assert [row['id'] for row in report['sample']] == [3, 5, 8]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert connection.ids == [3, 5, 8, 13, 21] and connection.commits == 0
+    assert not any(query.startswith(('UPDATE', 'INSERT')) for query, _ in connection.statements)
+    print("✅ Chunks, totals and sample reported without writing")
+
+def test_apply():
+    print("\n🧪 Testing Recalculation Run")
+    print("=" * 30)
+
+    connection = ScriptedConnection(range(1, 11))
+    report = RecalculationJob(connection, 12, 0.2, chunk_size=4, user_id=7, all_factors=True).run()
+
+    assert report['rows'] == 10 and connection.ids == [] and connection.commits == 3
+    updates = [query for query, _ in connection.statements if query.startswith('UPDATE')]
+    audits = [params for query, params in connection.statements if query.startswith('INSERT INTO audit_trail')]
+    assert len(updates) == 6  # rollup adjustment and row update per chunk
+    assert updates[0].startswith('UPDATE emissions_rollup') and 'e.id > %s AND e.id <= %s' in updates[1]
+    assert [params[1] for params in audits] == [4, 8, 10]
+    print("✅ One transaction, rollup adjustment and audit record per chunk")
+
+def test_row_selection():
+    print("\n🧪 Testing Recalculation Row Selection")
+    print("=" * 30)
+
+    job = RecalculationJob(ScriptedConnection([]), 12, 0.2, ['2024'], old_factor=0.1)
+    assert job._filter.endswith("e.emission_factor = ROUND(%s, 6)") and job._filter_params == [12, '2024', 0.1]
+    job = RecalculationJob(ScriptedConnection([]), 12, 0.2, all_factors=True)
+    assert job._filter.endswith("e.emission_factor <> ROUND(%s, 6)") and job._filter_params == [12, 0.2]
+    print("✅ Rows with custom factors are only selected with all_factors")
+
+    for kwargs in ({}, {'old_factor': 0.1, 'all_factors': True}):
+        try:
+            RecalculationJob(ScriptedConnection([]), 12, 0.2, **kwargs)
+            assert False, f"accepted {kwargs}"
+        except ValueError:
+            pass
+    db = DatabaseManager()
+    db.connection = ScriptedConnection(range(1, 5))
+    assert db.recalculate_emissions(12, new_factor=0.2) is None
+    assert db.connection.statements == []
+    print("✅ Neither or both selections are refused before touching any rows")
+
+def test_partial_failure():
+    print("\n🧪 Testing Recalculation Failure")
+    print("=" * 30)
+
+    connection = FailingConnection(range(1, 11), fail_chunk=2)
+    job = RecalculationJob(connection, 12, 0.2, old_factor=0.1, chunk_size=4)
+    try:
+        job.run()
+        assert False, "chunk error swallowed"
+    except Error:
+        pass
+    assert job.report['rows'] == 4 and len(job.report['chunks']) == 1
+    assert connection.commits == 1 and connection.rollbacks == 1 and connection.ids == list(range(5, 11))
+    print("✅ Job report keeps the chunks committed before the failure")
+
+    db = DatabaseManager()
+    db.connection = FailingConnection(range(1, 11), fail_chunk=2)
+    generation = summary_cache.generation()
+    report = db.recalculate_emissions(12, new_factor=0.2, old_factor=0.1, chunk_size=4)
+    assert report is not None and report['error'] and report['rows'] == 4
+    assert report['co2e_delta'] == 4.0 and len(report['jobs']) == 1
+    assert summary_cache.generation() != generation
+    assert db._state().get('db_last_write_at')
+    print("✅ Partial report returned and caches invalidated after a failed chunk")
+    print("\n🎉 Recalculation tests completed!")
+
+if __name__ == "__main__":
+    test_dry_run()
+    test_apply()
+    test_row_selection()
+    test_partial_failure()
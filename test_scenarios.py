@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the what-if scenario model
+"""
+
+import numpy as np
+
+from scenarios import Lever, ScenarioModel
+
+def make_breakdown():
+    # Fleet diesel (km), grid electricity (kWh), air travel (passenger.km)
+    return [
+        {'category_id': 4, 'scope_number': 1, 'category_name': 'Mobile Combustion',
+         'subcategory_name': 'Diesel Vans', 'total_activity': 10000.0, 'total_emissions': 2500.0},
+        {'category_id': 9, 'scope_number': 2, 'category_name': 'Electricity',
+         'subcategory_name': 'Grid', 'total_activity': 20000.0, 'total_emissions': 4000.0},
+        {'category_id': 15, 'scope_number': 3, 'category_name': 'Business Travel',
+         'subcategory_name': 'Air', 'total_activity': 50000.0, 'total_emissions': 7500.0}
+    ]
+
+def test_levers():
+    print("🧪 Testing Scenario Levers")
+    print("=" * 30)
+
+    model = ScenarioModel(make_breakdown())
+    baseline = model.result('Baseline')
+    assert (baseline['scope_1'], baseline['scope_2'], baseline['scope_3']) == (2500.0, 4000.0, 7500.0)
+
+    model.add_scenario('Travel', [Lever('Cut air travel 30%', [15], multiplier=0.7)])
+    travel = model.result('Travel')
+    assert np.isclose(travel['scope_3'], 5250.0)
+    assert np.isclose(travel['reduction'], 2250.0) and np.isclose(travel['reduction_pct'], 2250.0 / 140.0)
+    print("✅ Multipliers scale a category's activity and emissions")
+
+    model.add_scenario('EV fleet', [Lever('Half the vans electric', [4], factor=0.05, share=0.5)])
+    assert np.isclose(model.result('EV fleet')['scope_1'], 1250.0 + 5000.0 * 0.05)
+    model.add_lever('EV fleet', Lever('Fewer trips', [4], multiplier=0.9))
+    assert np.isclose(model.result('EV fleet')['scope_1'], (1250.0 + 250.0) * 0.9)
+    print("✅ Factor substitutions and stacked levers")
+
+    try:
+        Lever('Bad', [4], share=1.5)
+        assert False, "share above 1 accepted"
+    except ValueError:
+        print("✅ Invalid levers rejected")
+
+def test_incremental_recompute():
+    print("\n🧪 Testing Incremental Recompute")
+    print("=" * 30)
+
+    model = ScenarioModel(make_breakdown())
+    model.add_scenario('Combined', [Lever('Travel', [15], multiplier=0.5), Lever('Green power', [9], factor=0.0)])
+    before = model.stats()['categories_recomputed']
+    model.add_lever('Combined', Lever('Unknown category', [99], multiplier=0.0))
+    model.remove_lever('Combined', 'Travel')
+    assert model.stats()['categories_recomputed'] - before == 1  # only air travel replayed
+    combined = model.result('Combined')
+    assert (combined['scope_1'], combined['scope_2'], combined['scope_3']) == (2500.0, 0.0, 7500.0)
+    assert list(model.category_changes('Combined')['category_id']) == [9]
+    print("✅ Only the categories a lever touches are recomputed")
+
+    for number in range(30):
+        model.add_scenario(f"Cut {number}%", [Lever('Cut', [4, 9, 15], multiplier=1 - number / 100)])
+    comparison = model.compare()
+    assert len(comparison) == 32 and comparison.iloc[0]['scenario'] == 'Baseline'
+    assert np.isclose(comparison.set_index('scenario').loc['Cut 10%', 'total'], 14000.0 * 0.9)
+    print("✅ Dozens of scenarios compared from one baseline")
+
+    breakdown = make_breakdown()
+    breakdown[1]['total_activity'], breakdown[1]['total_emissions'] = 30000.0, 6000.0
+    model.rebase(breakdown)
+    assert model.result('Combined')['scope_2'] == 0.0
+    assert np.isclose(model.result('Cut 10%')['scope_2'], 5400.0)
+    print("✅ Scenarios replayed on a new baseline")
+    print("\n🎉 Scenario tests completed!")
+
+if __name__ == "__main__":
+    test_levers()
+    test_incremental_recompute()
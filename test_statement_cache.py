@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test the prepared statement registry and the prepared query paths
+"""
+
+from mysql.connector import Error, errorcode
+
+from connection_pool import ConnectionPool
+from database_operations import DatabaseManager, summary_cache
+from statement_cache import PreparedStatementCache, statement_cache
+
+class FakePreparedCursor:
+    """Prepares like MySQLCursorPrepared: only when handed a different query object"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statement_id = None
+        self._executed = None
+        self.closed = False
+
+    def execute(self, query, params=None):
+        if self.connection.fail_with is not None:
+            raise Error(msg="Deadlock found", errno=self.connection.fail_with)
+        if query is not self._executed:
+            self.connection.prepares += 1
+            self.statement_id = self.connection.prepares
+            self.connection.statements.add(self.statement_id)
+            self._executed = query
+        elif self.statement_id not in self.connection.statements:
+            self.connection.unknown_handlers += 1
+            raise Error(msg="Unknown prepared statement handler", errno=errorcode.ER_UNKNOWN_STMT_HANDLER)
+        self.connection.executed.append(params)
+
+    def fetchall(self):
+        return self.connection.rows
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    """Frees its prepared statements on reset_session(), like COM_RESET_CONNECTION"""
+
+    in_transaction = False
+
+    def __init__(self, connection_id=1, rows=()):
+        self.connection_id = connection_id
+        self.rows = list(rows)
+        self.statements = set()
+        self.prepares = 0
+        self.unknown_handlers = 0
+        self.executed = []
+        self.fail_with = None
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, prepared=False):
+        return FakePreparedCursor(self)
+
+    def reset_session(self):
+        self.statements.clear()
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        pass
+
+QUERY = "SELECT id FROM users WHERE username = ?"
+
+def test_registry():
+    print("🧪 Testing Prepared Statement Registry")
+    print("=" * 30)
+
+    cache = PreparedStatementCache()
+    first, second = FakeConnection(1), FakeConnection(2)
+    cursor = cache.cursor(first, 'user', QUERY)
+    assert cache.cursor(first, 'user', QUERY) is cursor
+    assert cache.cursor(second, 'user', QUERY) is not cursor
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2 and cache.stats()['connections'] == 2
+    print("✅ Hits on the same connection, one registry per connection")
+
+    assert cache.cursor(first, 'user', QUERY + " LIMIT 1") is not cursor
+    first.connection_id = 9
+    cache.cursor(first, 'user', QUERY)
+    assert cache.stats()['reprepares'] == 1
+    print("✅ Changed queries and reconnected connections prepare again")
+
+    cursor = cache.cursor(first, 'user', QUERY)
+    cache.discard(first, 'user')
+    assert cursor.closed and cache.cursor(first, 'user', QUERY) is not cursor
+    cache.cursor(first, 'other', QUERY)
+    cache.discard(first)
+    assert cache.stats()['connections'] == 1 and cache.stats()['statements'] == 1
+    print("✅ Discard drops one statement or a connection's whole registry")
+
+def test_prepared_queries():
+    print("\n🧪 Testing Prepared Query Paths")
+    print("=" * 30)
+
+    db = DatabaseManager()
+    db.connection = FakeConnection(rows=[(7,)])
+    assert db.fetch_prepared('test_user', QUERY, ('ann',)) == [(7,)]
+    assert db.fetch_one_prepared('test_user', QUERY, ('ann',)) == (7,)
+    assert db.connection.prepares == 1
+    print("✅ Repeated calls execute the statement prepared once")
+
+    db.connection.fail_with = errorcode.ER_LOCK_DEADLOCK
+    assert db.fetch_prepared('test_user', QUERY, ('ann',)) == []
+    assert db.fetch_one_prepared('test_user', QUERY, ('ann',)) is None
+    assert not db.execute_prepared('test_update', "UPDATE users SET is_active = ?", (0,))
+    assert not db.execute_prepared_transaction([('test_update', "UPDATE users SET is_active = ?", (0,))])
+    assert db.connection.rollbacks == 2 and db.connection.commits == 0
+    db.connection.fail_with = None
+    assert db.execute_prepared_transaction([('test_update', "UPDATE users SET is_active = ?", (1,))])
+    assert db.connection.commits == 1
+    print("✅ Errors return empty results or False, roll back and discard the statement")
+
+    assert db.fetch_prepared('test_user', QUERY, ('ann',)) == [(7,)]
+    db.connection.reset_session()  # a reset the registry did not hear about
+    assert db.fetch_prepared('test_user', QUERY, ('ann',)) == [(7,)]
+    assert db.connection.unknown_handlers == 1
+    print("✅ Statements freed by the server are prepared again and retried")
+
+def test_pool_reset():
+    print("\n🧪 Testing Prepared Statements Across Pool Resets")
+    print("=" * 30)
+
+    connection = FakeConnection(connection_id=42, rows=[(7,)])
+    pool = ConnectionPool({}, pool_size=1, max_overflow=0, name='statement_test',
+                          connection_factory=lambda **config: connection, on_reset=statement_cache.discard)
+    db = DatabaseManager()
+    db.connection_pool = pool
+    for _ in range(3):
+        with db.session():
+            assert db.fetch_one_prepared('test_user', QUERY, ('ann',)) == (7,)
+    assert connection.prepares == 3 and len(connection.executed) == 3
+    assert connection.unknown_handlers == 0  # the reset hook dropped the old handles
+    print("✅ Each borrow after a reset prepares afresh instead of failing")
+
+def test_summary_statements():
+    print("\n🧪 Testing Emissions Summary Statements")
+    print("=" * 30)
+
+    db = DatabaseManager()
+    db.connection = FakeConnection(rows=[(1, 'Scope 1', 10.0, 2)])
+    before = statement_cache.stats()['hits']
+    for _ in range(3):
+        summary_cache.invalidate()
+        assert db.get_emissions_summary(5, '2024')['scope_1'] == 10.0
+    assert db.connection.prepares == 1 and statement_cache.stats()['hits'] - before == 2
+    summary_cache.invalidate()
+    print("✅ The summary statement is prepared once per filter shape")
+    print("\n🎉 Statement cache tests completed!")
+
+if __name__ == "__main__":
+    test_registry()
+    test_prepared_queries()
+    test_pool_reset()
+    test_summary_statements()
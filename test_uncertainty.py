@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test the Monte Carlo uncertainty simulation
+"""
+
+import numpy as np
+import pandas as pd
+
+from uncertainty import MonteCarloSimulation, attach_uncertainty
+
+def make_lines():
+    # Scope 1 and 2 lines with known CO2e, one invalid line
+    return pd.DataFrame({
+        'category_id': [3, 3, 3, 7, 7, 9],
+        'scope_number': [1, 1, 1, 2, 2, 3],
+        'co2_equivalent': [100.0, 200.0, 300.0, 50.0, 50.0, 1000.0],
+        'valid': [True, True, True, True, True, False],
+        'activity_uncertainty': [0.1, 0.1, 0.1, np.nan, np.nan, np.nan]
+    })
+
+def test_attach_uncertainty():
+    print("🧪 Testing Uncertainty Defaults")
+    print("=" * 30)
+
+    lines = attach_uncertainty(make_lines(), defaults={1: (0.05, 0.07), 2: (0.02, 0.10), 3: (0.3, 0.5)})
+    assert list(lines['activity_uncertainty']) == [0.1, 0.1, 0.1, 0.02, 0.02, 0.3]
+    assert list(lines['factor_uncertainty']) == [0.07, 0.07, 0.07, 0.10, 0.10, 0.5]
+    assert set(lines['factor_distribution']) == {'lognormal'}
+    print("✅ Missing uncertainties come from the scope defaults")
+
+    try:
+        attach_uncertainty(make_lines().assign(activity_distribution='uniform'))
+        assert False, "unknown distribution accepted"
+    except ValueError:
+        print("✅ Unknown distributions rejected")
+
+def test_simulation():
+    print("\n🧪 Testing Monte Carlo Simulation")
+    print("=" * 30)
+
+    lines = make_lines()
+    result = MonteCarloSimulation(samples=20000, seed=42, chunk_lines=2).run(lines, key=1)
+    assert result['lines'] == 5
+    assert result['total']['point'] == 700.0
+    assert result['total']['p5'] < result['total']['p50'] < result['total']['p95']
+    assert abs(result['total']['mean'] - 700.0) < 3.0
+    print("✅ Invalid lines left out, mean close to the point estimate")
+
+    by_scope = result['by_scope'].set_index('scope_number')
+    assert list(by_scope['point']) == [600.0, 100.0]
+    assert np.isclose(by_scope['mean'].sum(), result['total']['mean'])
+    # Scope 2 defaults: ±5% activity on each of two lines, ±10% factor shared by both
+    expected = 1.645 * 100.0 * np.hypot(0.05 / 1.96 / np.sqrt(2), 0.10 / 1.96)
+    assert abs((by_scope.loc[2, 'p95'] - by_scope.loc[2, 'p5']) / 2 - expected) < 0.05 * expected
+    assert list(result['by_category']['category_id']) == [3, 7]
+    print("✅ Scope ranges match the analytical spread")
+
+    same = MonteCarloSimulation(samples=20000, seed=42, chunk_lines=2, workers=2).run(lines, key=1)
+    assert same['total'] == result['total']
+    print("✅ Seeded results do not depend on the number of workers")
+
+    many = MonteCarloSimulation(samples=1000, seed=7).run_many({1: lines, 2: lines.head(3)})
+    assert many[2]['total']['point'] == 600.0
+    assert many[1]['total'] == MonteCarloSimulation(samples=1000, seed=7).run(lines, key=1)['total']
+    print("✅ Many inventories, each with its own reproducible stream")
+    print("\n🎉 Uncertainty tests completed!")
+
+if __name__ == "__main__":
+    test_attach_uncertainty()
+    test_simulation()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the unit registry and vectorized unit conversion
+"""
+
+import numpy as np
+
+from unit_conversion import UnitRegistry, activity_unit
+
+def test_unit_parsing():
+    print("🧪 Testing Unit Parsing")
+    print("=" * 30)
+
+    assert activity_unit('kg CO2e/litre') == 'litre'
+    assert activity_unit('kg CO2e/tonne.km') == 'tonne.km'
+    assert activity_unit('kg CO2e/m²/year') == 'm².year'
+    assert activity_unit('kg CO2e') == ''
+    print("✅ Activity units extracted from category units")
+
+    registry = UnitRegistry()
+    assert registry.parse('kWh').dimension == registry.parse('therm').dimension
+    assert registry.parse('m²').dimension == (('length', 2),)
+    assert registry.parse('m^2').scale == registry.parse('m2').scale == 1.0
+    assert registry.parse('passenger.km').dimension == (('count:passenger', 1), ('length', 1))
+    assert registry.parse('passengers.miles').dimension == registry.parse('passenger.km').dimension
+    assert registry.parse('') is None
+    assert registry.parse('room.night').dimension == (('count:night', 1), ('count:room', 1))
+    print("✅ Unit expressions parsed into dimension vectors")
+
+    for expression in ['gas', 'ms', 'passanger.km', 'ton', 'tons', 'm^x']:
+        try:
+            registry.parse(expression)
+            assert False, f"{expression!r} accepted"
+        except ValueError:
+            pass
+    assert registry.parse('us_tons').scale == registry.parse('short_ton').scale
+    print("✅ Unknown units, ambiguous tons and non-unit plurals rejected")
+
+def test_unit_conversion():
+    print("\n🧪 Testing Unit Conversion")
+    print("=" * 30)
+
+    registry = UnitRegistry()
+    assert np.isclose(registry.factor('gallon', 'litre'), 3.785411784)
+    assert np.isclose(registry.factor('therm', 'kWh'), 29.3071070)
+    assert np.isclose(registry.factor('MJ', 'kWh'), 1 / 3.6)
+    assert np.isclose(registry.factor('tonne.mile', 'tonne.km'), 1.609344)
+    assert np.isclose(registry.factor('ft²', 'm²'), 0.09290304)
+    assert np.isnan(registry.factor('gallon', 'kWh'))
+    assert np.isnan(registry.factor('passenger.km', 'tonne.km'))
+    assert np.isnan(registry.factor('galons', 'litre'))
+    print("✅ Scalar factors between compatible units only")
+
+    converted = registry.convert(
+        [1.0, 2.0, 3.0, 4.0, 5.0],
+        ['gallon', '', None, 'miles', 'kg'],
+        ['litre', 'litre', 'km', 'km', 'kWh']
+    )
+    assert np.allclose(converted[:4], [3.785411784, 2.0, 3.0, 6.437376])
+    assert np.isnan(converted[4])
+    assert registry.compatible_units('litre') == ['litre', 'gallon', 'uk_gallon', 'barrel', 'm³']
+    print(f"✅ Mixed-unit arrays converted in one pass: {registry.stats()}")
+    print("\n🎉 Unit conversion tests completed!")
+
+if __name__ == "__main__":
+    test_unit_parsing()
+    test_unit_conversion()
@@ -0,0 +1,216 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Uncertainties are relative half-widths of the 95% confidence interval
+# (0.05 = ±5%), as the GHG Protocol uncertainty guidance quotes them.
+# Defaults per scope, (activity data, emission factor), for lines without any
+DEFAULT_UNCERTAINTY = {
+    1: (0.05, 0.07),   # metered fuel, well-established combustion factors
+    2: (0.05, 0.10),   # invoiced electricity, grid-average factors
+    3: (0.30, 0.50),   # spend and estimates, averaged supply-chain factors
+}
+DEFAULT_DISTRIBUTIONS = ('normal', 'lognormal')  # (activity data, emission factor)
+
+# Both have mean 1 and the same relative standard deviation; lognormal is
+# skewed and never negative, normal samples are truncated at zero
+DISTRIBUTIONS = ['normal', 'lognormal']
+PERCENTILES = (5, 50, 95)
+
+_Z95 = 1.959963984540054
+
+
+def attach_uncertainty(lines: pd.DataFrame, defaults: Dict[int, Tuple[float, float]] = None,
+                       distributions: Tuple[str, str] = DEFAULT_DISTRIBUTIONS) -> pd.DataFrame:
+    """Fill in the uncertainty columns of calculated lines.
+
+    Missing ``activity_uncertainty`` and ``factor_uncertainty`` values come
+    from ``defaults`` by ``scope_number``; missing distributions from
+    ``distributions``. Existing values are kept.
+    """
+    defaults = DEFAULT_UNCERTAINTY if defaults is None else defaults
+    lines = lines.copy()
+    scopes = lines['scope_number']
+    for position, column in enumerate(['activity_uncertainty', 'factor_uncertainty']):
+        by_scope = scopes.map({scope: values[position] for scope, values in defaults.items()})
+        existing = pd.to_numeric(lines[column], errors='coerce') if column in lines else pd.Series(np.nan, lines.index)
+        lines[column] = by_scope.where(pd.isna(existing), existing).astype(np.float64)
+        if lines[column].isna().any():
+            raise ValueError(f"No {column} for scope(s) {sorted(set(scopes[lines[column].isna()]))}")
+    for column, default in zip(['activity_distribution', 'factor_distribution'], distributions):
+        values = lines[column].astype(object) if column in lines else pd.Series(None, lines.index, dtype=object)
+        lines[column] = values.where(values.notna(), default)
+        unknown = set(lines[column]) - set(DISTRIBUTIONS)
+        if unknown:
+            raise ValueError(f"Unknown distribution(s): {', '.join(sorted(map(str, unknown)))}")
+    return lines
+
+
+def _samples(z: np.ndarray, means: np.ndarray, uncertainty: np.ndarray, lognormal: np.ndarray):
+    """Turn standard normal draws (rows x samples) into samples in place.
+
+    Row i gets mean ``means[i]`` and relative standard deviation
+    ``uncertainty[i] / 1.96``.
+    """
+    for rows, transform in ((~lognormal, _normal), (lognormal, _lognormal)):
+        if rows.all():
+            transform(z, means, uncertainty)
+        elif rows.any():
+            part = z[rows]
+            transform(part, means[rows], uncertainty[rows])
+            z[rows] = part
+
+
+def _normal(z, means, uncertainty):
+    z *= (means * uncertainty / _Z95).astype(z.dtype)[:, None]
+    z += means.astype(z.dtype)[:, None]
+    np.maximum(z, 0, out=z)
+
+
+def _lognormal(z, means, uncertainty):
+    sigma = np.sqrt(np.log1p((uncertainty / _Z95) ** 2))
+    z *= sigma.astype(z.dtype)[:, None]
+    with np.errstate(divide='ignore'):  # zero emissions stay zero
+        z += (np.log(means) - sigma ** 2 / 2).astype(z.dtype)[:, None]
+    np.exp(z, out=z)
+
+
+def _simulate_chunk(emissions: np.ndarray, uncertainty: np.ndarray, lognormal: np.ndarray,
+                    groups: np.ndarray, samples: int, seed: np.random.SeedSequence):
+    """Sampled activity-side emissions of one chunk of lines, summed per group.
+
+    Lines arrive sorted by group; returns the groups present and their
+    (groups x samples) sums.
+    """
+    z = np.random.default_rng(seed).standard_normal((len(emissions), samples), dtype=np.float32)
+    _samples(z, emissions, uncertainty, lognormal)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    return groups[starts], np.add.reduceat(z, starts, axis=0).astype(np.float64)
+
+
+def _fold(codes: np.ndarray, count: int, totals: np.ndarray) -> np.ndarray:
+    """Sum rows of ``totals`` into ``count`` rows by code"""
+    membership = np.zeros((count, len(codes)))
+    membership[codes, np.arange(len(codes))] = 1.0
+    return membership @ totals
+
+
+class MonteCarloSimulation:
+    """Monte Carlo uncertainty ranges for emissions inventories.
+
+    Every line gets ``samples`` draws of its activity data (independent per
+    line) times a draw of its emission factor. Factor errors are systematic,
+    so lines sharing a category and factor uncertainty share the factor
+    draw. Draws are float32 arrays of ``chunk_lines`` lines at a time,
+    reduced per category as they go, so memory stays bounded. Chunks run in
+    a process pool when ``workers`` > 1. Given a ``seed`` the result is the
+    same for any number of workers.
+    """
+
+    def __init__(self, samples: int = 10000, seed: int = None, chunk_lines: int = 2000, workers: int = 1):
+        self.samples = samples
+        self.seed = seed
+        self.chunk_lines = chunk_lines
+        self.workers = workers
+        self._entropy = np.random.SeedSequence(seed).entropy
+
+    def run(self, lines: pd.DataFrame, key: int = 0) -> Dict[str, Any]:
+        """Percentiles of the CO2e totals of one inventory.
+
+        ``lines`` are ``calculate_batch`` results; invalid lines are left
+        out and missing uncertainty columns get the defaults. ``key`` picks
+        an independent random stream, e.g. the company id. Returns the
+        ``total`` as a dict and ``by_scope`` and ``by_category`` as
+        DataFrames, each with the point estimate, mean, p5, p50, p95 and the
+        half-width of the 90% range as a percentage of the mean.
+        """
+        if 'valid' in lines:
+            lines = lines[lines['valid'].to_numpy(dtype=bool)]
+        lines = attach_uncertainty(lines)
+
+        factor_keys = ['category_id', 'factor_uncertainty', 'factor_distribution']
+        factor_groups = lines.groupby(factor_keys, sort=True).ngroup().to_numpy()
+        order = np.argsort(factor_groups, kind='stable')
+        groups = factor_groups[order]
+        emissions = lines['co2_equivalent'].to_numpy(dtype=np.float64)[order]
+        uncertainty = lines['activity_uncertainty'].to_numpy(dtype=np.float64)[order]
+        lognormal = (lines['activity_distribution'] == 'lognormal').to_numpy()[order]
+
+        factors = lines.iloc[order].drop_duplicates(factor_keys)  # one row per group, in group order
+        activity_totals = np.zeros((len(factors), self.samples))
+        for present, sums in self._map_chunks(emissions, uncertainty, lognormal, groups, key):
+            activity_totals[present] += sums
+
+        factor_draws = np.random.default_rng(self._seed(key, 0)).standard_normal(
+            (len(factors), self.samples), dtype=np.float32
+        )
+        _samples(factor_draws, np.ones(len(factors)), factors['factor_uncertainty'].to_numpy(dtype=np.float64),
+                 (factors['factor_distribution'] == 'lognormal').to_numpy())
+        group_totals = activity_totals * factor_draws
+
+        category_codes, category_ids = pd.factorize(factors['category_id'], sort=True)
+        category_totals = _fold(category_codes, len(category_ids), group_totals)
+        scope_of_category = factors.groupby('category_id', sort=True)['scope_number'].first()
+        scope_codes, scopes = pd.factorize(scope_of_category, sort=True)
+        scope_totals = _fold(scope_codes, len(scopes), category_totals)
+
+        point_by_category = lines.groupby('category_id', sort=True)['co2_equivalent'].sum()
+        point_by_scope = lines.groupby('scope_number', sort=True)['co2_equivalent'].sum()
+        by_category = self._summarise(category_totals, point_by_category.to_numpy())
+        by_category.insert(0, 'category_id', np.asarray(category_ids))
+        by_category.insert(1, 'scope_number', scope_of_category.to_numpy())
+        by_scope = self._summarise(scope_totals, point_by_scope.to_numpy())
+        by_scope.insert(0, 'scope_number', np.asarray(scopes))
+        total = self._summarise(scope_totals.sum(axis=0, keepdims=True),
+                                np.array([lines['co2_equivalent'].sum()]))
+
+        return {
+            'samples': self.samples,
+            'lines': len(lines),
+            'total': total.iloc[0].to_dict() if len(lines) else {},
+            'by_scope': by_scope,
+            'by_category': by_category
+        }
+
+    def run_many(self, inventories: Dict[int, pd.DataFrame]) -> Dict[int, Dict[str, Any]]:
+        """``run`` for many inventories keyed by company id, one process per inventory"""
+        keys = list(inventories)
+        serial = MonteCarloSimulation(self.samples, self.seed, self.chunk_lines, workers=1)
+        serial._entropy = self._entropy
+        if self.workers <= 1 or len(keys) <= 1:
+            return {key: serial.run(inventories[key], key) for key in keys}
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(serial.run, [inventories[key] for key in keys], keys)
+            return dict(zip(keys, results))
+
+    def _seed(self, key: int, *stream: int) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self._entropy, spawn_key=(int(key),) + stream)
+
+    def _map_chunks(self, emissions, uncertainty, lognormal, groups, key):
+        starts = range(0, len(emissions), self.chunk_lines)
+        chunks = [
+            (emissions[start:start + self.chunk_lines], uncertainty[start:start + self.chunk_lines],
+             lognormal[start:start + self.chunk_lines], groups[start:start + self.chunk_lines],
+             self.samples, self._seed(key, 1, number))
+            for number, start in enumerate(starts)
+        ]
+        if self.workers <= 1 or len(chunks) <= 1:
+            return [_simulate_chunk(*chunk) for chunk in chunks]
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(_simulate_chunk, *zip(*chunks)))
+
+    @staticmethod
+    def _summarise(totals: np.ndarray, point: np.ndarray) -> pd.DataFrame:
+        percentiles = np.percentile(totals, PERCENTILES, axis=1) if totals.size else np.zeros((3, 0))
+        mean = totals.mean(axis=1) if totals.size else np.zeros(0)
+        summary = pd.DataFrame({'point': point, 'mean': mean})
+        for percentile, values in zip(PERCENTILES, percentiles):
+            summary[f"p{percentile}"] = values
+        with np.errstate(invalid='ignore', divide='ignore'):
+            summary['uncertainty_pct'] = (summary['p95'] - summary['p5']) / 2 / summary['mean'] * 100
+        return summary
@@ -0,0 +1,225 @@
+import re
+import threading
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# A dimension is a sorted tuple of (base dimension, exponent) pairs, e.g.
+# (('length', 1), ('mass', 1)) for tonne.km. Things counted by category units
+# (passenger, room, night, unit, ...) are each their own count dimension, so
+# passenger.km converts to passenger.mile but never to tonne.km.
+Dimension = Tuple[Tuple[str, int], ...]
+
+MASS = (('mass', 1),)
+LENGTH = (('length', 1),)
+VOLUME = (('length', 3),)
+ENERGY = (('length', 2), ('mass', 1), ('time', -2))
+TIME = (('time', 1),)
+CURRENCY = (('currency', 1),)
+
+# name -> (factor to the SI base unit, dimension)
+UNITS: Dict[str, Tuple[float, Dimension]] = {
+    # Mass
+    'kg': (1.0, MASS), 'g': (1e-3, MASS), 'tonne': (1000.0, MASS), 't': (1000.0, MASS),
+    'lb': (0.45359237, MASS), 'short_ton': (907.18474, MASS), 'long_ton': (1016.0469088, MASS),
+    # Length
+    'm': (1.0, LENGTH), 'km': (1000.0, LENGTH), 'mile': (1609.344, LENGTH), 'mi': (1609.344, LENGTH),
+    'ft': (0.3048, LENGTH), 'nmi': (1852.0, LENGTH),
+    # Volume
+    'litre': (1e-3, VOLUME), 'liter': (1e-3, VOLUME), 'L': (1e-3, VOLUME), 'l': (1e-3, VOLUME),
+    'ml': (1e-6, VOLUME), 'gallon': (3.785411784e-3, VOLUME), 'gal': (3.785411784e-3, VOLUME),
+    'uk_gallon': (4.54609e-3, VOLUME), 'barrel': (0.158987294928, VOLUME),
+    # Energy
+    'J': (1.0, ENERGY), 'kJ': (1e3, ENERGY), 'MJ': (1e6, ENERGY), 'GJ': (1e9, ENERGY),
+    'Wh': (3.6e3, ENERGY), 'kWh': (3.6e6, ENERGY), 'MWh': (3.6e9, ENERGY), 'GWh': (3.6e12, ENERGY),
+    'therm': (105.505585257348e6, ENERGY), 'BTU': (1055.05585262, ENERGY),
+    'MMBtu': (1055.05585262e6, ENERGY),
+    # Time
+    's': (1.0, TIME), 'min': (60.0, TIME), 'hour': (3600.0, TIME), 'h': (3600.0, TIME),
+    'day': (86400.0, TIME), 'week': (604800.0, TIME), 'year': (31557600.0, TIME),
+    # Spend (no exchange rates: other currencies are separate dimensions)
+    '£': (1.0, CURRENCY), 'GBP': (1.0, CURRENCY), 'pence': (0.01, CURRENCY),
+}
+
+# Counted things used in category units
+COUNT_UNITS = ['passenger', 'room', 'night', 'unit', 'meal', 'trip', 'delivery', 'franchise',
+               'location', 'user', 'vehicle']
+UNITS.update({name: (1.0, ((f"count:{name}", 1),)) for name in COUNT_UNITS})
+
+# Units whose plural is the name plus 's' (miles, tonnes, passengers, ...).
+# Other names are never singularized: 'ms' is not metres and 'gas' is not 'ga'.
+_PLURAL_UNITS = ['tonne', 'short_ton', 'long_ton', 'metric_ton', 'us_ton', 'uk_ton', 'mile', 'litre',
+                 'liter', 'gallon', 'uk_gallon', 'barrel', 'therm', 'hour', 'day', 'week', 'year'] + COUNT_UNITS
+
+# Case-insensitive spellings for the names above. 'ton' is deliberately not
+# one of them: it is a short ton in US data and a tonne elsewhere.
+_ALIASES = {name.lower(): name for name in UNITS}
+_ALIASES.update({'kwh': 'kWh', 'mwh': 'MWh', 'gwh': 'GWh', 'mj': 'MJ', 'gj': 'GJ',
+                 'btu': 'BTU', 'mmbtu': 'MMBtu', 'hr': 'hour', 'yr': 'year', 'lbs': 'lb',
+                 'kgs': 'kg', 'kms': 'km', 'hrs': 'hour', 'yrs': 'year',
+                 'metric_ton': 'tonne', 'us_ton': 'short_ton', 'uk_ton': 'long_ton'})
+_ALIASES.update({f"{name}s": _ALIASES.get(name, name) for name in _PLURAL_UNITS})
+
+_SUPERSCRIPTS = {'²': '2', '³': '3'}
+_TERM = re.compile(r'^(?P<name>[^\d^]+?)\^?(?P<power>-?\d+)?$')
+
+
+def activity_unit(category_unit: str) -> str:
+    """The activity part of a category unit: 'kg CO2e/tonne.km' -> 'tonne.km'.
+
+    Every '/' after the emission unit divides it further, so
+    'kg CO2e/m²/year' is per m².year.
+    """
+    parts = [part.strip() for part in (category_unit or '').split('/')]
+    return '.'.join(part for part in parts[1:] if part)
+
+
+def _combine(dimension: Dict[str, int], other: Dimension, power: int):
+    for name, exponent in other:
+        dimension[name] = dimension.get(name, 0) + exponent * power
+        if not dimension[name]:
+            del dimension[name]
+
+
+class Unit:
+    """A parsed unit: its factor to the SI base unit and its dimension"""
+
+    __slots__ = ('expression', 'scale', 'dimension')
+
+    def __init__(self, expression: str, scale: float, dimension: Dimension):
+        self.expression = expression
+        self.scale = scale
+        self.dimension = dimension
+
+    def __repr__(self) -> str:
+        return f"Unit({self.expression!r}, scale={self.scale}, dimension={self.dimension})"
+
+
+class UnitRegistry:
+    """Parses unit expressions once and converts arrays between them.
+
+    Expressions multiply terms with '.' or ' ' and divide with '/', and
+    terms take powers as m², m2 or m^2. Parsed units and conversion factors
+    between pairs of expressions are cached, so bulk conversion only looks
+    factors up.
+    """
+
+    def __init__(self, units: Dict[str, Tuple[float, Dimension]] = None):
+        self.units = dict(UNITS if units is None else units)
+        self._lock = threading.Lock()
+        self._parsed: Dict[str, Optional[Unit]] = {}
+        self._factors: Dict[Tuple[str, str], float] = {}
+
+    def parse(self, expression: str) -> Optional[Unit]:
+        """Parse a unit expression, or None if it is blank.
+
+        Raises ValueError for malformed terms and unknown unit names.
+        """
+        with self._lock:
+            if expression in self._parsed:
+                return self._parsed[expression]
+        unit = self._parse(expression)
+        with self._lock:
+            self._parsed[expression] = unit
+        return unit
+
+    def _parse(self, expression: str) -> Optional[Unit]:
+        text = ''.join(_SUPERSCRIPTS.get(char, char) for char in (expression or '').strip())
+        if not text:
+            return None
+
+        scale = 1.0
+        dimension: Dict[str, int] = {}
+        for position, group in enumerate(text.split('/')):
+            sign = 1 if position == 0 else -1
+            for term in re.split(r'[.\s*·]+', group.strip()):
+                if not term:
+                    continue
+                match = _TERM.match(term)
+                if not match:
+                    raise ValueError(f"Cannot parse unit term {term!r} in {expression!r}")
+                power = sign * int(match.group('power') or 1)
+                term_scale, term_dimension = self._lookup(match.group('name'))
+                scale *= term_scale ** power
+                _combine(dimension, term_dimension, power)
+        return Unit(expression, scale, tuple(sorted(dimension.items())))
+
+    def _lookup(self, name: str) -> Tuple[float, Dimension]:
+        # Exact name, then a case-insensitive or plural alias
+        unit = name if name in self.units else _ALIASES.get(name.lower())
+        if unit not in self.units:
+            raise ValueError(f"Unknown unit {name!r}")
+        return self.units[unit]
+
+    def factor(self, from_unit: str, to_unit: str) -> float:
+        """Multiplier taking values in ``from_unit`` to ``to_unit`` (NaN if incompatible)"""
+        key = (from_unit, to_unit)
+        with self._lock:
+            if key in self._factors:
+                return self._factors[key]
+        try:
+            source, target = self.parse(from_unit), self.parse(to_unit)
+        except ValueError as e:
+            logger.error(f"Cannot convert {from_unit!r} to {to_unit!r}: {e}")
+            source = target = None
+        if source is None or target is None or source.dimension != target.dimension:
+            factor = np.nan
+        else:
+            factor = source.scale / target.scale
+        with self._lock:
+            self._factors[key] = factor
+        return factor
+
+    def compatible(self, from_unit: str, to_unit: str) -> bool:
+        return not np.isnan(self.factor(from_unit, to_unit))
+
+    def factors(self, from_units: Sequence[str], to_units: Sequence[str]) -> np.ndarray:
+        """Conversion factors for paired arrays of unit expressions.
+
+        Only the distinct units are resolved, into a small (from x to)
+        table that every line gathers from. Blank or missing source units
+        mean the value is already in the target unit.
+        """
+        from_codes, from_uniques = pd.factorize(np.asarray(from_units, dtype=object))
+        to_codes, to_uniques = pd.factorize(np.asarray(to_units, dtype=object))
+        # factorize marks missing values with -1; they sort into column/row 0
+        table = np.array([
+            [self._pair_factor(source, target) for target in [None] + list(to_uniques)]
+            for source in [None] + list(from_uniques)
+        ], dtype=np.float64)
+        return table[from_codes + 1, to_codes + 1]
+
+    def _pair_factor(self, source: Optional[str], target: Optional[str]) -> float:
+        if source is None or not str(source).strip():
+            return 1.0
+        if target is None:
+            return np.nan
+        return self.factor(str(source), str(target))
+
+    def convert(self, values, from_units: Sequence[str], to_units: Sequence[str]) -> np.ndarray:
+        """Convert an array of values between paired unit arrays (NaN where incompatible)"""
+        return np.asarray(values, dtype=np.float64) * self.factors(from_units, to_units)
+
+    def compatible_units(self, unit: str, candidates: Sequence[str] = None) -> List[str]:
+        """Units from ``candidates`` (default: common input units) that convert to ``unit``"""
+        if candidates is None:
+            candidates = COMMON_INPUT_UNITS
+        return [candidate for candidate in candidates if self.compatible(candidate, unit)]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'parsed_units': len(self._parsed), 'conversion_pairs': len(self._factors)}
+
+
+# Offered as input units in the emissions form
+COMMON_INPUT_UNITS = [
+    'kg', 'tonne', 'lb', 'short_ton', 'litre', 'gallon', 'uk_gallon', 'barrel', 'm³',
+    'kWh', 'MWh', 'MJ', 'GJ', 'therm', 'MMBtu', 'km', 'mile', 'tonne.km', 'tonne.mile',
+    'passenger.km', 'passenger.mile', 'm²', 'ft²', 'hour', 'day', '£'
+]
+
+unit_registry = UnitRegistry()